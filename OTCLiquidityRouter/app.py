@@ -1,15 +1,29 @@
 import os
+import csv
+import io
 import logging
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+import time
 
 from jupiter_api import JupiterAPI
 from otc_engine import OTCEngine
-from trade_logger import TradeLogger
+from router import Router, VENUES
+from order_splitter import OrderSplitter
+from order_scheduler import OrderScheduler, SliceSettled
+from liquidity_store import LiquidityStore
+from trade_logger import TradeLogger, TRADE_FIELDS, brackets_from_edges
+from trade_executor import TradeExecutor, ExecutorBusy
+from quote_aggregator import QuoteAggregator
+from price_refresher import PriceRefresher
+from migrations import ensure_columns, ensure_indexes, drop_indexes, check_hot_query_plans
+from metrics_store import MetricsStore, parse_step
+from live_feed import LiveFeed
+from conditional_get import etag_for, not_modified, with_etag, init_compression
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -31,21 +45,310 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
 }
 
+# Settle OTC trades on a background executor instead of the request thread. The queue depth defaults to
+# (and is capped at) what the workers can settle within OTC_RESERVATION_TTL; 0 derives it
+app.config["OTC_ASYNC_EXECUTION"] = os.environ.get("OTC_ASYNC_EXECUTION", "true").lower() == "true"
+app.config["OTC_EXECUTOR_WORKERS"] = int(os.environ.get("OTC_EXECUTOR_WORKERS", 8))
+app.config["OTC_EXECUTOR_MAX_PENDING"] = int(os.environ.get("OTC_EXECUTOR_MAX_PENDING", 0)) or None
+
+# Buffer trade logging and flush in batches (set TRADE_LOG_WRITE_BEHIND=false for per-trade commits)
+app.config["TRADE_LOG_WRITE_BEHIND"] = os.environ.get("TRADE_LOG_WRITE_BEHIND", "false").lower() == "true"
+app.config["TRADE_LOG_BATCH_SIZE"] = int(os.environ.get("TRADE_LOG_BATCH_SIZE", 100))
+app.config["TRADE_LOG_FLUSH_INTERVAL"] = float(os.environ.get("TRADE_LOG_FLUSH_INTERVAL", 1.0))
+# Buffered trades before log_trade falls back to synchronous writes, and failed flushes before a trade is dead-lettered
+app.config["TRADE_LOG_MAX_BUFFER"] = int(os.environ.get("TRADE_LOG_MAX_BUFFER", 10000))
+app.config["TRADE_LOG_MAX_ATTEMPTS"] = int(os.environ.get("TRADE_LOG_MAX_ATTEMPTS", 5))
+
+# Per-venue quote deadlines (seconds) for the concurrent quote fan-out
+app.config["JUPITER_QUOTE_DEADLINE"] = float(os.environ.get("JUPITER_QUOTE_DEADLINE", 10))
+app.config["OTC_QUOTE_DEADLINE"] = float(os.environ.get("OTC_QUOTE_DEADLINE", 5))
+
+# Largest pairs x amounts grid accepted by /api/quotes/batch
+app.config["QUOTE_BATCH_MAX_SIZE"] = int(os.environ.get("QUOTE_BATCH_MAX_SIZE", 1000))
+
+# Background refresh of the multi-token price snapshot
+app.config["PRICE_REFRESH_ENABLED"] = os.environ.get("PRICE_REFRESH_ENABLED", "true").lower() == "true"
+app.config["PRICE_REFRESH_INTERVAL"] = float(os.environ.get("PRICE_REFRESH_INTERVAL", 60))
+app.config["PRICE_REFRESH_MAX_BACKOFF"] = float(os.environ.get("PRICE_REFRESH_MAX_BACKOFF", 300))
+
+# Tiered SystemMetrics retention: raw rows, then 1-minute, then 1-hour buckets
+app.config["METRICS_RAW_RETENTION_HOURS"] = float(os.environ.get("METRICS_RAW_RETENTION_HOURS", 24))
+app.config["METRICS_MINUTE_RETENTION_DAYS"] = float(os.environ.get("METRICS_MINUTE_RETENTION_DAYS", 14))
+app.config["METRICS_HOUR_RETENTION_DAYS"] = float(os.environ.get("METRICS_HOUR_RETENTION_DAYS", 365))
+app.config["METRICS_COMPACTION_ENABLED"] = os.environ.get("METRICS_COMPACTION_ENABLED", "true").lower() == "true"
+app.config["METRICS_COMPACTION_INTERVAL"] = float(os.environ.get("METRICS_COMPACTION_INTERVAL", 300))
+
+# Compress JSON/CSV responses of at least this many bytes (brotli when installed, else gzip)
+app.config["RESPONSE_COMPRESSION"] = os.environ.get("RESPONSE_COMPRESSION", "true").lower() == "true"
+app.config["RESPONSE_COMPRESSION_MIN_BYTES"] = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+
+# OTC pool liquidity: quote snapshot cache lifetime and how long an unsettled reservation is held (seconds)
+app.config["OTC_LIQUIDITY_CACHE_TTL"] = float(os.environ.get("OTC_LIQUIDITY_CACHE_TTL", 1.0))
+app.config["OTC_RESERVATION_TTL"] = float(os.environ.get("OTC_RESERVATION_TTL", 60))
+
+# Venue scoring: proportional fees (bps), expected settlement latency (seconds) and the cost of that latency (bps per second)
+app.config["DEX_FEE_BPS"] = float(os.environ.get("DEX_FEE_BPS", 0))
+app.config["OTC_FEE_BPS"] = float(os.environ.get("OTC_FEE_BPS", 0))
+app.config["DEX_SETTLEMENT_SECONDS"] = float(os.environ.get("DEX_SETTLEMENT_SECONDS", 0.4))
+app.config["ROUTER_RISK_BPS_PER_SECOND"] = float(os.environ.get("ROUTER_RISK_BPS_PER_SECOND", 1.0))
+
+# Jupiter depth probes per split-routing plan
+app.config["SPLIT_CURVE_POINTS"] = int(os.environ.get("SPLIT_CURVE_POINTS", 8))
+
+# Scheduled (TWAP/VWAP) parent orders: default slice size, limits and the executor for child orders
+app.config["SCHEDULER_ENABLED"] = os.environ.get("SCHEDULER_ENABLED", "true").lower() == "true"
+app.config["SCHEDULER_WORKERS"] = int(os.environ.get("SCHEDULER_WORKERS", 4))
+app.config["SCHEDULER_POLL_INTERVAL"] = float(os.environ.get("SCHEDULER_POLL_INTERVAL", 1.0))
+app.config["SCHEDULER_SLICE_SIZE"] = float(os.environ.get("SCHEDULER_SLICE_SIZE", 500))
+app.config["SCHEDULER_MAX_SLICES"] = int(os.environ.get("SCHEDULER_MAX_SLICES", 1000))
+app.config["SCHEDULER_DEFAULT_INTERVAL"] = float(os.environ.get("SCHEDULER_DEFAULT_INTERVAL", 60))
+app.config["SCHEDULER_MAX_ATTEMPTS"] = int(os.environ.get("SCHEDULER_MAX_ATTEMPTS", 3))
+app.config["SCHEDULER_RETRY_DELAY"] = float(os.environ.get("SCHEDULER_RETRY_DELAY", 30))
+
+# Server-Sent Events dashboard feed: change-check interval and per-connection lifetime (seconds)
+app.config["LIVE_FEED_INTERVAL"] = float(os.environ.get("LIVE_FEED_INTERVAL", 1.0))
+app.config["LIVE_STREAM_MAX_SECONDS"] = float(os.environ.get("LIVE_STREAM_MAX_SECONDS", 300))
+
 # Initialize the app with the extension
 db.init_app(app)
+if app.config["RESPONSE_COMPRESSION"]:
+    init_compression(app, min_size=app.config["RESPONSE_COMPRESSION_MIN_BYTES"])
 
 # Initialize services
 jupiter_api = JupiterAPI()
-otc_engine = OTCEngine()
-trade_logger = TradeLogger()
+liquidity_store = LiquidityStore(cache_ttl=app.config["OTC_LIQUIDITY_CACHE_TTL"],
+                                 reservation_ttl=app.config["OTC_RESERVATION_TTL"])
+otc_engine = OTCEngine(jupiter_api=jupiter_api, liquidity_store=liquidity_store)
+router = Router(risk_bps_per_s=app.config["ROUTER_RISK_BPS_PER_SECOND"])
+router.configure_venue('DEX', fee_bps=app.config["DEX_FEE_BPS"], latency_s=app.config["DEX_SETTLEMENT_SECONDS"])
+router.configure_venue('OTC', fee_bps=app.config["OTC_FEE_BPS"], latency_s=sum(otc_engine.execution_delay_range) / 2)
+order_splitter = OrderSplitter(jupiter_api, otc_engine, router=router, curve_points=app.config["SPLIT_CURVE_POINTS"])
+trade_logger = TradeLogger(write_behind=app.config["TRADE_LOG_WRITE_BEHIND"],
+                           batch_size=app.config["TRADE_LOG_BATCH_SIZE"],
+                           flush_interval=app.config["TRADE_LOG_FLUSH_INTERVAL"],
+                           max_buffer=app.config["TRADE_LOG_MAX_BUFFER"],
+                           max_attempts=app.config["TRADE_LOG_MAX_ATTEMPTS"])
+trade_executor = TradeExecutor(otc_engine, trade_logger, max_workers=app.config["OTC_EXECUTOR_WORKERS"],
+                               max_pending=app.config["OTC_EXECUTOR_MAX_PENDING"])
+trade_executor.init_app(app)
+
+price_refresher = PriceRefresher(jupiter_api,
+                                 interval=app.config["PRICE_REFRESH_INTERVAL"],
+                                 max_backoff=app.config["PRICE_REFRESH_MAX_BACKOFF"])
+metrics_store = MetricsStore(raw_retention=timedelta(hours=app.config["METRICS_RAW_RETENTION_HOURS"]),
+                             minute_retention=timedelta(days=app.config["METRICS_MINUTE_RETENTION_DAYS"]),
+                             hour_retention=timedelta(days=app.config["METRICS_HOUR_RETENTION_DAYS"]))
+live_feed = LiveFeed(trade_logger, jupiter_api, interval=app.config["LIVE_FEED_INTERVAL"])
+
+def _jupiter_venue_quote(input_token, output_token, amount, use_cache=True):
+    return jupiter_api.get_quote(
+        input_mint=jupiter_api.get_token_mint(input_token),
+        output_mint=jupiter_api.get_token_mint(output_token),
+        amount=int(amount * 1e9),  # Convert to lamports
+        use_cache=use_cache
+    )
+
+async def _jupiter_venue_quote_async(input_token, output_token, amount, use_cache=True):
+    return await jupiter_api.get_quote_async(
+        input_mint=jupiter_api.get_token_mint(input_token),
+        output_mint=jupiter_api.get_token_mint(output_token),
+        amount=int(amount * 1e9),  # Convert to lamports
+        use_cache=use_cache
+    )
+
+quote_aggregator = QuoteAggregator()
+quote_aggregator.register_venue('jupiter', _jupiter_venue_quote, deadline=app.config["JUPITER_QUOTE_DEADLINE"],
+                                async_quote_fn=_jupiter_venue_quote_async)
+quote_aggregator.register_venue('otc', otc_engine.get_otc_quote, deadline=app.config["OTC_QUOTE_DEADLINE"],
+                                async_quote_fn=otc_engine.get_otc_quote_async)
+
+def _quote_etag(input_token, output_token, amount):
+    """ETag for /api/quote while both venues would answer from cache, else None"""
+    jupiter_version = jupiter_api.quote_version(jupiter_api.get_token_mint(input_token),
+                                                jupiter_api.get_token_mint(output_token),
+                                                int(amount * 1e9))
+    otc_version = otc_engine.quote_version(input_token, output_token)
+    if jupiter_version is None or otc_version is None:
+        return None
+    return etag_for('quote', input_token, output_token, amount, jupiter_version, otc_version)
+
+def _otc_quote_from(aggregated):
+    """Pull the OTC quote out of an aggregated result, tolerating a missed deadline"""
+    otc_quote = aggregated['quotes'].get('otc')
+    if otc_quote is None:
+        reason = 'timed out' if 'otc' in aggregated['timed_out'] else aggregated['errors'].get('otc', 'unavailable')
+        otc_quote = {'available': False, 'error': f'OTC quote {reason}'}
+    return otc_quote
+
+def _quote_payload(input_token, output_token, aggregated):
+    """Build the /api/quote body from an aggregated result, or None without a Jupiter quote"""
+    jupiter_quote = aggregated['quotes'].get('jupiter')
+    if not jupiter_quote:
+        return None
+    
+    slippage = jupiter_api.calculate_slippage(jupiter_quote)
+    
+    # OTC quote for comparison (may be missing if the venue missed its deadline)
+    otc_quote = _otc_quote_from(aggregated)
+    
+    # Recommend the venue with the higher expected net output
+    decision = router.route(input_token, output_token, jupiter_quote, otc_quote)
+    
+    return {
+        'jupiter_quote': {
+            'output_amount': float(jupiter_quote['outAmount']) / 1e6,
+            'slippage': slippage,
+            'route_plan': len(jupiter_quote.get('routePlan', []))
+        },
+        'otc_quote': otc_quote,
+        'recommended_route': decision.venue,
+        'route_scores': decision.to_dict()['scores'],
+        'cost_savings': otc_quote['output_amount'] - (float(jupiter_quote['outAmount']) / 1e6) if decision.venue == 'OTC' else 0,
+        'quote_latency_ms': aggregated['latency_ms']
+    }
+
+def _execute_slice(input_token, output_token, amount):
+    """
+    Route and execute one child order of a scheduled parent order
+    
+    Quotes are fetched fresh for every slice, so each one goes to the venue
+    that is best at the time it runs.
+    
+    Returns:
+        Fill with the route, output amount, price and logged trade ID
+    
+    Raises:
+        SliceSettled: The slice executed but its trade could not be logged
+    """
+    quotes = quote_aggregator.get_quotes(input_token, output_token, amount,
+                                         venue_options={'jupiter': {'use_cache': False}})
+    jupiter_quote = quotes['quotes'].get('jupiter')
+    otc_quote = _otc_quote_from(quotes)
+    decision = router.route(input_token, output_token, jupiter_quote, otc_quote)
+    if decision is None:
+        raise RuntimeError('No venue could quote the slice')
+    
+    slippage = jupiter_api.calculate_slippage(jupiter_quote) if jupiter_quote else 0.0
+    dex_output = float(jupiter_quote['outAmount']) / 1e6 if jupiter_quote else None
+    
+    if decision.venue == 'OTC':
+        reservation_id = otc_engine.reserve_liquidity(otc_quote)
+        if reservation_id is None:
+            raise RuntimeError('OTC pool liquidity was taken by another trade')
+        execution_result = otc_engine.execute_trade(otc_quote, reservation_id=reservation_id)
+        if execution_result.get('status') != 'success':
+            raise RuntimeError(f"OTC execution failed: {execution_result.get('error')}")
+        
+        trade_data = {
+            'route': 'OTC',
+            'output_amount': otc_quote['output_amount'],
+            'price': otc_quote['price'],
+            'slippage': 0.0,
+            'cost_savings': otc_quote['output_amount'] - dex_output if dex_output is not None else 0.0,
+            'execution_time': execution_result['execution_time']
+        }
+    else:
+        # In real implementation, would execute via Jupiter
+        trade_data = {
+            'route': 'DEX',
+            'output_amount': dex_output,
+            'price': dex_output / amount,
+            'slippage': slippage,
+            'cost_savings': 0.0,
+            'execution_time': datetime.now()
+        }
+    
+    trade_data.update(input_token=input_token, output_token=output_token, input_amount=amount,
+                      jupiter_slippage=slippage)
+    fill = {
+        'route': trade_data['route'],
+        'output_amount': trade_data['output_amount'],
+        'price': trade_data['price'],
+        'trade_id': None
+    }
+    
+    # The slice has executed: a failure from here on must not send it back to be executed again
+    try:
+        fill['trade_id'] = trade_logger.log_trade(trade_data, durable=True)
+    except Exception as e:
+        raise SliceSettled(fill, f"trade log failed: {e}") from e
+    
+    return fill
+
+order_scheduler = OrderScheduler(_execute_slice,
+                                 max_workers=app.config["SCHEDULER_WORKERS"],
+                                 poll_interval=app.config["SCHEDULER_POLL_INTERVAL"],
+                                 max_attempts=app.config["SCHEDULER_MAX_ATTEMPTS"],
+                                 retry_delay=app.config["SCHEDULER_RETRY_DELAY"])
 
 with app.app_context():
     # Import models to ensure tables are created
     import models
     db.create_all()
+    ensure_columns(db)
+    ensure_indexes(db)
+    drop_indexes(db)
     
     # Initialize trade logger with database references
-    trade_logger.init_db(db, models.Trade, models.SystemMetrics)
+    trade_logger.init_db(db, models.Trade, models.SystemMetrics, app=app, TradeRollup=models.TradeRollup)
+    trade_logger.ensure_rollups()
+    metrics_store.init_db(db, models.SystemMetrics, models.MetricRollup, app=app)
+    liquidity_store.init_db(db, models.OTCPool, models.LiquidityReservation, app=app)
+    order_scheduler.init_db(db, models.ParentOrder, models.ChildOrder, app=app,
+                            volume_profile_fn=trade_logger.get_hourly_volume_profile)
+
+def start_background_services(app):
+    """
+    Start this process's background threads: price refresh, the live feed
+    poller, the order scheduler and metrics compaction, as configured
+    
+    Importing the app starts no threads, so CLI commands, tests and a
+    preloading gunicorn master stay single-threaded. The server entrypoints
+    call this instead: main.py, asgi.py's lifespan startup and gunicorn's
+    post_worker_init hook (gunicorn.conf.py). Calling it again is a no-op.
+    """
+    if app.config["PRICE_REFRESH_ENABLED"]:
+        price_refresher.start()
+    live_feed.start(app)
+    if app.config["SCHEDULER_ENABLED"]:
+        order_scheduler.start()
+    if app.config["METRICS_COMPACTION_ENABLED"]:
+        metrics_store.start(interval=app.config["METRICS_COMPACTION_INTERVAL"])
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Rebuild the analytics rollup tables from the full trade history"""
+    trade_count = trade_logger.rebuild_rollups()
+    print(f"Rebuilt rollups from {trade_count} trades")
+
+@app.cli.command('compact-metrics')
+def compact_metrics_command():
+    """Compact aged SystemMetrics rows into 1-minute and 1-hour rollups"""
+    result = metrics_store.compact()
+    print(f"Compacted {result['raw_rows']} raw rows and {result['minute_buckets']} minute buckets, "
+          f"dropped {result['hour_buckets_dropped']} expired hour buckets")
+
+@app.cli.command('create-indexes')
+def create_indexes_command():
+    """Create model indexes missing from an existing database and drop retired ones"""
+    created = ensure_indexes(db)
+    print(f"Created indexes: {', '.join(created)}" if created else "All indexes already exist")
+    dropped = drop_indexes(db)
+    if dropped:
+        print(f"Dropped unused indexes: {', '.join(dropped)}")
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """EXPLAIN the hot queries and fail if any does not use its index"""
+    results = check_hot_query_plans(db, trade_logger, metrics_store)
+    for result in results:
+        status = 'OK  ' if result['uses_index'] else 'FAIL'
+        print(f"{status} {result['name']} (expects {result['index']})")
+        if not result['uses_index']:
+            print('     ' + result['plan'].replace('\n', '\n     '))
+    
+    if not all(result['uses_index'] for result in results):
+        raise SystemExit(1)
 
 @app.route('/')
 def dashboard():
@@ -75,12 +378,10 @@ def trade_form():
                 flash("Minimum trade amount is 0.1 SOL", "error")
                 return render_template('trade_form.html')
             
-            # Get Jupiter quote
-            jupiter_quote = jupiter_api.get_quote(
-                input_mint=jupiter_api.get_token_mint(input_token),
-                output_mint=jupiter_api.get_token_mint(output_token),
-                amount=int(amount * 1e9)  # Convert to lamports
-            )
+            # Get Jupiter and OTC quotes concurrently (fresh Jupiter quote for execution)
+            quotes = quote_aggregator.get_quotes(input_token, output_token, amount,
+                                                 venue_options={'jupiter': {'use_cache': False}})
+            jupiter_quote = quotes['quotes'].get('jupiter')
             
             if not jupiter_quote:
                 flash("Failed to get Jupiter quote", "error")
@@ -89,17 +390,12 @@ def trade_form():
             # Calculate slippage
             slippage = jupiter_api.calculate_slippage(jupiter_quote)
             
-            # Determine routing based on slippage and amount
-            use_otc = False
-            if amount >= 500 and slippage > 1.0:  # Large trade with high slippage
-                use_otc = True
+            # Route to the venue with the higher expected net output
+            otc_quote = _otc_quote_from(quotes)
+            decision = router.route(input_token, output_token, jupiter_quote, otc_quote)
             
             # Execute trade
-            if use_otc:
-                # Route to OTC
-                otc_quote = otc_engine.get_otc_quote(input_token, output_token, amount)
-                execution_result = otc_engine.execute_trade(otc_quote)
-                
+            if decision.venue == 'OTC':
                 # Calculate cost savings
                 dex_cost = float(jupiter_quote['outAmount']) / 1e6  # USDC has 6 decimals
                 otc_cost = otc_quote['output_amount']
@@ -114,9 +410,31 @@ def trade_form():
                     'price': otc_quote['price'],
                     'slippage': 0.0,  # OTC has fixed pricing
                     'jupiter_slippage': slippage,
-                    'cost_savings': cost_savings,
-                    'execution_time': execution_result['execution_time']
+                    'cost_savings': cost_savings
                 }
+                
+                # Hold the liquidity now so the pool cannot be oversold while the trade settles
+                reservation_id = otc_engine.reserve_liquidity(otc_quote)
+                if reservation_id is None:
+                    flash("OTC pool liquidity was taken by another trade, please request a new quote", "error")
+                    return render_template('trade_form.html')
+                
+                if app.config["OTC_ASYNC_EXECUTION"]:
+                    # Hand settlement to the background executor and return immediately
+                    try:
+                        execution_id = trade_executor.submit(otc_quote, trade_data, reservation_id=reservation_id)
+                    except ExecutorBusy as e:
+                        otc_engine.release_liquidity(reservation_id)
+                        flash(f"OTC settlement queue is full, please retry shortly ({e})", "error")
+                        return render_template('trade_form.html')
+                    flash(f"OTC trade accepted for settlement. Execution ID: {execution_id}", "success")
+                    return redirect(url_for('dashboard'))
+                
+                execution_result = otc_engine.execute_trade(otc_quote, reservation_id=reservation_id)
+                if execution_result.get('status') != 'success':
+                    flash(f"OTC execution failed: {execution_result.get('error')}", "error")
+                    return render_template('trade_form.html')
+                trade_data['execution_time'] = execution_result['execution_time']
             else:
                 # Route to DEX (Jupiter)
                 # In real implementation, would execute via Jupiter
@@ -142,7 +460,7 @@ def trade_form():
             # Log the trade
             trade_id = trade_logger.log_trade(trade_data)
             
-            flash(f"Trade executed successfully! Route: {trade_data['route']}, Trade ID: {trade_id}", "success")
+            flash(f"Trade executed successfully! Route: {trade_data['route']}, Trade ID: {trade_id or 'queued'}", "success")
             return redirect(url_for('dashboard'))
             
         except Exception as e:
@@ -208,49 +526,258 @@ def api_quote():
         if amount <= 0:
             return jsonify({'error': 'Invalid amount'}), 400
         
-        # Get Jupiter quote
-        jupiter_quote = jupiter_api.get_quote(
-            input_mint=jupiter_api.get_token_mint(input_token),
-            output_mint=jupiter_api.get_token_mint(output_token),
-            amount=int(amount * 1e9)
-        )
+        # While both venues would answer from cache, the cache versions identify the quote
+        etag = _quote_etag(input_token, output_token, amount)
+        if etag is not None:
+            cached_response = not_modified(etag)
+            if cached_response is not None:
+                return cached_response
+        
+        # Get Jupiter and OTC quotes concurrently
+        quotes = quote_aggregator.get_quotes(input_token, output_token, amount)
+        payload = _quote_payload(input_token, output_token, quotes)
         
-        if not jupiter_quote:
+        if payload is None:
             return jsonify({'error': 'Failed to get Jupiter quote'}), 500
         
-        slippage = jupiter_api.calculate_slippage(jupiter_quote)
+        response = jsonify(payload)
         
-        # Get OTC quote for comparison
-        otc_quote = otc_engine.get_otc_quote(input_token, output_token, amount)
+        # Both venues have now cached their inputs, so the version is known
+        etag = _quote_etag(input_token, output_token, amount)
+        return with_etag(response, etag) if etag is not None else response
         
-        # Determine recommended route
-        recommended_route = 'OTC' if (amount >= 500 and slippage > 1.0) else 'DEX'
+    except Exception as e:
+        logging.error(f"Error getting quote: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/quotes/batch', methods=['GET', 'POST'])
+def api_quotes_batch():
+    """
+    API endpoint for quote ladders: every amount quoted for every pair in one request
+    
+    Distinct Jupiter requests run JUPITER_BATCH_QUOTE_WORKERS at a time (default half of
+    JUPITER_QUOTE_RPS), paced by JUPITER_QUOTE_RPS, so a batch gets at most
+    JUPITER_QUOTE_RPS x JUPITER_QUOTE_DEADLINE of them (100 with the defaults). Requests not
+    answered by the deadline are cancelled and their quotes come back null.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        pairs, amounts = data.get('pairs') or [], data.get('amounts') or []
+    else:
+        pairs = [pair for pair in request.args.get('pairs', 'SOL/USDC').split(',') if pair]
+        amounts = [amount for amount in request.args.get('amounts', '').split(',') if amount]
+    
+    try:
+        pairs = [tuple(pair.split('/')) for pair in pairs]
+        amounts = [float(amount) for amount in amounts]
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'error': "pairs must be 'INPUT/OUTPUT' strings and amounts numbers"}), 400
+    
+    if not pairs or not amounts or any(len(pair) != 2 for pair in pairs):
+        return jsonify({'error': "pairs ('SOL/USDC') and amounts are required"}), 400
+    if any(amount <= 0 for amount in amounts):
+        return jsonify({'error': 'Invalid amount'}), 400
+    if len(pairs) * len(amounts) > app.config["QUOTE_BATCH_MAX_SIZE"]:
+        return jsonify({'error': f"At most {app.config['QUOTE_BATCH_MAX_SIZE']} quotes per batch"}), 400
+    
+    try:
+        started = time.monotonic()
+        
+        # Every Jupiter quote in the grid at once; repeated pair and amount buckets share a request
+        jupiter_quotes, jupiter_requests = jupiter_api.get_quotes(
+            [(jupiter_api.get_token_mint(input_token), jupiter_api.get_token_mint(output_token), int(amount * 1e9))
+             for input_token, output_token in pairs for amount in amounts],
+            timeout=app.config["JUPITER_QUOTE_DEADLINE"]
+        )
+        
+        ladders = []
+        for p, (input_token, output_token) in enumerate(pairs):
+            pair = f"{input_token}/{output_token}"
+            dex_quotes = jupiter_quotes[p * len(amounts):(p + 1) * len(amounts)]
+            dex_outputs = [float(quote['outAmount']) / 1e6 if quote else None for quote in dex_quotes]
+            
+            otc = otc_engine.get_otc_quotes(input_token, output_token, amounts)
+            otc_outputs = [
+                output if available else None for output, available in zip(otc['output_amount'], otc['available'])
+            ] if 'error' not in otc else [None] * len(amounts)
+            
+            routes = []
+            for gross_outputs in zip(dex_outputs, otc_outputs):
+                index, _ = router.best(pair, gross_outputs)
+                routes.append(VENUES[index] if index >= 0 else None)
+            
+            ladders.append({
+                'pair': pair,
+                'jupiter': {
+                    'output_amount': dex_outputs,
+                    'slippage': [jupiter_api.calculate_slippage(quote) if quote else None for quote in dex_quotes]
+                },
+                'otc': otc,
+                'recommended_route': routes
+            })
         
         return jsonify({
-            'jupiter_quote': {
-                'output_amount': float(jupiter_quote['outAmount']) / 1e6,
-                'slippage': slippage,
-                'route_plan': len(jupiter_quote.get('routePlan', []))
-            },
-            'otc_quote': otc_quote,
-            'recommended_route': recommended_route,
-            'cost_savings': otc_quote['output_amount'] - (float(jupiter_quote['outAmount']) / 1e6) if recommended_route == 'OTC' else 0
+            'amounts': amounts,
+            'ladders': ladders,
+            'jupiter_requests': jupiter_requests,
+            'latency_ms': round((time.monotonic() - started) * 1000, 2)
         })
-        
     except Exception as e:
-        logging.error(f"Error getting quote: {e}")
+        logging.error(f"Error getting batch quotes: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/quote/split')
+def api_quote_split():
+    """API endpoint for a child-order plan splitting one order across Jupiter and the OTC pools"""
+    input_token = request.args.get('input_token', 'SOL')
+    output_token = request.args.get('output_token', 'USDC')
+    try:
+        amount = float(request.args.get('amount', 0))
+        points = request.args.get('points', app.config["SPLIT_CURVE_POINTS"], type=int)
+    except ValueError:
+        amount = 0
+    
+    if amount <= 0:
+        return jsonify({'error': 'Invalid amount'}), 400
+    if not 2 <= points <= 32:
+        return jsonify({'error': 'points must be between 2 and 32'}), 400
+    
+    try:
+        return jsonify(order_splitter.plan(input_token, output_token, amount, curve_points=points))
+    except Exception as e:
+        logging.error(f"Error planning split order: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/orders', methods=['GET', 'POST'])
+def api_orders():
+    """API endpoint for scheduling a TWAP/VWAP parent order (POST) or listing recent ones (GET)"""
+    if request.method == 'GET':
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify(order_scheduler.list_orders(limit=min(max(limit, 1), 200), status=request.args.get('status')))
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        amount = float(data.get('amount', 0))
+        slice_size = app.config["SCHEDULER_SLICE_SIZE"]
+        slices = int(data.get('slices') or max(1, -(-amount // slice_size)))
+        interval_seconds = float(data.get('interval_seconds', app.config["SCHEDULER_DEFAULT_INTERVAL"]))
+        start_at = datetime.fromisoformat(data['start_at']) if data.get('start_at') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'amount, slices and interval_seconds must be numbers and start_at ISO 8601'}), 400
+    
+    if amount <= 0:
+        return jsonify({'error': 'Invalid amount'}), 400
+    if not 1 <= slices <= app.config["SCHEDULER_MAX_SLICES"]:
+        return jsonify({'error': f"slices must be between 1 and {app.config['SCHEDULER_MAX_SLICES']}"}), 400
+    
+    try:
+        progress = order_scheduler.submit(data.get('input_token', 'SOL'), data.get('output_token', 'USDC'), amount,
+                                          slices=slices, interval_seconds=interval_seconds,
+                                          strategy=data.get('strategy', 'twap'), start_at=start_at)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error scheduling order: {e}")
         return jsonify({'error': str(e)}), 500
+    
+    return jsonify(progress), 201
+
+@app.route('/api/orders/<order_id>')
+def api_order_progress(order_id):
+    """API endpoint for a scheduled order's progress and child orders"""
+    progress = order_scheduler.get_progress(order_id, include_children=request.args.get('children', 'true') != 'false')
+    if progress is None:
+        return jsonify({'error': 'Unknown order ID'}), 404
+    return jsonify(progress)
+
+@app.route('/api/orders/<order_id>/cancel', methods=['POST'])
+def api_order_cancel(order_id):
+    """API endpoint for cancelling a scheduled order's remaining child orders"""
+    progress = order_scheduler.cancel(order_id)
+    if progress is None:
+        return jsonify({'error': 'Unknown order ID'}), 404
+    return jsonify(progress)
+
+@app.route('/api/executions/<execution_id>')
+def api_execution_status(execution_id):
+    """API endpoint for polling a background OTC execution"""
+    status = trade_executor.get_status(execution_id)
+    if status is None:
+        return jsonify({'error': 'Unknown execution ID'}), 404
+    return jsonify(status)
 
 @app.route('/api/trades')
 def api_trades():
-    """API endpoint for getting recent trades"""
+    """API endpoint for getting recent trades, one keyset page at a time"""
     try:
         limit = int(request.args.get('limit', 20))
-        trades = trade_logger.get_recent_trades(limit=limit)
-        return jsonify(trades)
+        cursor = request.args.get('cursor')
+        
+        # Trades are append-only, so the latest trade ID versions every page
+        etag = etag_for('trades', trade_logger.get_latest_trade_id(), limit, cursor)
+        cached_response = not_modified(etag)
+        if cached_response is not None:
+            return cached_response
+        
+        trades, next_cursor = trade_logger.get_trades_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting trades: {e}")
         return jsonify({'error': str(e)}), 500
+    
+    response = jsonify(trades)
+    if next_cursor:
+        # The body stays a plain list; the next page is advertised in headers
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_url = url_for('api_trades', limit=limit, cursor=next_cursor)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return with_etag(response, etag)
+
+@app.route('/api/trades/export')
+def api_trades_export():
+    """Stream all trades (optionally within from/to) as NDJSON or CSV"""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+    
+    try:
+        since = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        until = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 timestamps'}), 400
+    
+    trades = trade_logger.iter_trades(since=since, until=until)
+    
+    if export_format == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=TRADE_FIELDS)
+            writer.writeheader()
+            for i, trade in enumerate(trades, 1):
+                writer.writerow(trade)
+                if i % 500 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        
+        mimetype, extension = 'text/csv', 'csv'
+    else:
+        def generate():
+            chunk = []
+            for trade in trades:
+                chunk.append(json.dumps(trade))
+                if len(chunk) == 500:
+                    yield '\n'.join(chunk) + '\n'
+                    chunk = []
+            if chunk:
+                yield '\n'.join(chunk) + '\n'
+        
+        mimetype, extension = 'application/x-ndjson', 'ndjson'
+    
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=trades.{extension}'})
 
 @app.route('/api/prices')
 def api_prices():
@@ -262,12 +789,113 @@ def api_prices():
         if 'error' in price_data:
             return jsonify({'error': price_data['error']}), 500
         
-        return jsonify(price_data)
+        cached_at = price_data.get('cached_at')
+        if not cached_at:
+            return jsonify(price_data)
+        
+        # The snapshot only changes when it is refreshed
+        etag = etag_for('prices', cached_at, price_data.get('source'))
+        response = not_modified(etag) or with_etag(jsonify(price_data), etag)
+        # Age goes in a header so the body stays identical for the ETag
+        response.headers['X-Price-Age'] = f"{time.time() - cached_at:.3f}"
+        return response
         
     except Exception as e:
         logging.error(f"Error getting prices: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/status')
+def api_status():
+    """API endpoint for internal cache and refresher health"""
+    return jsonify({
+        'price_refresher': price_refresher.get_metrics(),
+        'otc_price_cache': otc_engine.price_cache.stats(),
+        'otc_liquidity': liquidity_store.get_stats(),
+        'router': router.get_config(),
+        'order_scheduler': order_scheduler.get_stats(),
+        'trade_log': trade_logger.get_stats(),
+        'quote_cache': jupiter_api.quote_cache.stats(),
+        'price_sources': {name: breaker.get_state() for name, breaker in jupiter_api.price_breakers.items()},
+        'http': jupiter_api.session.get_stats(),
+        'metrics_compaction': metrics_store.last_compaction,
+        'live_feed': live_feed.get_stats()
+    })
+
+@app.route('/api/stream')
+def api_stream():
+    """Server-Sent Events stream of new trades, price ticks and trade statistics"""
+    missed_trades = None
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id and last_event_id.isdigit():
+        # Replay trades missed while the browser was reconnecting
+        missed_trades = trade_logger.get_trades_after(int(last_event_id))
+    
+    return Response(live_feed.stream(missed_trades, max_seconds=app.config["LIVE_STREAM_MAX_SECONDS"]),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/metrics')
+def api_metrics():
+    """API endpoint for a downsampled metric series (min/max/avg/count per step)"""
+    name = request.args.get('name')
+    if not name:
+        return jsonify({'error': 'name is required'}), 400
+    
+    try:
+        end = datetime.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow()
+        start = datetime.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(hours=24)
+        # Default to roughly 300 points, never finer than one minute
+        step = parse_step(request.args['step']) if request.args.get('step') else \
+            max(60, int((end - start).total_seconds() // 300))
+        
+        points = metrics_store.query(name, start, end, step)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error getting metrics: {e}")
+        return jsonify({'error': str(e)}), 500
+    
+    return jsonify({
+        'name': name,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'step': step,
+        'points': points
+    })
+
+@app.route('/api/analytics/slippage')
+def api_slippage_analysis():
+    """API endpoint for slippage-vs-size analysis with selectable binning"""
+    binning = request.args.get('binning', 'size')
+    if binning not in ('size', 'count'):
+        return jsonify({'error': "binning must be 'size' or 'count'"}), 400
+    
+    try:
+        bin_width = request.args.get('bin_width', type=float)
+        bins = request.args.get('bins', 20, type=int)
+        if (bin_width is not None and bin_width <= 0) or bins <= 0:
+            return jsonify({'error': 'bin_width and bins must be positive'}), 400
+        
+        return jsonify(trade_logger.get_slippage_analysis(binning=binning, bin_width=bin_width, bins=bins))
+    except Exception as e:
+        logging.error(f"Error getting slippage analysis: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/cost-savings')
+def api_cost_savings_analysis():
+    """API endpoint for cost savings by caller-defined size brackets"""
+    edges = request.args.get('brackets')
+    try:
+        brackets = brackets_from_edges([float(edge) for edge in edges.split(',')]) if edges else None
+    except ValueError:
+        return jsonify({'error': 'brackets must be comma-separated, strictly ascending numbers'}), 400
+    
+    try:
+        return jsonify(trade_logger.get_cost_savings_analysis(brackets=brackets))
+    except Exception as e:
+        logging.error(f"Error getting cost savings analysis: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/add-sample-data')
 def add_sample_data():
     """Add sample trade data for analytics demonstration"""
@@ -311,8 +939,8 @@ def add_sample_data():
                 'execution_time': trade_time
             }
             
-            # Log the trade
-            trade_id = trade_logger.log_trade(trade_data)
+            # Log the trade (synchronously, so the IDs can be reported)
+            trade_id = trade_logger.log_trade(trade_data, durable=True)
             sample_trades.append(trade_id)
         
         return jsonify({
@@ -0,0 +1,129 @@
+"""
+ASGI entry point: uvicorn asgi:application
+
+/api/quote and /api/prices are served on the event loop, so a request
+waiting on Jupiter holds a coroutine rather than a worker thread. Every
+other route is handed to the Flask app through asgiref's WSGI adapter.
+"""
+import gzip
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app import app, jupiter_api, quote_aggregator, start_background_services, _quote_etag, _quote_payload
+from conditional_get import etag_for
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:
+    raise ImportError("ASGI mode requires asgiref (pip install '.[asgi]')") from e
+
+logger = logging.getLogger(__name__)
+
+flask_application = WsgiToAsgi(app)
+
+Headers = List[Tuple[bytes, bytes]]
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    handler = ROUTES.get(scope['path']) if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD') else None
+    if handler is None:
+        await flask_application(scope, receive, send)
+        return
+
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    args = {name: values[0] for name, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    try:
+        status, payload, headers = await handler(args, request_headers)
+    except Exception as e:
+        logger.error(f"Error serving {scope['path']}: {e}")
+        status, payload, headers = 500, {'error': str(e)}, []
+
+    await _send_json(send, scope['method'], request_headers, status, payload, headers)
+
+async def quote(args: Dict[str, str], request_headers: Dict[str, str]):
+    """Async /api/quote: both venues are awaited on the event loop under their deadlines"""
+    input_token = args.get('input_token', 'SOL')
+    output_token = args.get('output_token', 'USDC')
+    try:
+        amount = float(args.get('amount', 0))
+    except ValueError:
+        amount = 0
+    if amount <= 0:
+        return 400, {'error': 'Invalid amount'}, []
+
+    etag = _quote_etag(input_token, output_token, amount)
+    if etag is not None and _matches(request_headers, etag):
+        return 304, None, _etag_headers(etag)
+
+    quotes = await quote_aggregator.get_quotes_async(input_token, output_token, amount)
+    payload = _quote_payload(input_token, output_token, quotes)
+    if payload is None:
+        return 500, {'error': 'Failed to get Jupiter quote'}, []
+
+    etag = _quote_etag(input_token, output_token, amount)
+    return 200, payload, _etag_headers(etag) if etag is not None else []
+
+async def prices(args: Dict[str, str], request_headers: Dict[str, str]):
+    """Async /api/prices: served from the in-memory snapshot unless it must be refetched"""
+    price_data = await jupiter_api.get_multiple_token_prices_async()
+    if 'error' in price_data:
+        return 500, {'error': price_data['error']}, []
+
+    cached_at = price_data.get('cached_at')
+    if not cached_at:
+        return 200, price_data, []
+
+    etag = etag_for('prices', cached_at, price_data.get('source'))
+    headers = _etag_headers(etag) + [(b'x-price-age', f"{time.time() - cached_at:.3f}".encode())]
+    if _matches(request_headers, etag):
+        return 304, None, headers
+    return 200, price_data, headers
+
+ROUTES = {
+    '/api/quote': quote,
+    '/api/prices': prices
+}
+
+def _matches(request_headers: Dict[str, str], etag: str) -> bool:
+    """If-None-Match check that also accepts the compressed variants of the ETag"""
+    candidates = {value.strip().removeprefix('W/').strip('"') for value in request_headers.get('if-none-match', '').split(',')}
+    return '*' in candidates or any(etag + suffix in candidates for suffix in ('', '-gzip', '-br'))
+
+def _etag_headers(etag: str) -> Headers:
+    return [(b'etag', f'"{etag}"'.encode()), (b'cache-control', b'no-cache')]
+
+async def _send_json(send, method: str, request_headers: Dict[str, str], status: int,
+                     payload: Optional[Any], headers: Headers):
+    body = b'' if payload is None else json.dumps(payload, default=str).encode()
+    headers = list(headers)
+    if payload is not None:
+        headers.append((b'content-type', b'application/json'))
+
+        # Same policy as init_compression, gzip only
+        if (status == 200 and app.config["RESPONSE_COMPRESSION"]
+                and len(body) >= app.config["RESPONSE_COMPRESSION_MIN_BYTES"]
+                and 'gzip' in request_headers.get('accept-encoding', '')):
+            body = gzip.compress(body, compresslevel=6)
+            headers = [(name, value[:-1] + b'-gzip"' if name == b'etag' else value) for name, value in headers]
+            headers += [(b'content-encoding', b'gzip'), (b'vary', b'Accept-Encoding')]
+
+    headers.append((b'content-length', str(len(body)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if method == 'HEAD' else body})
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            start_background_services(app)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await jupiter_api.async_session.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -0,0 +1,665 @@
+"""
+Benchmarks for the routing hot paths
+
+CPU microbenchmarks (router, split, pricing) are isolated from network and
+database I/O. The throughput benchmarks run the real code against local
+stand-ins: stub HTTP servers for upstream APIs and a throwaway SQLite file.
+
+    python benchmarks.py router
+    python benchmarks.py split
+    python benchmarks.py pricing
+    python benchmarks.py execution -n 200
+    python benchmarks.py quotes -n 50
+    python benchmarks.py prices -n 40
+    python benchmarks.py persistence -n 2000
+    python benchmarks.py statistics -n 1000000
+    python benchmarks.py slippage -n 10000000
+    python benchmarks.py all -n 200000
+
+Set BENCH_DATABASE_URL to run the database benchmarks on another scratch
+database (e.g. PostgreSQL); the tables they fill are emptied first.
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, List, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+def measure(fn: Callable[[], Any], iterations: int, repeats: int = 5) -> Dict[str, Any]:
+    """
+    Time fn over several repeats
+
+    Returns:
+        Best and median per-call time in microseconds and calls per second
+    """
+    fn()  # warm up
+    per_call = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        per_call.append((time.perf_counter() - started) / iterations)
+    best = min(per_call)
+    return {
+        'best_us': round(best * 1e6, 3),
+        'median_us': round(statistics.median(per_call) * 1e6, 3),
+        'calls_per_s': int(1 / best)
+    }
+
+def run_threads(workers: int, fn: Callable[[], Any]) -> float:
+    """Run fn on workers threads at once and return the wall time in seconds"""
+    threads = [threading.Thread(target=fn) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+def latency_stats(samples_s: List[float]) -> Dict[str, Any]:
+    """p50, p95 and max of wall-clock samples, in milliseconds"""
+    ordered = sorted(samples_s)
+    return {
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1)
+    }
+
+@contextmanager
+def stub_server(respond: Callable[[str, Dict[str, List[str]]], Tuple[float, int, Any]]):
+    """
+    Local HTTP server standing in for an upstream API
+
+    Args:
+        respond: fn(path, query) -> (delay in seconds, status, JSON body)
+
+    Yields:
+        Base URL of the server
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real APIs
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            delay, status, body = respond(url.path, parse_qs(url.query))
+            if delay:
+                time.sleep(delay)
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+def bench_app():
+    """
+    Import the Flask app against the benchmark database with background threads off
+
+    Returns:
+        (app module, models module)
+    """
+    bench_dir = tempfile.mkdtemp(prefix='otc-bench-')
+    atexit.register(shutil.rmtree, bench_dir, ignore_errors=True)
+    # Never the configured DATABASE_URL: the benchmarks empty the tables they fill
+    os.environ['DATABASE_URL'] = os.environ.get('BENCH_DATABASE_URL', f"sqlite:///{bench_dir}/bench.db")
+    for flag in ('PRICE_REFRESH_ENABLED', 'METRICS_COMPACTION_ENABLED', 'SCHEDULER_ENABLED'):
+        os.environ[flag] = 'false'
+
+    import app as app_module
+    import models
+    logging.getLogger().setLevel(logging.WARNING)  # per-trade INFO lines would be timed too
+    return app_module, models
+
+def empty_trade_tables(db, models):
+    for model in (models.SystemMetrics, models.TradeRollup, models.Trade):
+        db.session.query(model).delete()
+    db.session.commit()
+
+def synthetic_trade(rng: random.Random) -> Dict[str, Any]:
+    """A trade_data dict as /trade builds it, with random size, route and slippage"""
+    amount = rng.lognormvariate(5.5, 1.2)
+    route = 'OTC' if amount >= 100 and rng.random() < 0.6 else 'DEX'
+    slippage = rng.uniform(0.05, 1.5)
+    return {
+        'route': route,
+        'input_token': 'SOL',
+        'output_token': rng.choice(('USDC', 'USDT')),
+        'input_amount': amount,
+        'output_amount': amount * 150.0,
+        'price': 150.0,
+        'slippage': 0.0 if route == 'OTC' else slippage,
+        'jupiter_slippage': slippage,
+        'cost_savings': amount * rng.uniform(0.0, 0.5) if route == 'OTC' else 0.0
+    }
+
+def fill_trades(db, models, rows: int, seed: int = 19, chunk: int = 50000):
+    """Replace the trade tables' contents with rows synthetic trades spread over the last 90 days"""
+    from sqlalchemy import insert
+
+    empty_trade_tables(db, models)
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for start in range(0, rows, chunk):
+        batch = []
+        for _ in range(min(chunk, rows - start)):
+            trade = synthetic_trade(rng)
+            trade['created_at'] = trade['execution_time'] = now - timedelta(seconds=rng.uniform(0, 90 * 86400))
+            batch.append(trade)
+        db.session.execute(insert(models.Trade), batch)
+        db.session.commit()
+
+@contextmanager
+def count_queries(engine):
+    """Count the SQL statements executed on engine inside the block; yields a one-item list"""
+    from sqlalchemy import event
+
+    counter = [0]
+
+    def on_execute(*args):
+        counter[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+
+def time_db_call(engine, fn: Callable[[], Any], repeats: int = 3) -> Dict[str, Any]:
+    """Best wall time of fn over repeats, with the number of SQL statements one call runs"""
+    timings = []
+    for _ in range(repeats):
+        with count_queries(engine) as queries:
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+    return {'queries': queries[0], 'best_ms': round(min(timings) * 1000, 1)}
+
+def bench_router(iterations: int) -> List[Dict[str, Any]]:
+    from router import Router
+
+    router = Router(risk_bps_per_s=1.0)
+    router.configure_venue('DEX', latency_s=0.4)
+    router.configure_venue('OTC', latency_s=1.25)
+    router.configure_pair('SOL/USDT', 'OTC', fee_bps=2.0)
+
+    rng = random.Random(7)
+    jupiter_quotes = [{'outAmount': str(int(rng.uniform(1e3, 1e6) * 150 * 1e6))} for _ in range(1024)]
+    otc_quotes = [{'available': rng.random() > 0.2, 'output_amount': int(q['outAmount']) / 1e6 * 1.002}
+                  for q in jupiter_quotes]
+    gross = [(int(j['outAmount']) / 1e6, o['output_amount'] if o['available'] else None)
+             for j, o in zip(jupiter_quotes, otc_quotes)]
+
+    state = {'i': 0}
+
+    def best():
+        i = state['i'] = (state['i'] + 1) & 1023
+        router.best('SOL/USDC', gross[i])
+
+    def route():
+        i = state['i'] = (state['i'] + 1) & 1023
+        router.route('SOL', 'USDC', jupiter_quotes[i], otc_quotes[i])
+
+    return [
+        dict(name='router.best', **measure(best, iterations)),
+        dict(name='router.route', **measure(route, iterations))
+    ]
+
+def bench_split(iterations: int) -> List[Dict[str, Any]]:
+    from order_splitter import curve_segments, optimize
+
+    rng = random.Random(11)
+
+    def dex_venue(name, depth):
+        # Output of x units with price impact growing linearly in size
+        samples = [(x, 150.0 * x * (1 - x / depth)) for x in (depth * (i + 1) / 32 for i in range(16))]
+        return {'name': name, 'segments': curve_segments(samples), 'min_size': 0.0}
+
+    venues = [dex_venue('jupiter:SOL/USDC', 400000.0), dex_venue('jupiter:SOL/USDT', 250000.0)]
+    for i in range(10):
+        venues.append({
+            'name': f"otc:pool-{i}",
+            'segments': [(rng.uniform(1000, 5000), 150.0 * (1 - rng.uniform(0.002, 0.006)))],
+            'min_size': rng.choice((100.0, 250.0))
+        })
+
+    return [
+        dict(name=f"split.optimize {len(venues)} venues 10k", **measure(lambda: optimize(venues, 10000.0), max(1, iterations // 100))),
+        dict(name=f"split.optimize {len(venues)} venues 60k", **measure(lambda: optimize(venues, 60000.0), max(1, iterations // 100)))
+    ]
+
+def bench_pricing(iterations: int) -> List[Dict[str, Any]]:
+    from pricing_curve import PricingCurve
+    from otc_engine import OTCEngine
+
+    rng = random.Random(13)
+    small = PricingCurve([(0, 0.25), (1000, 0.30), (2500, 0.40)], depth_spread=0.5)
+    large = PricingCurve([(i * 100.0, 0.25 + i * 0.01) for i in range(64)], depth_spread=0.5)
+    sizes = [rng.uniform(100, 5000) for _ in range(1024)]
+
+    # In-memory pools and pre-cached prices keep the engine off the network
+    engine = OTCEngine()
+    engine.price_cache.set('SOL', 150.0, ttl=1e9)
+    engine.price_cache.set('USDC', 1.0, ttl=1e9)
+
+    state = {'i': 0}
+
+    def spread(curve):
+        def run():
+            i = state['i'] = (state['i'] + 1) & 1023
+            curve.spread(sizes[i], 50000.0)
+        return run
+
+    def quote():
+        i = state['i'] = (state['i'] + 1) & 1023
+        engine.get_otc_quote('SOL', 'USDC', sizes[i])
+
+    ladder = sizes[:500]
+    results = [
+        dict(name='pricing.spread 3 tiers', **measure(spread(small), iterations)),
+        dict(name='pricing.spread 64 tiers', **measure(spread(large), iterations)),
+        dict(name='pricing.get_otc_quote', **measure(quote, max(1, iterations // 10))),
+        dict(name='pricing.get_otc_quotes 500', **measure(lambda: engine.get_otc_quotes('SOL', 'USDC', ladder),
+                                                          max(1, iterations // 1000)))
+    ]
+    try:
+        import numpy as np
+    except ImportError:
+        return results
+    array = np.asarray(ladder)
+    results.append(dict(name='pricing.spreads 500 (numpy)', **measure(lambda: large.spreads(array, 50000.0),
+                                                                       max(1, iterations // 100))))
+    return results
+
+def bench_execution(iterations: int) -> List[Dict[str, Any]]:
+    """
+    /trade OTC throughput with a fixed pool of request threads, settling inline vs on the TradeExecutor
+
+    The execution delay is scaled down 10x (50-200 ms) to keep the run short;
+    inline throughput is bounded by request threads / mean delay either way.
+    """
+    from otc_engine import OTCEngine
+    from trade_executor import TradeExecutor
+
+    class NullLogger:
+        def log_trade(self, trade_data):
+            return None
+
+    request_threads = 8
+    trades = request_threads * max(1, min(iterations, 400) // request_threads)  # 500 fit in the 50K SOL pool
+
+    def setup():
+        # A fresh in-memory engine per run, so both start with a full pool
+        engine = OTCEngine()
+        engine.execution_delay_range = (0.05, 0.2)
+        engine.price_cache.set('SOL', 150.0, ttl=1e9)
+        engine.price_cache.set('USDC', 1.0, ttl=1e9)
+        return engine, engine.get_otc_quote('SOL', 'USDC', 100.0)
+
+    def worker(engine, quote, handle):
+        def run():
+            for _ in range(trades // request_threads):
+                handle(engine.reserve_liquidity(quote))
+        return run
+
+    engine, quote = setup()
+    inline = run_threads(request_threads, worker(
+        engine, quote, lambda reservation_id: engine.execute_trade(quote, reservation_id)))
+
+    engine, quote = setup()
+    executor = TradeExecutor(engine, NullLogger(), max_workers=64, max_pending=trades)
+    execution_ids = []
+    started = time.perf_counter()
+    accepted = run_threads(request_threads, worker(
+        engine, quote, lambda reservation_id: execution_ids.append(executor.submit(quote, {}, reservation_id))))
+    executor.shutdown(wait=True)
+    settled = time.perf_counter() - started
+    completed = sum(executor.get_status(execution_id)['status'] == 'completed' for execution_id in execution_ids)
+
+    return [
+        {'name': f"execution.inline {request_threads} threads", 'trades': trades,
+         'trades_per_s': round(trades / inline, 1)},
+        {'name': f"execution.async {request_threads} threads", 'trades': trades,
+         'accepted_per_s': round(trades / accepted, 1), 'settled_per_s': round(completed / settled, 1)}
+    ]
+
+def bench_quotes(iterations: int) -> List[Dict[str, Any]]:
+    """
+    /api/quote latency: Jupiter then OTC in sequence vs QuoteAggregator fan-out
+
+    Jupiter is a stub server answering /quote after 80 ms. The OTC venue
+    misses its price cache on every call and fetches the price from a stub
+    taking 60 ms, as get_otc_quote does when prices have expired.
+    """
+    from jupiter_api import JupiterAPI
+    from otc_engine import OTCEngine
+    from quote_aggregator import QuoteAggregator
+
+    requests_made = max(5, min(iterations, 50))
+
+    def jupiter(path, query):
+        amount = int(query['amount'][0])
+        return 0.08, 200, {'outAmount': str(int(amount / 1e9 * 149.5 * 1e6)), 'routePlan': [{}]}
+
+    def prices(path, query):
+        return 0.06, 200, {'price': 150.0 if path.endswith('/SOL') else 1.0}
+
+    with stub_server(jupiter) as jupiter_url, stub_server(prices) as price_url:
+        jupiter_api = JupiterAPI()
+        jupiter_api.base_url = jupiter_url
+        engine = OTCEngine(jupiter_api=jupiter_api)
+        engine._fetch_price = lambda symbol: jupiter_api.session.get(f"{price_url}/price/{symbol}", timeout=5).json()['price']
+
+        def jupiter_quote(input_token, output_token, amount):
+            return jupiter_api.get_quote(jupiter_api.get_token_mint(input_token), jupiter_api.get_token_mint(output_token),
+                                         int(amount * 1e9), use_cache=False)
+
+        def otc_quote(input_token, output_token, amount):
+            engine.price_cache.clear()
+            return engine.get_otc_quote(input_token, output_token, amount)
+
+        aggregator = QuoteAggregator()
+        aggregator.register_venue('jupiter', jupiter_quote, deadline=5.0)
+        aggregator.register_venue('otc', otc_quote, deadline=5.0)
+
+        def timed(fn):
+            samples = []
+            for _ in range(requests_made):
+                started = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - started)
+            return latency_stats(samples)
+
+        async def timed_async():
+            samples = []
+            for _ in range(requests_made):
+                started = time.perf_counter()
+                await aggregator.get_quotes_async('SOL', 'USDC', 500.0)
+                samples.append(time.perf_counter() - started)
+            return latency_stats(samples)
+
+        sequential = timed(lambda: (jupiter_quote('SOL', 'USDC', 500.0), otc_quote('SOL', 'USDC', 500.0)))
+        fanout = timed(lambda: aggregator.get_quotes('SOL', 'USDC', 500.0))
+        fanout_async = asyncio.run(timed_async())
+
+    return [
+        dict(name='quotes.sequential', requests=requests_made, **sequential),
+        dict(name='quotes.aggregator', requests=requests_made, **fanout),
+        dict(name='quotes.aggregator async', requests=requests_made, **fanout_async)
+    ]
+
+def bench_prices(iterations: int) -> List[Dict[str, Any]]:
+    """
+    Price snapshot refresh latency: sequential fallback vs hedged requests
+
+    CoinGecko, Kraken and Binance are stub servers reached through the real
+    fetchers (their hosts are rewritten to the stubs). CoinGecko answers in
+    40 ms but every 4th request takes 1 s; Kraken takes 50 ms and Binance 60 ms.
+    A hedge delay too long to fire reproduces the old sequential fallback.
+    """
+    from jupiter_api import JupiterAPI
+
+    refreshes = max(4, min(iterations, 40))
+    coingecko_calls = [0]
+
+    def coingecko(path, query):
+        coingecko_calls[0] += 1
+        delay = 1.0 if coingecko_calls[0] % 4 == 0 else 0.04
+        return delay, 200, {'solana': {'usd': 150.0}, 'usd-coin': {'usd': 1.0}, 'tether': {'usd': 1.0}}
+
+    def kraken(path, query):
+        return 0.05, 200, {'result': {'SOLUSD': {'c': ['150.1', '1']}}}
+
+    def binance(path, query):
+        return 0.06, 200, {'price': '150.2'}
+
+    with stub_server(coingecko) as coingecko_url, stub_server(kraken) as kraken_url, \
+            stub_server(binance) as binance_url:
+        upstreams = {'https://api.coingecko.com': coingecko_url, 'https://api.kraken.com': kraken_url,
+                     'https://api.binance.com': binance_url}
+        api = JupiterAPI()
+        session_get = api.session.get
+
+        def get(url, **kwargs):
+            for upstream, stub in upstreams.items():
+                url = url.replace(upstream, stub)
+            return session_get(url, **kwargs)
+
+        api.session.get = get
+
+        results = []
+        for name, hedge_delay in (('sequential', 1e9), ('hedged 100ms', 0.1), ('hedged 0ms', 0.0)):
+            api.price_hedge_delay = hedge_delay
+            coingecko_calls[0] = 0
+            samples = []
+            for _ in range(refreshes):
+                started = time.perf_counter()
+                api.refresh_multiple_token_prices()
+                samples.append(time.perf_counter() - started)
+            results.append(dict(name=f"prices.{name}", refreshes=refreshes, **latency_stats(samples)))
+        api._hedge_pool.shutdown(wait=True)
+    return results
+
+def bench_persistence(iterations: int) -> List[Dict[str, Any]]:
+    """
+    Trades logged per second: per-row commits vs one transaction per trade vs write-behind batches
+
+    The per-row path replays how log_trade used to write: the trade and
+    each of its metric rows committed on their own.
+    """
+    from trade_logger import TradeLogger
+
+    app_module, models = bench_app()
+    app, db = app_module.app, app_module.db
+    trades = max(10, min(iterations, 5000))
+    rng = random.Random(17)
+    trade_data = [synthetic_trade(rng) for _ in range(trades)]
+
+    def per_row_commits(logger):
+        def run():
+            for data in trade_data:
+                trade_row, metric_rows = logger._build_entry(data)
+                db.session.add(models.Trade(**trade_row))
+                db.session.commit()
+                for metric_row in metric_rows:
+                    db.session.add(models.SystemMetrics(**metric_row))
+                    db.session.commit()
+        return run
+
+    def log_all(logger):
+        def run():
+            for data in trade_data:
+                logger.log_trade(data)
+            logger.flush()
+        return run
+
+    results = []
+    with app.app_context():
+        for name, write_behind, make_run in (('per-row commits', False, per_row_commits),
+                                             ('transaction per trade', False, log_all),
+                                             ('write-behind x100', True, log_all)):
+            empty_trade_tables(db, models)
+            logger = TradeLogger(write_behind=write_behind, batch_size=100, flush_interval=60.0)
+            logger.init_db(db, models.Trade, models.SystemMetrics, app=app, TradeRollup=models.TradeRollup)
+            run = make_run(logger)
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            logged = db.session.query(models.Trade).count()
+            results.append({'name': f"persistence.{name}", 'trades': logged,
+                            'trades_per_s': round(logged / elapsed, 1)})
+        empty_trade_tables(db, models)
+    return results
+
+def bench_statistics(iterations: int) -> List[Dict[str, Any]]:
+    """
+    get_trade_statistics over iterations synthetic trades (run with -n 1000000)
+
+    Compares the original dozen separate queries with the single
+    conditional-aggregation scan and with the rollup tables.
+    """
+    from sqlalchemy import func
+    from trade_logger import TradeLogger
+
+    app_module, models = bench_app()
+    app, db = app_module.app, app_module.db
+    Trade = models.Trade
+
+    def separate_queries():
+        # get_trade_statistics before the rewrite: one query per figure
+        session = db.session
+        today = datetime.now().date()
+        is_today = func.date(Trade.created_at) == today
+        session.query(Trade).count()
+        session.query(Trade).filter(Trade.route == 'DEX').count()
+        session.query(Trade).filter(Trade.route == 'OTC').count()
+        session.query(func.sum(Trade.input_amount)).scalar()
+        session.query(func.sum(Trade.input_amount)).filter(Trade.route == 'DEX').scalar()
+        session.query(func.sum(Trade.input_amount)).filter(Trade.route == 'OTC').scalar()
+        session.query(func.sum(Trade.cost_savings)).scalar()
+        session.query(func.avg(Trade.slippage)).filter(Trade.route == 'DEX').scalar()
+        session.query(func.avg(Trade.jupiter_slippage)).scalar()
+        session.query(Trade).filter(is_today).count()
+        session.query(func.sum(Trade.input_amount)).filter(is_today).scalar()
+        session.query(func.sum(Trade.cost_savings)).filter(is_today).scalar()
+
+    rows = max(1000, iterations)
+    with app.app_context():
+        fill_trades(db, models, rows)
+        scan = TradeLogger()
+        scan.init_db(db, Trade, models.SystemMetrics)
+        rollups = TradeLogger()
+        rollups.init_db(db, Trade, models.SystemMetrics, TradeRollup=models.TradeRollup)
+        rollups.rebuild_rollups()
+
+        results = [
+            dict(name=f"statistics.separate queries {rows}", **time_db_call(db.engine, separate_queries)),
+            dict(name=f"statistics.single scan {rows}", **time_db_call(db.engine, scan.get_trade_statistics)),
+            dict(name=f"statistics.rollups {rows}", **time_db_call(db.engine, rollups.get_trade_statistics))
+        ]
+        empty_trade_tables(db, models)
+    return results
+
+def bench_slippage(iterations: int) -> List[Dict[str, Any]]:
+    """
+    get_slippage_analysis at 100k, 1M and 10M trades (those up to -n)
+
+    Compares the original load-everything-and-group-in-Python version with
+    fixed-width and quantile bins computed in SQL, and with the rollups.
+    peak_mb is the Python heap high-water mark of one call, measured on a
+    separate run since tracing slows the timed one.
+    """
+    from trade_logger import TradeLogger
+
+    app_module, models = bench_app()
+    app, db = app_module.app, app_module.db
+    Trade = models.Trade
+
+    def load_and_group():
+        # get_slippage_analysis before the rewrite: every row into Python, grouped 10 at a time
+        rows = db.session.query(Trade.input_amount, Trade.jupiter_slippage, Trade.route)\
+            .order_by(Trade.input_amount).all()
+        size_ranges, current_range = [], []
+        for trade in rows:
+            current_range.append({'amount': trade.input_amount, 'slippage': trade.jupiter_slippage,
+                                  'route': trade.route})
+            if len(current_range) >= 10:
+                size_ranges.append({
+                    'avg_amount': round(sum(t['amount'] for t in current_range) / 10, 2),
+                    'avg_slippage': round(sum(t['slippage'] for t in current_range) / 10, 4),
+                    'otc_ratio': round(sum(1 for t in current_range if t['route'] == 'OTC') / 10, 2)
+                })
+                current_range = []
+        db.session.query(Trade).filter(Trade.jupiter_slippage > 1.0).count()
+        db.session.query(Trade).count()
+        return size_ranges
+
+    def peak_mb(fn):
+        tracemalloc.start()
+        try:
+            fn()
+            return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        finally:
+            tracemalloc.stop()
+
+    sizes = [rows for rows in (100000, 1000000, 10000000) if rows <= iterations] or [max(1000, iterations)]
+    results = []
+    with app.app_context():
+        scan = TradeLogger()
+        scan.init_db(db, Trade, models.SystemMetrics)
+        rollups = TradeLogger()
+        rollups.init_db(db, Trade, models.SystemMetrics, TradeRollup=models.TradeRollup)
+
+        for rows in sizes:
+            fill_trades(db, models, rows)
+            rollups.rebuild_rollups()
+            variants = [
+                ('sql size bins', lambda: scan.get_slippage_analysis(binning='size', bin_width=100.0)),
+                ('sql quantile bins', lambda: scan.get_slippage_analysis(binning='count', bins=20)),
+                ('rollups', rollups.get_slippage_analysis)
+            ]
+            if rows <= 1000000:
+                # Millions of row dicts: the old version would need gigabytes at 10M
+                variants.insert(0, ('load and group', load_and_group))
+            for name, fn in variants:
+                results.append(dict(name=f"slippage.{name} {rows}", **time_db_call(db.engine, fn, repeats=2),
+                                    peak_mb=peak_mb(fn)))
+        empty_trade_tables(db, models)
+    return results
+
+BENCHMARKS = {
+    'execution': bench_execution,
+    'persistence': bench_persistence,
+    'prices': bench_prices,
+    'pricing': bench_pricing,
+    'quotes': bench_quotes,
+    'router': bench_router,
+    'slippage': bench_slippage,
+    'statistics': bench_statistics,
+    'split': bench_split
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS) + ['all'])
+    parser.add_argument('-n', '--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if args.benchmark == 'all' else [args.benchmark]
+    for name in names:
+        for result in BENCHMARKS[name](args.iterations):
+            if 'best_us' in result:
+                print(f"{result['name']:<36} best {result['best_us']:>9} us  "
+                      f"median {result['median_us']:>9} us  {result['calls_per_s']:>10} calls/s")
+            else:
+                print(f"{result['name']:<36} " + '  '.join(f"{key} {value}" for key, value in result.items()
+                                                           if key != 'name'))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+from typing import Optional
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+ENCODING_SUFFIXES = ('', '-gzip', '-br')
+
+def etag_for(*parts) -> str:
+    """
+    Build a strong ETag from the version markers that determine a response
+
+    Args:
+        *parts: Cheap version markers (latest IDs, cache timestamps, request parameters)
+
+    Returns:
+        ETag value without quotes
+    """
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:32]
+
+def not_modified(etag: str) -> Optional[Response]:
+    """
+    Answer a conditional GET before doing any work
+
+    Args:
+        etag: Current ETag for the resource
+
+    Returns:
+        A 304 response if the client already holds this version, else None
+    """
+    if any(request.if_none_match.contains(etag + suffix) for suffix in ENCODING_SUFFIXES):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def with_etag(response: Response, etag: str) -> Response:
+    """Attach the ETag and require revalidation on every use"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def init_compression(app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+    """
+    Compress large buffered responses with brotli or gzip
+
+    Streamed responses are left alone. A compressed response gets the
+    encoding appended to its ETag, since a strong ETag identifies exact bytes.
+
+    Args:
+        app: Flask app
+        min_size: Smallest body worth compressing, in bytes
+        gzip_level: gzip compression level
+        brotli_quality: Brotli quality (lower is faster)
+    """
+    compressible = ('application/json', 'text/csv', 'application/x-ndjson')
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code == 304:
+            # A 304 stands in for the 200 the client holds, so it repeats that response's Vary
+            response.vary.add('Accept-Encoding')
+            return response
+
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in compressible):
+            return response
+
+        # Whether the body gets compressed depends on Accept-Encoding even when this one
+        # is not (too small, or no supported encoding), so caches must key on it
+        response.vary.add('Accept-Encoding')
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            encoding, body = 'br', brotli.compress(data, quality=brotli_quality)
+        elif accepted['gzip']:
+            encoding, body = 'gzip', gzip.compress(data, compresslevel=gzip_level)
+        else:
+            return response
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
@@ -0,0 +1,13 @@
+"""
+gunicorn settings, read automatically when gunicorn starts in this directory
+
+    gunicorn --worker-class gthread --threads 32 main:app
+
+Background services start in each worker once it has loaded the app, so
+they also run under --preload, where the master imports the app and forks.
+"""
+
+def post_worker_init(worker):
+    from app import app, start_background_services
+
+    start_background_services(app)
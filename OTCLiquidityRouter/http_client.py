@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import TokenBucket
+
+try:
+    import httpx
+except ImportError:  # Optional; AsyncHTTPClient falls back to HTTPClient on a thread
+    httpx = None
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)  # last bucket is overflow
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, error: bool = False):
+        index = len(self.BUCKETS_MS)
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if elapsed_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return None
+        target = self.count * pct / 100
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else round(self.max_ms, 2)
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}" for bound in self.BUCKETS_MS] + ['inf']
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'buckets': dict(zip(labels, self.counts))
+        }
+
+class RateLimitTimeout(requests.exceptions.RequestException):
+    """No rate-limit token for the host became available before the request's deadline"""
+
+class HTTPClient:
+    """Outbound HTTP session with per-host pooling, rate limiting, retries and latency tracking"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32,
+                 host_pool_sizes: Optional[Dict[str, int]] = None,
+                 host_rate_limits: Optional[Dict[str, float]] = None,
+                 max_retries: int = 2, backoff_factor: float = 0.25,
+                 rate_limit_timeout: float = 2.0):
+        """
+        Args:
+            pool_connections: Number of per-host connection pools to keep
+            pool_maxsize: Default keep-alive connections per host
+            host_pool_sizes: Per-host overrides of pool_maxsize
+            host_rate_limits: Requests per second allowed per host (unlisted hosts are unlimited)
+            max_retries: Retries on 429/5xx and connection errors
+            backoff_factor: Exponential backoff base between retries, in seconds
+            rate_limit_timeout: Longest total wait for rate-limit tokens in one get() call, in seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.session = requests.Session()
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.rate_limit_timeout = rate_limit_timeout
+
+        # Retries happen in get(), not in urllib3, so that every attempt takes a rate-limit token
+        default_adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', default_adapter)
+        self.session.mount('http://', default_adapter)
+
+        for host, size in (host_pool_sizes or {}).items():
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+            self.session.mount(f'https://{host}', adapter)
+            self.session.mount(f'http://{host}', adapter)
+
+        self.limiters = {host: TokenBucket(rate=rps) for host, rps in (host_rate_limits or {}).items()}
+        self.histograms = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Rate-limited, retried GET
+
+        Every attempt, retries included, takes a token from the host's
+        limiter. Retry-After is not honoured, so a long one cannot pin a worker.
+
+        Args:
+            url: Request URL
+            **kwargs: Passed through to requests.Session.get
+
+        Returns:
+            Response (status errors are not raised); the last one if the
+            deadline for rate-limit tokens passes before a retry
+
+        Raises:
+            RateLimitTimeout: No token for the first attempt within rate_limit_timeout
+        """
+        host = urlsplit(url).hostname or ''
+        limiter = self.limiters.get(host)
+        deadline = time.monotonic() + self.rate_limit_timeout
+
+        if not self._take_token(limiter, deadline):
+            raise RateLimitTimeout(f"No rate-limit token for {host} within {self.rate_limit_timeout}s")
+
+        started = time.monotonic()
+        error = True
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = self.session.get(url, **kwargs)
+                except requests.ConnectionError:
+                    if attempt == self.max_retries:
+                        raise
+                    response = None
+                else:
+                    if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                        break
+
+                time.sleep(self.backoff_factor * (2 ** attempt))
+                if not self._take_token(limiter, deadline):
+                    if response is None:
+                        raise RateLimitTimeout(f"No rate-limit token for {host} to retry within {self.rate_limit_timeout}s")
+                    break
+            error = response.status_code >= 400
+            return response
+        finally:
+            self._record(host, (time.monotonic() - started) * 1000, error)
+
+    @staticmethod
+    def _take_token(limiter: Optional[TokenBucket], deadline: float) -> bool:
+        """Take one token from a host's limiter (if it has one), waiting no later than deadline"""
+        return limiter is None or limiter.acquire(timeout=max(0.0, deadline - time.monotonic()))
+
+    def _record(self, host: str, elapsed_ms: float, error: bool):
+        with self._stats_lock:
+            histogram = self.histograms.get(host)
+            if histogram is None:
+                histogram = self.histograms[host] = LatencyHistogram()
+            histogram.record(elapsed_ms, error)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get per-host latency histograms and limiter state
+
+        Returns:
+            Mapping of host to its latency stats and rate-limit wait time
+        """
+        with self._stats_lock:
+            stats = {host: histogram.to_dict() for host, histogram in self.histograms.items()}
+
+        for host, limiter in self.limiters.items():
+            stats.setdefault(host, LatencyHistogram().to_dict())
+            stats[host]['rate_limit_rps'] = limiter.rate
+            stats[host]['rate_limit_wait_s'] = round(limiter.total_wait, 3)
+
+        return stats
+
+class AsyncHTTPClient:
+    """asyncio counterpart of HTTPClient that shares its rate limits and latency stats"""
+
+    def __init__(self, sync_client: HTTPClient, max_connections: int = 200,
+                 max_retries: int = 2, backoff_factor: float = 0.25):
+        """
+        Args:
+            sync_client: HTTPClient whose headers, per-host limiters, rate-limit timeout and histograms are shared
+            max_connections: Connection limit of the async pool
+            max_retries: Retries on 429/5xx and connection errors
+            backoff_factor: Exponential backoff base between retries, in seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.sync_client = sync_client
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._client = None
+        self._client_loop = None
+        self._fallback_pool = None
+
+    @property
+    def native(self) -> bool:
+        """True when requests run on httpx instead of a worker thread"""
+        return httpx is not None
+
+    def _get_client(self):
+        # httpx clients are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                headers=dict(self.sync_client.headers),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                transport=httpx.AsyncHTTPTransport(retries=0)  # get() retries, taking a token each time
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def get(self, url: str, **kwargs):
+        """
+        Rate-limited, retried GET that does not block the event loop
+
+        Args:
+            url: Request URL
+            **kwargs: params, headers and timeout
+
+        Returns:
+            Response (status errors are not raised)
+        """
+        if httpx is None:
+            # The synchronous client takes a token per attempt on the worker thread
+            if self._fallback_pool is None:
+                self._fallback_pool = ThreadPoolExecutor(max_workers=self.max_connections,
+                                                         thread_name_prefix='async-http-fallback')
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._fallback_pool, partial(self.sync_client.get, url, **kwargs))
+
+        host = urlsplit(url).hostname or ''
+        limiter = self.sync_client.limiters.get(host)
+        timeout = self.sync_client.rate_limit_timeout
+        deadline = time.monotonic() + timeout
+
+        if not await self._take_token(limiter, deadline):
+            raise RateLimitTimeout(f"No rate-limit token for {host} within {timeout}s")
+
+        started = time.monotonic()
+        error = True
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self._get_client().get(url, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    if attempt == self.max_retries:
+                        raise
+                    response = None
+                else:
+                    if response.status_code not in HTTPClient.RETRY_STATUSES or attempt == self.max_retries:
+                        break
+
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                if not await self._take_token(limiter, deadline):
+                    if response is None:
+                        raise RateLimitTimeout(f"No rate-limit token for {host} to retry within {timeout}s")
+                    break
+            error = response.status_code >= 400
+            return response
+        finally:
+            self.sync_client._record(host, (time.monotonic() - started) * 1000, error)
+
+    @staticmethod
+    async def _take_token(limiter: Optional[TokenBucket], deadline: float) -> bool:
+        return limiter is None or await limiter.acquire_async(timeout=max(0.0, deadline - time.monotonic()))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -1,19 +1,54 @@
+import asyncio
 import requests
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+import math
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from circuit_breaker import CircuitBreaker
+from http_client import HTTPClient, AsyncHTTPClient
+from ttl_cache import TTLCache
+
+# Sources reported when no live price API answered
+FALLBACK_PRICE_SOURCES = ('all_apis_failed', 'api_error_fallback', 'emergency_fallback')
 
 class JupiterAPI:
     """Jupiter DEX API integration for real-time quotes and liquidity analysis"""
     
     def __init__(self):
         self.base_url = "https://quote-api.jup.ag/v6"
-        self.session = requests.Session()
+        quote_rps = float(os.environ.get('JUPITER_QUOTE_RPS', 10))
+        self.session = HTTPClient(
+            pool_maxsize=int(os.environ.get('HTTP_POOL_MAXSIZE', 32)),
+            host_pool_sizes={
+                'quote-api.jup.ag': int(os.environ.get('JUPITER_POOL_MAXSIZE', 64))
+            },
+            host_rate_limits={
+                'quote-api.jup.ag': quote_rps,
+                'price.jup.ag': float(os.environ.get('JUPITER_PRICE_RPS', 10)),
+                'api.coingecko.com': float(os.environ.get('COINGECKO_RPS', 0.5)),
+                'api.kraken.com': float(os.environ.get('KRAKEN_RPS', 1)),
+                'api.binance.com': float(os.environ.get('BINANCE_RPS', 5))
+            },
+            max_retries=int(os.environ.get('HTTP_MAX_RETRIES', 2)),
+            backoff_factor=float(os.environ.get('HTTP_RETRY_BACKOFF', 0.25)),
+            rate_limit_timeout=float(os.environ.get('HTTP_RATE_LIMIT_TIMEOUT', 2.0))
+        )
         self.session.headers.update({
             'User-Agent': 'OTC-Routing-Engine/1.0'
         })
         
+        # Event-loop client for the ASGI serving mode; shares the limiters above
+        self.async_session = AsyncHTTPClient(
+            self.session,
+            max_connections=int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 200)),
+            max_retries=int(os.environ.get('HTTP_MAX_RETRIES', 2)),
+            backoff_factor=float(os.environ.get('HTTP_RETRY_BACKOFF', 0.25))
+        )
+        self._async_quote_flights = {}  # cache key -> in-flight asyncio task
+        
         # Token mint addresses for common tokens
         self.token_mints = {
             'SOL': 'So11111111111111111111111111111111111111112',
@@ -23,23 +58,233 @@ class JupiterAPI:
             'SRM': 'SRMuApVNdxXokk5GT7XD5cUUgXMBCoAz2LHeuAoKWRt'
         }
         
+        # Multi-token price snapshot (kept warm by PriceRefresher when attached)
+        self.price_cache = {}
+        self.price_cache_duration = 300  # 5 minute cache for real-time feel
+        self.price_refresher = None
+        
+        # Price sources in preference order, raced with hedged requests
+        self.price_sources = [
+            ('coingecko', self._fetch_coingecko_prices),
+            ('kraken', self._fetch_kraken_prices),
+            ('binance', self._fetch_binance_prices)
+        ]
+        self.price_hedge_delay = float(os.environ.get('PRICE_HEDGE_DELAY', 0.5))  # 0 = fire all at once
+        self.price_breakers = {name: CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+                               for name, _ in self.price_sources}
+        self._hedge_pool = ThreadPoolExecutor(max_workers=2 * len(self.price_sources),
+                                              thread_name_prefix='price-hedge')
+        
+        # Short-lived cache of quotes for preview traffic, keyed by pair, slippage and amount bucket
+        self.quote_cache_ttl = float(os.environ.get('QUOTE_CACHE_TTL', 2.0))
+        self.quote_amount_bucket_bps = float(os.environ.get('QUOTE_AMOUNT_BUCKET_BPS', 50))  # 0.5% wide buckets
+        # Largest gap between the cached and requested amount a quote is scaled across; further apart in
+        # the same bucket, linear scaling would carry the cached size's price impact over, so fetch fresh
+        self.quote_cache_tolerance_bps = float(os.environ.get('QUOTE_CACHE_TOLERANCE_BPS', 10))
+        self.quote_cache = TTLCache(ttl=self.quote_cache_ttl, maxsize=1024)
+        
+        # Depth probes run concurrently; the session's per-host limiter paces them
+        self.depth_curve_points = 8
+        self._probe_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='depth-probe')
+        
+        # Batch ladders get their own pool, sized to half the quote rate limit, so a large batch
+        # cannot hold every probe thread or take every quote token from depth curves
+        self.batch_quote_workers = int(os.environ.get('JUPITER_BATCH_QUOTE_WORKERS', max(1, int(quote_rps // 2))))
+        self._batch_pool = ThreadPoolExecutor(max_workers=self.batch_quote_workers, thread_name_prefix='batch-quote')
+        
     def get_token_mint(self, symbol: str) -> str:
         """Get token mint address by symbol"""
         return self.token_mints.get(symbol.upper(), symbol)
     
-    def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50) -> Optional[Dict[str, Any]]:
+    def get_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                  use_cache: bool = True) -> Optional[Dict[str, Any]]:
         """
         Get quote from Jupiter API
         
+        Cached quotes are shared by amounts in the same bucket that are within
+        quote_cache_tolerance_bps of the cached amount and scaled linearly to
+        the requested amount, which is fine for previews. Pass use_cache=False
+        for execution-grade quotes.
+        
         Args:
             input_mint: Input token mint address
             output_mint: Output token mint address  
             amount: Input amount in smallest unit (lamports for SOL)
             slippage_bps: Slippage tolerance in basis points (50 = 0.5%)
+            use_cache: Serve from (and populate) the short-TTL quote cache
         
         Returns:
             Quote data or None if failed
         """
+        if not use_cache or self.quote_cache_ttl <= 0:
+            return self._fetch_quote(input_mint, output_mint, amount, slippage_bps)
+        
+        key = (input_mint, output_mint, slippage_bps, self._amount_bucket(amount))
+        cached = self.quote_cache.get_or_load(
+            key,
+            lambda: self._fetch_cached_quote(input_mint, output_mint, amount, slippage_bps)
+        )
+        if cached is None:
+            return None
+        
+        quoted_amount, quote_data = cached
+        if not self._within_tolerance(quoted_amount, amount):
+            return self._fetch_quote(input_mint, output_mint, amount, slippage_bps)
+        return self._scale_quote(quote_data, quoted_amount, amount)
+    
+    def get_quotes(self, quote_requests: List[Tuple[str, str, int]], slippage_bps: int = 50, use_cache: bool = True,
+                   timeout: Optional[float] = None) -> Tuple[List[Optional[Dict[str, Any]]], int]:
+        """
+        Quote many (input_mint, output_mint, amount) requests concurrently
+        
+        Requests that get_quote would answer from the same cache entry (same
+        pair and amount bucket and within quote_cache_tolerance_bps, or the
+        same exact amount with use_cache=False) share one upstream request,
+        and the quote is scaled to each amount.
+        The distinct requests run batch_quote_workers at a time and the
+        session's Jupiter rate limit paces them, so roughly
+        min(batch_quote_workers / latency, JUPITER_QUOTE_RPS) x timeout of them
+        finish; requests still queued at the timeout are cancelled.
+        
+        Args:
+            quote_requests: (input_mint, output_mint, amount in smallest unit) tuples
+            slippage_bps: Slippage tolerance in basis points
+            use_cache: Serve from (and populate) the short-TTL quote cache
+            timeout: Seconds to wait for the whole batch; unfinished quotes are None
+            
+        Returns:
+            (quotes in request order, None where unavailable; number of distinct requests)
+        """
+        caching = use_cache and self.quote_cache_ttl > 0
+        groups = {}  # dedup key -> indexes of the requests it answers
+        for index, (input_mint, output_mint, amount) in enumerate(quote_requests):
+            key = (input_mint, output_mint, self._amount_bucket(amount) if caching else amount)
+            shared = groups.get(key)
+            if shared and not self._within_tolerance(quote_requests[shared[0]][2], amount):
+                key += (amount,)  # same bucket but too far from the amount its quote is for
+            groups.setdefault(key, []).append(index)
+        
+        futures = {}
+        for key, indexes in groups.items():
+            input_mint, output_mint, amount = quote_requests[indexes[0]]
+            futures[key] = self._batch_pool.submit(self.get_quote, input_mint, output_mint, amount,
+                                                   slippage_bps, use_cache)
+        wait(futures.values(), timeout=timeout)
+        for future in futures.values():
+            future.cancel()  # no-op once running or done; drops the queued rest of a timed-out batch
+        
+        quotes = [None] * len(quote_requests)
+        for key, indexes in groups.items():
+            future = futures[key]
+            if not future.done() or future.cancelled() or future.exception() is not None:
+                continue
+            quote = future.result()
+            if not quote:
+                continue
+            quoted_amount = quote_requests[indexes[0]][2]
+            for index in indexes:
+                quotes[index] = self._scale_quote(quote, quoted_amount, quote_requests[index][2])
+        
+        return quotes, len(groups)
+    
+    async def get_quote_async(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50,
+                              use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        get_quote for asyncio callers
+        
+        Shares the quote cache with get_quote; concurrent misses for the same
+        bucket on the event loop await a single request.
+        """
+        if not use_cache or self.quote_cache_ttl <= 0:
+            return await self._fetch_quote_async(input_mint, output_mint, amount, slippage_bps)
+        
+        key = (input_mint, output_mint, slippage_bps, self._amount_bucket(amount))
+        cached = self.quote_cache.get(key)
+        if cached is None:
+            flight = self._async_quote_flights.get(key)
+            if flight is None:
+                flight = asyncio.ensure_future(self._fetch_cached_quote_async(key, input_mint, output_mint,
+                                                                              amount, slippage_bps))
+                self._async_quote_flights[key] = flight
+                flight.add_done_callback(lambda _: self._async_quote_flights.pop(key, None))
+            # Shield so one cancelled waiter does not cancel the shared request
+            cached = await asyncio.shield(flight)
+        if cached is None:
+            return None
+        
+        quoted_amount, quote_data = cached
+        if not self._within_tolerance(quoted_amount, amount):
+            return await self._fetch_quote_async(input_mint, output_mint, amount, slippage_bps)
+        return self._scale_quote(quote_data, quoted_amount, amount)
+    
+    async def _fetch_cached_quote_async(self, key, input_mint: str, output_mint: str, amount: int, slippage_bps: int):
+        quote_data = await self._fetch_quote_async(input_mint, output_mint, amount, slippage_bps)
+        if not quote_data:
+            return None
+        self.quote_cache.set(key, (amount, quote_data))
+        return amount, quote_data
+    
+    async def _fetch_quote_async(self, input_mint: str, output_mint: str, amount: int,
+                                 slippage_bps: int = 50) -> Optional[Dict[str, Any]]:
+        """Request a quote from Jupiter without blocking the event loop, bypassing the quote cache"""
+        try:
+            params = {
+                'inputMint': input_mint,
+                'outputMint': output_mint,
+                'amount': amount,
+                'slippageBps': slippage_bps
+            }
+            
+            response = await self.async_session.get(f"{self.base_url}/quote", params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
+            
+        except Exception as e:
+            logging.error(f"Jupiter API request failed: {e}")
+            return None
+    
+    def quote_version(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50) -> Optional[float]:
+        """
+        Version of the cached quote that get_quote would serve for these arguments
+        
+        Returns:
+            A marker that changes when the cached quote is refreshed, or None
+            if the next get_quote call would fetch a new quote
+        """
+        if self.quote_cache_ttl <= 0:
+            return None
+        return self.quote_cache.version((input_mint, output_mint, slippage_bps, self._amount_bucket(amount)))
+    
+    def _amount_bucket(self, amount: int) -> int:
+        """Logarithmic amount bucket so that each bucket spans quote_amount_bucket_bps"""
+        if amount <= 0 or self.quote_amount_bucket_bps <= 0:
+            return amount
+        return int(math.log(amount) / math.log1p(self.quote_amount_bucket_bps / 10000))
+    
+    def _within_tolerance(self, quoted_amount: int, amount: int) -> bool:
+        """Whether a quote for quoted_amount may be scaled linearly to amount"""
+        return abs(amount - quoted_amount) <= quoted_amount * self.quote_cache_tolerance_bps / 10000
+    
+    def _fetch_cached_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int):
+        quote_data = self._fetch_quote(input_mint, output_mint, amount, slippage_bps)
+        return (amount, quote_data) if quote_data else None
+    
+    @staticmethod
+    def _scale_quote(quote_data: Dict[str, Any], quoted_amount: int, amount: int) -> Dict[str, Any]:
+        """Copy of a cached quote with its amounts scaled to the requested input amount"""
+        if quoted_amount == amount or not quoted_amount:
+            return quote_data
+        
+        ratio = amount / quoted_amount
+        scaled = dict(quote_data)
+        scaled['inAmount'] = str(amount)
+        for field in ('outAmount', 'otherAmountThreshold'):
+            if field in quote_data:
+                scaled[field] = str(int(int(quote_data[field]) * ratio))
+        return scaled
+    
+    def _fetch_quote(self, input_mint: str, output_mint: str, amount: int, slippage_bps: int = 50) -> Optional[Dict[str, Any]]:
+        """Request a quote from Jupiter, bypassing the quote cache"""
         try:
             params = {
                 'inputMint': input_mint,
@@ -176,15 +421,65 @@ class JupiterAPI:
         """
         Get prices for multiple tokens using multiple data sources
         
+        When a PriceRefresher is attached, an expired snapshot is still served
+        (stale-while-revalidate) and the refresher is woken to replace it.
+        
         Returns:
             Dictionary with token prices and metadata
         """
-        current_time = time.time()
+        cached = self.price_cache
+        if cached:
+            if time.time() - cached.get('cached_at', 0) < self.price_cache_duration:
+                return cached
+            
+            if self.price_refresher is not None and self.price_refresher.is_running():
+                self.price_refresher.request_refresh()
+                return cached
+        
+        return self.refresh_multiple_token_prices()
+    
+    async def get_multiple_token_prices_async(self) -> Dict[str, Any]:
+        """
+        get_multiple_token_prices for asyncio callers
+        
+        The snapshot is returned directly when it can be served from memory;
+        a refresh that would block runs on a worker thread.
+        """
+        cached = self.price_cache
+        refresher_running = self.price_refresher is not None and self.price_refresher.is_running()
+        if cached and (refresher_running or time.time() - cached.get('cached_at', 0) < self.price_cache_duration):
+            return self.get_multiple_token_prices()
         
-        # Check cache first (5 minute cache for real-time feel)
-        if (hasattr(self, 'price_cache') and self.price_cache and 
-            current_time - self.price_cache.get('cached_at', 0) < 300):
-            return self.price_cache
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_multiple_token_prices)
+    
+    def get_cached_token_price(self, symbol: str) -> Optional[float]:
+        """
+        Get a token price from the in-memory snapshot without any network I/O
+        
+        Args:
+            symbol: Token symbol (SOL, USDC, etc.)
+            
+        Returns:
+            Live-sourced price within the cache duration, or None
+        """
+        cached = self.price_cache
+        if not cached or cached.get('source') in FALLBACK_PRICE_SOURCES:
+            return None
+        if time.time() - cached.get('cached_at', 0) >= self.price_cache_duration:
+            return None
+        
+        token_data = cached.get('prices', {}).get(symbol.upper())
+        return float(token_data['price']) if token_data else None
+    
+    def refresh_multiple_token_prices(self) -> Dict[str, Any]:
+        """
+        Fetch prices for multiple tokens from the live sources and update the snapshot
+        
+        Returns:
+            Dictionary with token prices and metadata
+        """
+        current_time = time.time()
         
         # Fallback prices only as last resort
         fallback_prices = {
@@ -221,164 +516,11 @@ class JupiterAPI:
         }
         
         try:
-            # Try multiple data sources in order of preference
-            
-            # Method 1: Try CoinGecko first (most comprehensive)
-            try:
-                response = self.session.get(
-                    "https://api.coingecko.com/api/v3/simple/price",
-                    params={
-                        'ids': 'solana,usd-coin,tether,raydium,serum',
-                        'vs_currencies': 'usd',
-                        'include_24hr_change': 'true',
-                        'include_last_updated_at': 'true'
-                    },
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Map CoinGecko response to our format
-                    token_mapping = {
-                        'solana': {'symbol': 'SOL', 'mint': 'So11111111111111111111111111111111111111112'},
-                        'usd-coin': {'symbol': 'USDC', 'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'},
-                        'tether': {'symbol': 'USDT', 'mint': 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB'},
-                        'raydium': {'symbol': 'RAY', 'mint': '4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R'},
-                        'serum': {'symbol': 'SRM', 'mint': 'SRMuApVNdxXokk5GT7XD5cUUgXMBCoAz2LHeuAoKWRt'}
-                    }
-                    
-                    prices = {}
-                    for coingecko_id, token_info in token_mapping.items():
-                        if coingecko_id in data:
-                            token_data = data[coingecko_id]
-                            prices[token_info['symbol']] = {
-                                'price': token_data.get('usd', fallback_prices[token_info['symbol']]['price']),
-                                'change_24h': token_data.get('usd_24h_change', 0.0),
-                                'last_updated': token_data.get('last_updated_at', int(current_time)),
-                                'mint': token_info['mint']
-                            }
-                        else:
-                            prices[token_info['symbol']] = fallback_prices[token_info['symbol']]
-                    
-                    result = {
-                        'prices': prices,
-                        'last_updated': int(current_time),
-                        'source': 'coingecko_live',
-                        'cached_at': current_time
-                    }
-                    
-                    # Cache successful result
-                    self.price_cache = result
-                    return result
-                    
-                elif response.status_code == 429:
-                    logging.warning("CoinGecko rate limited, trying Kraken")
-                    
-            except Exception as e:
-                logging.warning(f"CoinGecko error: {e}, trying Kraken")
-            
-            # Method 2: Try Kraken API for SOL/USD
-            try:
-                response = self.session.get(
-                    "https://api.kraken.com/0/public/Ticker",
-                    params={'pair': 'SOLUSD'},
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    kraken_data = response.json()
-                    
-                    if 'result' in kraken_data and 'SOLUSD' in kraken_data['result']:
-                        sol_data = kraken_data['result']['SOLUSD']
-                        sol_price = float(sol_data['c'][0])  # Last trade closed price
-                        
-                        # Get stablecoin prices from another source or use standard values
-                        prices = {
-                            'SOL': {
-                                'price': sol_price,
-                                'change_24h': 0.0,  # Kraken doesn't provide 24h change in this format
-                                'last_updated': int(current_time),
-                                'mint': 'So11111111111111111111111111111111111111112'
-                            },
-                            'USDC': {
-                                'price': 1.0001,
-                                'change_24h': 0.01,
-                                'last_updated': int(current_time),
-                                'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'
-                            },
-                            'USDT': {
-                                'price': 0.9999,
-                                'change_24h': -0.01,
-                                'last_updated': int(current_time),
-                                'mint': 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB'
-                            },
-                            'RAY': fallback_prices['RAY'],
-                            'SRM': fallback_prices['SRM']
-                        }
-                        
-                        result = {
-                            'prices': prices,
-                            'last_updated': int(current_time),
-                            'source': 'kraken_partial',
-                            'cached_at': current_time
-                        }
-                        
-                        # Cache partial result
-                        self.price_cache = result
-                        return result
-                        
-            except Exception as e:
-                logging.warning(f"Kraken error: {e}")
-            
-            # Method 3: Try Binance API for backup
-            try:
-                response = self.session.get(
-                    "https://api.binance.com/api/v3/ticker/price",
-                    params={'symbol': 'SOLUSDT'},
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    binance_data = response.json()
-                    sol_price = float(binance_data['price'])
-                    
-                    prices = {
-                        'SOL': {
-                            'price': sol_price,
-                            'change_24h': 0.0,
-                            'last_updated': int(current_time),
-                            'mint': 'So11111111111111111111111111111111111111112'
-                        },
-                        'USDC': {
-                            'price': 1.0001,
-                            'change_24h': 0.01,
-                            'last_updated': int(current_time),
-                            'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'
-                        },
-                        'USDT': {
-                            'price': 0.9999,
-                            'change_24h': -0.01,
-                            'last_updated': int(current_time),
-                            'mint': 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB'
-                        },
-                        'RAY': fallback_prices['RAY'],
-                        'SRM': fallback_prices['SRM']
-                    }
-                    
-                    result = {
-                        'prices': prices,
-                        'last_updated': int(current_time),
-                        'source': 'binance_partial',
-                        'cached_at': current_time
-                    }
-                    
-                    # Cache partial result
-                    self.price_cache = result
-                    return result
-                    
-            except Exception as e:
-                logging.warning(f"Binance error: {e}")
+            result = self._fetch_hedged_prices(current_time, fallback_prices)
+            if result is not None:
+                # Cache successful (possibly partial) result
+                self.price_cache = result
+                return result
             
             # Last resort: return fallback but mark it clearly
             logging.error("All price APIs failed, using fallback prices")
@@ -390,13 +532,6 @@ class JupiterAPI:
             }
             return result
             
-        except requests.exceptions.RequestException as e:
-            logging.warning(f"CoinGecko API error: {e}, using fallback prices")
-            return {
-                'prices': fallback_prices,
-                'last_updated': int(time.time()),
-                'source': 'api_error_fallback'
-            }
         except Exception as e:
             logging.error(f"Error getting multiple token prices: {e}")
             return {
@@ -405,6 +540,196 @@ class JupiterAPI:
                 'source': 'emergency_fallback'
             }
     
+    def _fetch_hedged_prices(self, current_time: float, fallback_prices: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Race the price sources in preference order and take the first valid answer
+        
+        The primary source starts immediately. Each further source starts as soon
+        as the previous one fails, or once `price_hedge_delay` seconds pass without
+        an answer. Sources whose circuit breaker is open are skipped.
+        
+        Args:
+            current_time: Timestamp stamped on the result
+            fallback_prices: Per-token fallbacks for tokens a source does not cover
+            
+        Returns:
+            Price result from the first source that answered, or None if all failed
+        """
+        sources = self.price_sources
+        pending = set()
+        next_source = 0
+        
+        def launch() -> bool:
+            """Start the next source its breaker allows; returns False when none is left"""
+            nonlocal next_source
+            while next_source < len(sources):
+                name, fetch = sources[next_source]
+                next_source += 1
+                # Ask the breaker only for the source actually started, so a half-open
+                # breaker's single trial slot is never taken by a source that does not run
+                if self.price_breakers[name].allow():
+                    pending.add(self._hedge_pool.submit(self._call_price_source, name, fetch,
+                                                        current_time, fallback_prices))
+                    return True
+            return False
+        
+        if not launch():
+            logging.warning("All price sources are circuit-broken")
+            return None
+        
+        while pending:
+            hedge_timeout = self.price_hedge_delay if next_source < len(sources) else None
+            done, _ = wait(pending, timeout=hedge_timeout, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+            
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    return result
+            
+            # Either the hedge delay passed or a source failed: start the next one
+            if next_source < len(sources):
+                launch()
+        
+        return None
+    
+    def _call_price_source(self, name: str, fetch, current_time: float, fallback_prices: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run one price source and feed its outcome to its circuit breaker"""
+        breaker = self.price_breakers[name]
+        try:
+            result = fetch(current_time, fallback_prices)
+        except Exception as e:
+            logging.warning(f"{name} price source error: {e}")
+            result = None
+        
+        if result is None:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return result
+    
+    def _fetch_coingecko_prices(self, current_time: float, fallback_prices: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """CoinGecko (most comprehensive): all tokens with 24h change"""
+        response = self.session.get(
+            "https://api.coingecko.com/api/v3/simple/price",
+            params={
+                'ids': 'solana,usd-coin,tether,raydium,serum',
+                'vs_currencies': 'usd',
+                'include_24hr_change': 'true',
+                'include_last_updated_at': 'true'
+            },
+            timeout=5
+        )
+        
+        if response.status_code == 429:
+            logging.warning("CoinGecko rate limited")
+            return None
+        if response.status_code != 200:
+            return None
+        
+        data = response.json()
+        
+        # Map CoinGecko response to our format
+        token_mapping = {
+            'solana': {'symbol': 'SOL', 'mint': 'So11111111111111111111111111111111111111112'},
+            'usd-coin': {'symbol': 'USDC', 'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'},
+            'tether': {'symbol': 'USDT', 'mint': 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB'},
+            'raydium': {'symbol': 'RAY', 'mint': '4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R'},
+            'serum': {'symbol': 'SRM', 'mint': 'SRMuApVNdxXokk5GT7XD5cUUgXMBCoAz2LHeuAoKWRt'}
+        }
+        
+        prices = {}
+        for coingecko_id, token_info in token_mapping.items():
+            if coingecko_id in data:
+                token_data = data[coingecko_id]
+                prices[token_info['symbol']] = {
+                    'price': token_data.get('usd', fallback_prices[token_info['symbol']]['price']),
+                    'change_24h': token_data.get('usd_24h_change', 0.0),
+                    'last_updated': token_data.get('last_updated_at', int(current_time)),
+                    'mint': token_info['mint']
+                }
+            else:
+                prices[token_info['symbol']] = fallback_prices[token_info['symbol']]
+        
+        return {
+            'prices': prices,
+            'last_updated': int(current_time),
+            'source': 'coingecko_live',
+            'cached_at': current_time
+        }
+    
+    def _fetch_kraken_prices(self, current_time: float, fallback_prices: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Kraken: SOL/USD only, standard values for stablecoins"""
+        response = self.session.get(
+            "https://api.kraken.com/0/public/Ticker",
+            params={'pair': 'SOLUSD'},
+            timeout=5
+        )
+        
+        if response.status_code != 200:
+            return None
+        
+        kraken_data = response.json()
+        if 'result' not in kraken_data or 'SOLUSD' not in kraken_data['result']:
+            return None
+        
+        sol_data = kraken_data['result']['SOLUSD']
+        sol_price = float(sol_data['c'][0])  # Last trade closed price
+        
+        # Kraken doesn't provide 24h change in this format
+        return {
+            'prices': self._partial_sol_prices(sol_price, current_time, fallback_prices),
+            'last_updated': int(current_time),
+            'source': 'kraken_partial',
+            'cached_at': current_time
+        }
+    
+    def _fetch_binance_prices(self, current_time: float, fallback_prices: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Binance: SOL/USDT only, standard values for stablecoins"""
+        response = self.session.get(
+            "https://api.binance.com/api/v3/ticker/price",
+            params={'symbol': 'SOLUSDT'},
+            timeout=5
+        )
+        
+        if response.status_code != 200:
+            return None
+        
+        binance_data = response.json()
+        sol_price = float(binance_data['price'])
+        
+        return {
+            'prices': self._partial_sol_prices(sol_price, current_time, fallback_prices),
+            'last_updated': int(current_time),
+            'source': 'binance_partial',
+            'cached_at': current_time
+        }
+    
+    def _partial_sol_prices(self, sol_price: float, current_time: float, fallback_prices: Dict[str, Any]) -> Dict[str, Any]:
+        """Price map for sources that only quote SOL"""
+        return {
+            'SOL': {
+                'price': sol_price,
+                'change_24h': 0.0,
+                'last_updated': int(current_time),
+                'mint': 'So11111111111111111111111111111111111111112'
+            },
+            'USDC': {
+                'price': 1.0001,
+                'change_24h': 0.01,
+                'last_updated': int(current_time),
+                'mint': 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'
+            },
+            'USDT': {
+                'price': 0.9999,
+                'change_24h': -0.01,
+                'last_updated': int(current_time),
+                'mint': 'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB'
+            },
+            'RAY': fallback_prices['RAY'],
+            'SRM': fallback_prices['SRM']
+        }
+    
     def check_liquidity_depth(self, input_mint: str, output_mint: str, amount: int) -> Dict[str, Any]:
         """
         Check liquidity depth for a given trade size
@@ -426,17 +751,7 @@ class JupiterAPI:
                 amount * 2      # 2x trade size
             ]
             
-            quotes = []
-            for test_amount in test_amounts:
-                quote = self.get_quote(input_mint, output_mint, test_amount)
-                if quote:
-                    slippage = self.calculate_slippage(quote)
-                    quotes.append({
-                        'amount': test_amount,
-                        'slippage': slippage,
-                        'output_amount': int(quote['outAmount'])
-                    })
-                time.sleep(0.1)  # Rate limiting
+            quotes = self._probe_quotes(input_mint, output_mint, test_amounts)
             
             if not quotes:
                 return {'status': 'error', 'message': 'No quotes available'}
@@ -461,3 +776,103 @@ class JupiterAPI:
         except Exception as e:
             logging.error(f"Error checking liquidity depth: {e}")
             return {'status': 'error', 'message': str(e)}
+    
+    def get_depth_curve(self, input_mint: str, output_mint: str, max_amount: int,
+                        points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Probe evenly spaced trade sizes concurrently and build a slippage-vs-size curve
+        
+        Args:
+            input_mint: Input token mint
+            output_mint: Output token mint
+            max_amount: Largest size to probe (smallest unit)
+            points: Number of sizes to probe (defaults to depth_curve_points)
+            
+        Returns:
+            Curve of probed points sorted by amount, usable with interpolate_slippage
+        """
+        try:
+            points = points or self.depth_curve_points
+            started = time.monotonic()
+            
+            amounts = [max_amount * (i + 1) // points for i in range(points)]
+            curve = self._probe_quotes(input_mint, output_mint, [a for a in amounts if a > 0])
+            
+            if not curve:
+                return {'status': 'error', 'message': 'No quotes available'}
+            
+            return {
+                'status': 'success',
+                'input_mint': input_mint,
+                'output_mint': output_mint,
+                'points': curve,
+                'max_amount': max_amount,
+                'probe_ms': round((time.monotonic() - started) * 1000, 2)
+            }
+            
+        except Exception as e:
+            logging.error(f"Error building depth curve: {e}")
+            return {'status': 'error', 'message': str(e)}
+    
+    @staticmethod
+    def interpolate_slippage(points: List[Dict[str, Any]], amount: float) -> float:
+        """
+        Linearly interpolate slippage for a size from a depth curve
+        
+        Below the first probe the curve is anchored at zero slippage for a zero
+        size; beyond the last probe the final segment's slope is extended.
+        
+        Args:
+            points: Curve points sorted by amount (from get_depth_curve)
+            amount: Trade size in the same unit as the curve
+            
+        Returns:
+            Estimated slippage percentage
+        """
+        if not points:
+            return 0.0
+        
+        prev_amount, prev_slippage = 0, 0.0
+        for point in points:
+            if amount <= point['amount']:
+                span = point['amount'] - prev_amount
+                if span <= 0:
+                    return point['slippage']
+                weight = (amount - prev_amount) / span
+                return prev_slippage + weight * (point['slippage'] - prev_slippage)
+            prev_amount, prev_slippage = point['amount'], point['slippage']
+        
+        if len(points) < 2:
+            return points[-1]['slippage'] * amount / points[-1]['amount'] if points[-1]['amount'] else 0.0
+        
+        a, b = points[-2], points[-1]
+        slope = (b['slippage'] - a['slippage']) / (b['amount'] - a['amount']) if b['amount'] != a['amount'] else 0.0
+        return b['slippage'] + slope * (amount - b['amount'])
+    
+    def _probe_quotes(self, input_mint: str, output_mint: str, amounts: List[int]) -> List[Dict[str, Any]]:
+        """
+        Quote several sizes concurrently; the session's Jupiter rate limit paces the requests
+        
+        Probes bypass the quote cache: a cached quote scaled to another size
+        keeps its price impact, which would flatten the curve being measured.
+        """
+        futures = [
+            (test_amount, self._probe_pool.submit(self.get_quote, input_mint, output_mint, test_amount,
+                                                  use_cache=False))
+            for test_amount in amounts
+        ]
+        
+        quotes = []
+        for test_amount, future in futures:
+            quote = future.result()
+            if quote:
+                slippage = self.calculate_slippage(quote)
+                output_amount = int(quote['outAmount'])
+                quotes.append({
+                    'amount': test_amount,
+                    'slippage': slippage,
+                    'output_amount': output_amount,
+                    'price': output_amount / test_amount if test_amount else 0.0
+                })
+        
+        return quotes
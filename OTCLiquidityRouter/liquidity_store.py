@@ -0,0 +1,365 @@
+import copy
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import IntegrityError
+
+from ttl_cache import TTLCache
+
+class LiquidityStore:
+    """
+    OTC pool liquidity shared by every thread and worker process
+
+    Executions reserve liquidity before settling and then commit or
+    release the reservation. With a database attached, each step is one
+    conditional UPDATE (a compare-and-swap on the pool or reservation row),
+    so concurrent reservations from any process can never take more than a
+    pool holds. Quotes read pool snapshots from a short-TTL in-process
+    cache; only reservations need the authoritative row.
+
+    Without a database (e.g. an OTCEngine used on its own) the same
+    operations run against in-memory pools under a lock.
+    """
+
+    def __init__(self, cache_ttl: float = 1.0, reservation_ttl: float = 60.0, sweep_interval: float = 10.0):
+        """
+        Args:
+            cache_ttl: Seconds a pool snapshot is served before it is re-read
+            reservation_ttl: Seconds before an uncommitted reservation is released
+            sweep_interval: Minimum seconds between sweeps for expired reservations
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_ttl = cache_ttl
+        self.reservation_ttl = reservation_ttl
+        self.sweep_interval = sweep_interval
+
+        self.engine = None
+        self.OTCPool = None
+        self.LiquidityReservation = None
+
+        self._default_pools = {}
+        self._pools = {}         # in-memory mode: pair -> pool dict
+        self._reservations = {}  # in-memory mode: reservation id -> (pair, amount, expires_at)
+        self._pool_ids = {}      # database mode: pair -> OTCPool.id
+        self._lock = threading.Lock()
+        self._cache = TTLCache(ttl=cache_ttl, maxsize=1)
+        self._last_sweep = 0.0
+
+        # Metrics
+        self.reservations = 0
+        self.rejections = 0
+        self.commits = 0
+        self.releases = 0
+        self.expired = 0
+
+    def set_default_pools(self, pools: Dict[str, Dict[str, Any]]):
+        """
+        Register pool configurations keyed by pair ('SOL/USDC')
+
+        They are served from memory until init_db is called, which adds
+        any pool missing from the OTCPool table.
+        """
+        with self._lock:
+            for pair, pool in pools.items():
+                self._default_pools[pair] = copy.deepcopy(pool)
+                self._pools.setdefault(pair, dict(copy.deepcopy(pool), reserved=0.0))
+        self._cache.invalidate('pools')
+
+    def init_db(self, db, OTCPool, LiquidityReservation, app=None):
+        """Initialize database models, seed missing pools and give older pools the default pricing curve"""
+        self.engine = db.engine
+        self.OTCPool = OTCPool
+        self.LiquidityReservation = LiquidityReservation
+
+        P = OTCPool
+        for pair, pool in self._default_pools.items():
+            base_token, quote_token = pair.split('/')
+            try:
+                with self.engine.begin() as conn:
+                    exists = conn.execute(
+                        select(P.id).where(P.base_token == base_token, P.quote_token == quote_token)
+                    ).first()
+                    if exists is not None:
+                        # Pools created before spread tiers existed take the default curve once
+                        conn.execute(
+                            update(P).where(P.id == exists.id, P.spread_tiers.is_(None))
+                            .values(spread_tiers=pool.get('spread_tiers') or [], depth_spread=pool.get('depth_spread', 0.0))
+                        )
+                    else:
+                        conn.execute(insert(P).values(
+                            base_token=base_token, quote_token=quote_token,
+                            liquidity=pool['liquidity'], reserved=0.0,
+                            spread=pool['spread'], base_price_offset=pool.get('base_price_offset', 0.0),
+                            spread_tiers=pool.get('spread_tiers') or [], depth_spread=pool.get('depth_spread', 0.0),
+                            min_trade_size=pool['min_trade'], max_trade_size=pool['max_trade'],
+                            active=pool['active']
+                        ))
+                        self.logger.info(f"Seeded OTC pool {pair}")
+            except IntegrityError:
+                # Another worker seeded it first
+                pass
+
+        self._cache.invalidate('pools')
+        self.get_pools()
+
+    def get_pools(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Snapshot of every pool, at most cache_ttl seconds old
+
+        Returns:
+            Mapping of pair to pool with 'liquidity' (unreserved, available to
+            new trades), 'reserved', 'spread', 'spread_tiers', 'depth_spread',
+            'base_price_offset', 'min_trade', 'max_trade' and 'active'
+        """
+        return self._cache.get_or_load('pools', self._load_pools)
+
+    def get_pool(self, pair: str) -> Optional[Dict[str, Any]]:
+        return self.get_pools().get(pair)
+
+    def snapshot_version(self) -> Optional[float]:
+        """Store time of the cached pool snapshot, or None if it must be re-read"""
+        return self._cache.version('pools')
+
+    def reserve(self, pair: str, amount: float) -> Optional[str]:
+        """
+        Atomically hold liquidity for one execution
+
+        Args:
+            pair: Trading pair
+            amount: Input amount to hold
+
+        Returns:
+            Reservation ID, or None if the pool is unknown, inactive or lacks
+            the unreserved liquidity
+        """
+        self._maybe_sweep()
+        reservation_id = uuid.uuid4().hex
+
+        if self.engine is None:
+            with self._lock:
+                pool = self._pools.get(pair)
+                if pool is None or not pool['active'] or pool['liquidity'] - pool['reserved'] < amount:
+                    self.rejections += 1
+                    return None
+                pool['reserved'] += amount
+                self._reservations[reservation_id] = (pair, amount, time.monotonic() + self.reservation_ttl)
+                self.reservations += 1
+            self._cache.invalidate('pools')
+            return reservation_id
+
+        pool_id = self._pool_id(pair)
+        if pool_id is None:
+            self.rejections += 1
+            return None
+
+        P = self.OTCPool
+        R = self.LiquidityReservation
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            # The WHERE clause is the compare-and-swap: it is re-checked against the
+            # locked row, so concurrent reservations cannot oversell the pool
+            result = conn.execute(
+                update(P)
+                .where(P.id == pool_id, P.active.is_(True), P.liquidity - P.reserved >= amount)
+                .values(reserved=P.reserved + amount, updated_at=now)
+            )
+            if result.rowcount != 1:
+                with self._lock:
+                    self.rejections += 1
+                return None
+
+            conn.execute(insert(R).values(
+                id=reservation_id, pool_id=pool_id, amount=amount, status='held',
+                created_at=now, expires_at=now + timedelta(seconds=self.reservation_ttl)
+            ))
+
+        with self._lock:
+            self.reservations += 1
+        self._cache.invalidate('pools')
+        return reservation_id
+
+    def commit(self, reservation_id: str) -> Optional[float]:
+        """
+        Take reserved liquidity out of its pool
+
+        Returns:
+            Unreserved liquidity left in the pool, or None if the reservation
+            is no longer held (already settled, released or expired)
+        """
+        remaining = self._finish(reservation_id, 'committed')
+        if remaining is not None:
+            with self._lock:
+                self.commits += 1
+        return remaining
+
+    def release(self, reservation_id: str) -> bool:
+        """
+        Return reserved liquidity to its pool
+
+        Returns:
+            True if the reservation was held and is now released
+        """
+        released = self._finish(reservation_id, 'released') is not None
+        if released:
+            with self._lock:
+                self.releases += 1
+        return released
+
+    def set_liquidity(self, pair: str, liquidity: float) -> bool:
+        """
+        Set a pool's total liquidity (reservations stay held)
+
+        Returns:
+            True if the pool exists
+        """
+        if self.engine is None:
+            with self._lock:
+                pool = self._pools.get(pair)
+                if pool is None:
+                    return False
+                pool['liquidity'] = liquidity
+            self._cache.invalidate('pools')
+            return True
+
+        pool_id = self._pool_id(pair)
+        if pool_id is None:
+            return False
+
+        P = self.OTCPool
+        with self.engine.begin() as conn:
+            conn.execute(update(P).where(P.id == pool_id).values(liquidity=liquidity, updated_at=datetime.utcnow()))
+        self._cache.invalidate('pools')
+        return True
+
+    def release_expired(self) -> int:
+        """
+        Release reservations held past reservation_ttl (e.g. by a worker that died mid-execution)
+
+        Returns:
+            Number of reservations released
+        """
+        if self.engine is None:
+            now = time.monotonic()
+            with self._lock:
+                expired = [rid for rid, (_, _, expires_at) in self._reservations.items() if expires_at <= now]
+        else:
+            R = self.LiquidityReservation
+            with self.engine.connect() as conn:
+                expired = conn.execute(
+                    select(R.id).where(R.status == 'held', R.expires_at <= datetime.utcnow())
+                ).scalars().all()
+
+        released = sum(1 for rid in expired if self._finish(rid, 'released') is not None)
+        if released:
+            with self._lock:
+                self.expired += released
+            self.logger.warning(f"Released {released} expired liquidity reservations")
+        return released
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'memory' if self.engine is None else self.engine.dialect.name,
+            'reservations': self.reservations,
+            'rejections': self.rejections,
+            'commits': self.commits,
+            'releases': self.releases,
+            'expired': self.expired,
+            'cache': self._cache.stats()
+        }
+
+    def _finish(self, reservation_id: str, status: str) -> Optional[float]:
+        """Move a held reservation to committed or released; returns the pool's unreserved liquidity"""
+        if self.engine is None:
+            with self._lock:
+                reservation = self._reservations.pop(reservation_id, None)
+                if reservation is None:
+                    return None
+                pair, amount, _ = reservation
+                pool = self._pools[pair]
+                pool['reserved'] -= amount
+                if status == 'committed':
+                    pool['liquidity'] -= amount
+                remaining = pool['liquidity'] - pool['reserved']
+            self._cache.invalidate('pools')
+            return remaining
+
+        P = self.OTCPool
+        R = self.LiquidityReservation
+        with self.engine.begin() as conn:
+            # Only the caller that flips the status from 'held' touches the pool
+            claimed = conn.execute(
+                update(R).where(R.id == reservation_id, R.status == 'held')
+                .values(status=status).returning(R.pool_id, R.amount)
+            ).first()
+            if claimed is None:
+                return None
+
+            pool_id, amount = claimed
+            values = {'reserved': P.reserved - amount, 'updated_at': datetime.utcnow()}
+            if status == 'committed':
+                values['liquidity'] = P.liquidity - amount
+            liquidity, reserved = conn.execute(
+                update(P).where(P.id == pool_id).values(**values).returning(P.liquidity, P.reserved)
+            ).one()
+
+        self._cache.invalidate('pools')
+        return liquidity - reserved
+
+    def _load_pools(self) -> Dict[str, Dict[str, Any]]:
+        if self.engine is None:
+            with self._lock:
+                return {
+                    pair: dict(pool, liquidity=pool['liquidity'] - pool['reserved'])
+                    for pair, pool in self._pools.items()
+                }
+
+        P = self.OTCPool
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(
+                P.id, P.base_token, P.quote_token, P.liquidity, P.reserved, P.spread,
+                P.base_price_offset, P.spread_tiers, P.depth_spread, P.min_trade_size, P.max_trade_size, P.active
+            )).all()
+
+        pools = {}
+        pool_ids = {}
+        for row in rows:
+            pair = f"{row.base_token}/{row.quote_token}"
+            pool_ids[pair] = row.id
+            reserved = row.reserved or 0.0
+            pools[pair] = {
+                'liquidity': row.liquidity - reserved,
+                'reserved': reserved,
+                'spread': row.spread,
+                'base_price_offset': row.base_price_offset or 0.0,
+                'spread_tiers': [tuple(tier) for tier in row.spread_tiers] if row.spread_tiers else None,
+                'depth_spread': row.depth_spread or 0.0,
+                'min_trade': row.min_trade_size,
+                'max_trade': row.max_trade_size,
+                'active': bool(row.active)
+            }
+        self._pool_ids = pool_ids
+        return pools
+
+    def _pool_id(self, pair: str) -> Optional[int]:
+        pool_id = self._pool_ids.get(pair)
+        if pool_id is None:
+            # A pool added by another worker since the last snapshot
+            self._cache.invalidate('pools')
+            self.get_pools()
+            pool_id = self._pool_ids.get(pair)
+        return pool_id
+
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        try:
+            self.release_expired()
+        except Exception as e:
+            self.logger.error(f"Liquidity reservation sweep failed: {e}")
@@ -0,0 +1,196 @@
+import json
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+class LiveFeed:
+    """
+    Server-Sent Events feed of new trades, price ticks and trade statistics
+
+    One background thread per process polls for changes (the latest trade
+    ID and the in-memory price snapshot) and serializes each event once;
+    every connected client receives the same encoded payload. Server work
+    therefore follows the trade and price update rate, not the number of
+    open dashboards.
+    """
+
+    def __init__(self, trade_logger, jupiter_api, interval: float = 1.0, keepalive: float = 15.0,
+                 max_queue: int = 100, max_trades_per_poll: int = 100):
+        """
+        Args:
+            trade_logger: TradeLogger used to detect new trades and compute statistics
+            jupiter_api: JupiterAPI holding the price snapshot
+            interval: Seconds between change checks
+            keepalive: Seconds of silence before a keepalive comment is sent
+            max_queue: Events buffered per client before a slow client is dropped
+            max_trades_per_poll: Maximum trades read per change check
+        """
+        self.logger = logging.getLogger(__name__)
+        self.trade_logger = trade_logger
+        self.jupiter_api = jupiter_api
+        self.interval = interval
+        self.keepalive = keepalive
+        self.max_queue = max_queue
+        self.max_trades_per_poll = max_trades_per_poll
+
+        self.app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+        # Latest encoded 'prices' and 'stats' events, sent to clients as they connect. Replaced, never
+        # mutated, under _lock, so a stream can iterate the dict it took without holding the lock
+        self._snapshots = {}
+        self._last_trade_id = None
+        self._last_price_update = None
+
+        # Metrics
+        self.events_published = 0
+        self.clients_dropped = 0
+
+    def start(self, app):
+        """Start the change-polling thread (no-op if already running)"""
+        self.app = app
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='live-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        with self._lock:
+            for subscriber in self._subscribers:
+                self._close(subscriber)
+            self._subscribers.clear()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stream(self, missed_trades: Optional[List[Dict[str, Any]]] = None, max_seconds: Optional[float] = None):
+        """
+        Generate the SSE byte stream for one client
+
+        Args:
+            missed_trades: Trades to replay first (after a reconnect with Last-Event-ID)
+            max_seconds: Close the stream after this long so the client reconnects
+                         and the serving worker is freed (None keeps it open)
+
+        Yields:
+            Encoded SSE frames
+        """
+        subscriber, snapshots = self._subscribe()
+        try:
+            yield b'retry: 3000\n\n'
+            if missed_trades:
+                yield self._encode('trades', missed_trades, event_id=missed_trades[-1]['id'])
+            for payload in snapshots.values():
+                yield payload
+
+            deadline = None if max_seconds is None else time.monotonic() + max_seconds
+            while deadline is None or time.monotonic() < deadline:
+                try:
+                    payload = subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+                    continue
+                if payload is None:
+                    return
+                yield payload
+        finally:
+            self._unsubscribe(subscriber)
+
+    def poll_once(self):
+        """Check for new trades and prices and publish whatever changed"""
+        if self._last_trade_id is None:
+            self._last_trade_id = self.trade_logger.get_latest_trade_id()
+
+        trades = self.trade_logger.get_trades_after(self._last_trade_id, limit=self.max_trades_per_poll)
+        if trades:
+            self._last_trade_id = trades[-1]['id']
+            self._publish('trades', trades, event_id=self._last_trade_id)
+
+        if trades or 'stats' not in self._snapshots:
+            self._publish('stats', self.trade_logger.get_trade_statistics(), snapshot=True)
+
+        price_data = self.jupiter_api.get_multiple_token_prices()
+        price_update = price_data.get('cached_at') or price_data.get('last_updated')
+        if 'error' not in price_data and (price_update != self._last_price_update or 'prices' not in self._snapshots):
+            self._last_price_update = price_update
+            self._publish('prices', price_data, snapshot=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = len(self._subscribers)
+        return {
+            'clients': clients,
+            'events_published': self.events_published,
+            'clients_dropped': self.clients_dropped,
+            'last_trade_id': self._last_trade_id,
+            'running': self._thread is not None and self._thread.is_alive()
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                idle = not self._subscribers
+                if idle:
+                    self._snapshots = {}
+            if idle:
+                # Nobody is listening; resync from the database on the next subscriber
+                self._last_trade_id = None
+                continue
+            try:
+                with self.app.app_context():
+                    self.poll_once()
+            except Exception as e:
+                self.logger.error(f"Live feed poll failed: {e}")
+
+    def _publish(self, event: str, data: Any, event_id: Optional[int] = None, snapshot: bool = False):
+        payload = self._encode(event, data, event_id)
+
+        with self._lock:
+            if snapshot:
+                self._snapshots = {**self._snapshots, event: payload}
+            self.events_published += 1
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(payload)
+                except queue.Full:
+                    # A client this far behind reconnects and resyncs instead
+                    self._subscribers.discard(subscriber)
+                    self._close(subscriber)
+                    self.clients_dropped += 1
+
+    def _subscribe(self) -> Tuple[queue.Queue, Dict[str, bytes]]:
+        """Register a client queue along with the snapshots published before it, so none is missed or sent twice"""
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            return subscriber, self._snapshots
+
+    def _unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def _close(subscriber: queue.Queue):
+        """Queue the end-of-stream marker, making room for it if the queue is full"""
+        try:
+            subscriber.put_nowait(None)
+        except queue.Full:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            subscriber.put_nowait(None)
+
+    @staticmethod
+    def _encode(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+        frame = f"event: {event}\n"
+        if event_id is not None:
+            frame += f"id: {event_id}\n"
+        frame += f"data: {json.dumps(data, default=str)}\n\n"
+        return frame.encode()
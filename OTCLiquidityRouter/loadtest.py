@@ -0,0 +1,156 @@
+"""
+Closed-loop HTTP load test for comparing serving modes
+
+Each of N concurrent clients holds one keep-alive connection and sends
+its next request as soon as the previous response arrives. Run it
+against the sync and async servers at the same concurrency levels:
+
+    gunicorn -w 4 --threads 8 -b 127.0.0.1:5000 main:app
+    uvicorn asgi:application --workers 4 --port 8000
+
+    python loadtest.py http://127.0.0.1:5000/api/quote?amount=600 -c 50 200 1000
+    python loadtest.py http://127.0.0.1:8000/api/quote?amount=600 -c 50 200 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bool]:
+    """Read one HTTP/1.1 response and return its status code and whether the connection stays open"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+
+    length = 0
+    chunked = False
+    keep_alive = not status_line.startswith(b'HTTP/1.0')
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+        elif name == 'connection':
+            keep_alive = value.strip().lower() == 'keep-alive'
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+async def _client(host: str, port: int, request: bytes, deadline: float, timeout: float,
+                  latencies: List[float], errors: Dict[str, int]):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout)
+        except Exception as e:
+            key = type(e).__name__
+            errors[key] = errors.get(key, 0) + 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+
+        if status >= 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+        else:
+            latencies.append(time.monotonic() - started)
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+
+    if writer is not None:
+        writer.close()
+
+async def run_level(url: str, concurrency: int, duration: float, timeout: float = 30.0,
+                    headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Drive one concurrency level for a fixed duration
+
+    Args:
+        url: Target URL (plain http)
+        concurrency: Number of concurrent clients
+        duration: Seconds to run
+        timeout: Per-request timeout in seconds
+        headers: Extra request headers
+
+    Returns:
+        Throughput, latency percentiles and error counts for the level
+    """
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    target = parts.path + (f"?{parts.query}" if parts.query else '')
+    extra = ''.join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    request = f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n{extra}\r\n".encode()
+
+    latencies = []
+    errors = {}
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _client(host, port, request, deadline, timeout, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    def percentile(p):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 2)
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('url')
+    parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('-d', '--duration', type=float, default=20.0, help='Seconds per concurrency level')
+    parser.add_argument('-t', '--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('-H', '--header', action='append', default=[], help="Extra header, 'Name: value'")
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    headers = dict(header.split(':', 1) for header in args.header)
+    headers = {name.strip(): value.strip() for name, value in headers.items()}
+
+    results = []
+    for concurrency in args.concurrency:
+        result = asyncio.run(run_level(args.url, concurrency, args.duration, args.timeout, headers))
+        results.append(result)
+        if not args.json:
+            print(f"c={result['concurrency']:<5} {result['throughput_rps']:>9} req/s  "
+                  f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms  "
+                  f"errors={result['errors'] or 0}")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
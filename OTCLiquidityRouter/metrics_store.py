@@ -0,0 +1,363 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func, delete, case, cast, Integer, BigInteger
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Rollup tier resolutions, in seconds
+MINUTE = 60
+HOUR = 3600
+
+# Upper bound on the number of points a single series query may return
+MAX_POINTS = 10000
+
+# Timestamps are stored as naive UTC
+EPOCH = datetime(1970, 1, 1)
+
+def parse_step(value: str) -> int:
+    """
+    Parse a step such as '300', '30s', '5m', '1h' or '1d' into seconds
+
+    Raises:
+        ValueError: If the step is malformed or not positive
+    """
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    value = value.strip().lower()
+    multiplier = units.get(value[-1:], None)
+    seconds = int(value[:-1]) * multiplier if multiplier else int(value)
+    if seconds <= 0:
+        raise ValueError("step must be positive")
+    return seconds
+
+class MetricsStore:
+    """
+    Tiered SystemMetrics storage: raw rows, then 1-minute, then 1-hour rollups
+
+    Each tier covers a disjoint time range. Compaction moves raw rows older
+    than raw_retention into 1-minute buckets and 1-minute buckets older than
+    minute_retention into 1-hour buckets, deleting what it moved in the same
+    transaction; hour buckets older than hour_retention are dropped. Queries
+    read all three tiers and merge them into the requested step.
+    """
+
+    def __init__(self, raw_retention: timedelta = timedelta(hours=24),
+                 minute_retention: timedelta = timedelta(days=14),
+                 hour_retention: timedelta = timedelta(days=365)):
+        self.logger = logging.getLogger(__name__)
+        self.raw_retention = raw_retention
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+
+        self.db = None
+        self.SystemMetrics = None
+        self.MetricRollup = None
+        self.app = None
+
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_compaction = None
+
+    def init_db(self, db, SystemMetrics, MetricRollup, app=None):
+        """Initialize database models"""
+        self.db = db
+        self.SystemMetrics = SystemMetrics
+        self.MetricRollup = MetricRollup
+        self.app = app
+
+    def start(self, interval: float = 300.0):
+        """Run compaction every interval seconds on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='metrics-compactor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                with self.app.app_context():
+                    self.compact()
+            except Exception as e:
+                self.logger.error(f"Metrics compaction failed: {e}")
+
+    def compact(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Move aged data down one tier and drop data past the last tier
+
+        Rows are claimed with DELETE ... RETURNING, so concurrent compactions
+        in other workers never aggregate the same rows twice.
+
+        Args:
+            now: Reference time (defaults to utcnow)
+
+        Returns:
+            Number of raw rows, minute buckets and hour buckets compacted or dropped
+        """
+        now = now or datetime.utcnow()
+        M = self.SystemMetrics
+        R = self.MetricRollup
+
+        raw_rows = self._compact_tier(
+            table=M, name_column=M.metric_name, time_column=M.timestamp,
+            cutoff=self._floor(now - self.raw_retention, MINUTE),
+            returning=(M.metric_name, M.timestamp, M.metric_value),
+            to_bucket=lambda row: (row[0], row[1], 1, row[2], row[2], row[2]),
+            window=timedelta(hours=6), resolution=MINUTE
+        )
+
+        minute_rows = self._compact_tier(
+            table=R, name_column=R.metric_name, time_column=R.bucket_start,
+            cutoff=self._floor(now - self.minute_retention, HOUR),
+            returning=(R.metric_name, R.bucket_start, R.count, R.sum, R.min, R.max),
+            to_bucket=tuple, window=timedelta(days=1), resolution=HOUR,
+            source_filter=R.resolution == MINUTE
+        )
+
+        result = self.db.session.execute(
+            delete(R).where(R.resolution == HOUR, R.bucket_start < now - self.hour_retention)
+        )
+        self.db.session.commit()
+
+        self.last_compaction = {
+            'at': now.isoformat(),
+            'raw_rows': raw_rows,
+            'minute_buckets': minute_rows,
+            'hour_buckets_dropped': result.rowcount
+        }
+        return self.last_compaction
+
+    def _compact_tier(self, table, name_column, time_column, cutoff: datetime, returning, to_bucket,
+                      window: timedelta, resolution: int, source_filter=None) -> int:
+        """
+        Claim source rows one metric and time window at a time and fold them into rollup buckets
+
+        Working per metric name keeps every lookup and DELETE on the
+        (metric name, time) index.
+
+        Args:
+            table: Source model
+            name_column: Source metric name column
+            time_column: Source timestamp column
+            cutoff: Rows older than this are compacted
+            returning: Columns returned from the claiming DELETE
+            to_bucket: Maps a returned row to (name, time, count, sum, min, max)
+            window: Source time span handled per transaction
+            resolution: Target bucket width in seconds
+            source_filter: Extra filter selecting the source rows
+
+        Returns:
+            Number of source rows compacted
+        """
+        session = self.db.session
+        base_filter = time_column < cutoff
+        if source_filter is not None:
+            base_filter = base_filter & source_filter
+
+        names = [name for (name,) in session.query(name_column).filter(base_filter).distinct()]
+        compacted = 0
+
+        for name in names:
+            name_filter = base_filter & (name_column == name)
+            while True:
+                oldest = session.query(func.min(time_column)).filter(name_filter).scalar()
+                if oldest is None:
+                    break
+
+                window_end = self._floor(oldest, resolution) + window
+                claimed = session.execute(
+                    delete(table).where(name_filter, time_column < window_end).returning(*returning)
+                ).all()
+
+                buckets = {}
+                for row in claimed:
+                    _, timestamp, count, total, low, high = to_bucket(row)
+                    key = (name, self._floor(timestamp, resolution))
+                    bucket = buckets.get(key)
+                    if bucket is None:
+                        buckets[key] = [count, total, low, high]
+                    else:
+                        bucket[0] += count
+                        bucket[1] += total
+                        bucket[2] = min(bucket[2], low)
+                        bucket[3] = max(bucket[3], high)
+
+                self._merge_buckets(resolution, buckets)
+                session.commit()
+                compacted += len(claimed)
+
+        return compacted
+
+    def _merge_buckets(self, resolution: int, buckets: Dict[Tuple[str, datetime], List[float]]):
+        """
+        Merge buckets into the rollup table inside the current transaction
+
+        SQLite and PostgreSQL use INSERT ... ON CONFLICT DO UPDATE; other
+        databases fall back to locked read-modify-write.
+        """
+        if not buckets:
+            return
+
+        R = self.MetricRollup
+        session = self.db.session
+        rows = [
+            {'metric_name': name, 'resolution': resolution, 'bucket_start': bucket_start,
+             'count': count, 'sum': total, 'min': low, 'max': high}
+            for (name, bucket_start), (count, total, low, high) in buckets.items()
+        ]
+
+        dialect = self.db.engine.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            table = R.__table__
+            stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(table)
+            excluded = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['metric_name', 'resolution', 'bucket_start'],
+                set_={
+                    'count': table.c.count + excluded['count'],
+                    'sum': table.c.sum + excluded['sum'],
+                    'min': case((excluded['min'] < table.c.min, excluded['min']), else_=table.c.min),
+                    'max': case((excluded['max'] > table.c.max, excluded['max']), else_=table.c.max)
+                }
+            )
+            session.connection().execute(stmt, rows)
+            return
+
+        for row in rows:
+            existing = session.query(R).filter_by(
+                metric_name=row['metric_name'], resolution=resolution, bucket_start=row['bucket_start']
+            ).with_for_update().first()
+            if existing is None:
+                session.add(R(**row))
+                session.flush()
+            else:
+                existing.count += row['count']
+                existing.sum += row['sum']
+                existing.min = min(existing.min, row['min'])
+                existing.max = max(existing.max, row['max'])
+
+    def query(self, name: str, start: datetime, end: datetime, step: int) -> List[Dict[str, Any]]:
+        """
+        Get a downsampled series for one metric
+
+        Each tier is aggregated into step-wide buckets in SQL, so at most one
+        row per bucket per tier reaches Python. Rollup buckets are placed by
+        their start time, so steps finer than a tier's resolution show that
+        tier's resolution.
+
+        Args:
+            name: Metric name
+            start: Series start (inclusive)
+            end: Series end (exclusive)
+            step: Bucket width in seconds
+
+        Returns:
+            Points with bucket start time, min, max, avg and count, oldest first
+        """
+        if step <= 0 or end <= start:
+            raise ValueError("step must be positive and 'to' must be after 'from'")
+        if (end - start).total_seconds() / step > MAX_POINTS:
+            raise ValueError(f"Requested series exceeds {MAX_POINTS} points; use a larger step")
+
+        points = {}
+        for tier in self.series_queries(name, start, end, step):
+            index = tier.column_descriptions[0]['expr']
+            for bucket, count, total, low, high in tier.group_by(index).all():
+                if not count:
+                    continue
+                point = points.get(bucket)
+                if point is None:
+                    points[bucket] = [count, total, low, high]
+                else:
+                    point[0] += count
+                    point[1] += total
+                    point[2] = min(point[2], low)
+                    point[3] = max(point[3], high)
+
+        return [
+            {
+                'timestamp': (start + timedelta(seconds=bucket * step)).isoformat(),
+                'min': low,
+                'max': high,
+                'avg': total / count,
+                'count': count
+            }
+            for bucket, (count, total, low, high) in sorted(points.items())
+        ]
+
+    def series_queries(self, name: str, start: datetime, end: datetime, step: int) -> List[Any]:
+        """
+        The per-tier queries behind query: raw samples, then minute and hour rollups
+
+        Each selects (bucket index, count, sum, min, max); migrations.hot_queries
+        EXPLAINs the raw tier.
+        """
+        M = self.SystemMetrics
+        R = self.MetricRollup
+        session = self.db.session
+
+        tiers = [
+            session.query(
+                self._bucket_index(M.timestamp, start, step),
+                func.count(M.id), func.sum(M.metric_value), func.min(M.metric_value), func.max(M.metric_value)
+            ).filter(M.metric_name == name, M.timestamp >= start, M.timestamp < end)
+        ]
+        for resolution in (MINUTE, HOUR):
+            tiers.append(session.query(
+                self._bucket_index(R.bucket_start, start, step),
+                func.sum(R.count), func.sum(R.sum), func.min(R.min), func.max(R.max)
+            ).filter(R.metric_name == name, R.resolution == resolution,
+                     R.bucket_start >= start, R.bucket_start < end))
+        return tiers
+    def get_stats(self) -> Dict[str, Any]:
+        """Row counts per tier and the last compaction result"""
+        R = self.MetricRollup
+        session = self.db.session
+        tier_counts = dict(session.query(R.resolution, func.count(R.id)).group_by(R.resolution).all())
+        return {
+            'raw_rows': session.query(func.count(self.SystemMetrics.id)).scalar(),
+            'minute_buckets': tier_counts.get(MINUTE, 0),
+            'hour_buckets': tier_counts.get(HOUR, 0),
+            'retention': {
+                'raw_hours': self.raw_retention.total_seconds() / 3600,
+                'minute_days': self.minute_retention.total_seconds() / 86400,
+                'hour_days': self.hour_retention.total_seconds() / 86400
+            },
+            'last_compaction': self.last_compaction
+        }
+
+    def _bucket_index(self, column, start: datetime, step: int):
+        """
+        Integer step index of a timestamp column relative to start, computed in SQL
+
+        The arithmetic is done in integer microseconds so a timestamp exactly
+        on a bucket boundary always lands in the bucket it starts; integer
+        division truncates, which is floor here because rows are filtered
+        to >= start.
+        """
+        return (self._epoch_us(column) - self._to_us(start)) // (step * 1000000)
+
+    def _epoch_us(self, column):
+        """Exact microseconds since the Unix epoch for a naive UTC timestamp column"""
+        if self.db.engine.dialect.name == 'sqlite':
+            # Whole seconds plus the stored microsecond digits ('YYYY-MM-DD HH:MM:SS.ffffff');
+            # julianday() is a float and puts boundary timestamps in the previous bucket
+            return cast(func.strftime('%s', column), Integer) * 1000000 + cast(func.substr(column, 21, 6), Integer)
+        return cast(func.extract('epoch', column) * 1000000, BigInteger)
+
+    @staticmethod
+    def _to_us(timestamp: datetime) -> int:
+        delta = timestamp - EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+    @staticmethod
+    def _floor(timestamp: datetime, resolution: int) -> datetime:
+        delta = timestamp - EPOCH
+        seconds = delta.days * 86400 + delta.seconds
+        return EPOCH + timedelta(seconds=seconds - seconds % resolution)
@@ -0,0 +1,215 @@
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+from sqlalchemy import inspect, literal, text
+
+logger = logging.getLogger(__name__)
+
+# Indexes once declared on the models that no query path uses; they only slowed down inserts
+DROPPED_INDEXES = ('ix_trade_pair', 'ix_trade_input_amount', 'ix_trade_execution_time')
+
+def ensure_indexes(db) -> List[str]:
+    """
+    Create any model-declared indexes missing from an existing database
+
+    db.create_all() only creates indexes together with new tables, so
+    databases created before an index was added to the models need this.
+
+    Args:
+        db: Flask-SQLAlchemy instance
+
+    Returns:
+        Names of the indexes that were created
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            logger.info(f"Creating index {index.name} on {table.name}")
+            try:
+                index.create(bind=engine, checkfirst=True)
+                created.append(index.name)
+            except Exception as e:
+                # Another worker starting at the same time may have created it first
+                logger.warning(f"Could not create index {index.name}: {e}")
+
+    return created
+
+def drop_indexes(db, names=DROPPED_INDEXES) -> List[str]:
+    """
+    Drop indexes that are no longer declared on the models
+
+    Args:
+        db: Flask-SQLAlchemy instance
+        names: Index names to drop where they exist
+
+    Returns:
+        Names of the indexes that were dropped
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing = {index['name'] for table in inspector.get_table_names() for index in inspector.get_indexes(table)}
+    dropped = []
+
+    for name in names:
+        if name not in existing:
+            continue
+        logger.info(f"Dropping unused index {name}")
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            dropped.append(name)
+        except Exception as e:
+            logger.warning(f"Could not drop index {name}: {e}")
+
+    return dropped
+
+def ensure_columns(db) -> List[str]:
+    """
+    Add model columns missing from existing tables
+
+    db.create_all() never alters a table that already exists. Columns are
+    added as nullable with their scalar default, which is enough for the
+    additive changes the models make.
+
+    Args:
+        db: Flask-SQLAlchemy instance
+
+    Returns:
+        Names of the columns that were added, as 'table.column'
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+            if column.default is not None and column.default.is_scalar:
+                default = literal(column.default.arg).compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+                ddl += f" DEFAULT {default}"
+            logger.info(f"Adding column {table.name}.{column.name}")
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+            except Exception as e:
+                # Another worker starting at the same time may have added it first
+                logger.warning(f"Could not add column {table.name}.{column.name}: {e}")
+
+    return added
+
+def hot_queries(trade_logger, metrics_store) -> List[Dict[str, Any]]:
+    """
+    The latency-sensitive queries and the index each one is expected to use
+
+    Statements come from the same TradeLogger and MetricsStore builders the
+    endpoints run, so a change to a real query is what gets checked.
+    """
+    now = datetime.utcnow()
+    day_ago = now - timedelta(days=1)
+
+    return [
+        {
+            'name': 'recent_trades',
+            'index': 'ix_trade_created_at_id',
+            'statement': trade_logger.recent_trades_statement(20)
+        },
+        {
+            'name': 'trades_page',
+            'index': 'ix_trade_created_at_id',
+            'statement': trade_logger.trades_page_statement(20, trade_logger.encode_cursor(now, 1))
+        },
+        {
+            'name': 'trades_range',
+            'index': 'ix_trade_created_at_id',
+            'statement': trade_logger.trades_range_statement(day_ago, now)
+        },
+        {
+            'name': 'hourly_volume',
+            'index': 'ix_trade_created_at_id',
+            'statement': trade_logger.hourly_volume_statement(now - timedelta(days=14))
+        },
+        {
+            'name': 'daily_savings',
+            'index': 'ix_trade_created_at_id',
+            'statement': trade_logger.daily_savings_statement(now - timedelta(days=30))
+        },
+        {
+            'name': 'route_counts',
+            'index': 'ix_trade_route_created_at',
+            'statement': trade_logger.route_counts_statement()
+        },
+        {
+            'name': 'metric_series',
+            'index': 'ix_system_metrics_name_timestamp',
+            'statement': metrics_store.series_queries('slippage', day_ago, now, 60)[0].statement
+        }
+    ]
+
+def explain(db, statement) -> str:
+    """
+    Get the query plan for a statement
+
+    Args:
+        db: Flask-SQLAlchemy instance
+        statement: SQLAlchemy Core statement (values must render as literals)
+
+    Returns:
+        Plan text, one line per plan node
+    """
+    engine = db.engine
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            return '\n'.join(str(row[-1]) for row in rows)
+
+        if engine.dialect.name == 'postgresql':
+            # Tiny tables would otherwise always plan as sequential scans
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            rows = conn.exec_driver_sql(f"EXPLAIN {sql}").fetchall()
+            return '\n'.join(str(row[0]) for row in rows)
+
+        rows = conn.exec_driver_sql(f"EXPLAIN {sql}").fetchall()
+        return '\n'.join(' '.join(str(col) for col in row) for row in rows)
+
+def check_hot_query_plans(db, trade_logger, metrics_store) -> List[Dict[str, Any]]:
+    """
+    EXPLAIN each hot query and check that it uses its expected index
+
+    Args:
+        db: Flask-SQLAlchemy instance
+        trade_logger: TradeLogger whose query builders are checked
+        metrics_store: MetricsStore whose series query is checked
+
+    Returns:
+        One result per query with its plan and a uses_index flag
+    """
+    results = []
+    for query in hot_queries(trade_logger, metrics_store):
+        plan = explain(db, query['statement'])
+        results.append({
+            'name': query['name'],
+            'index': query['index'],
+            'uses_index': query['index'] in plan,
+            'plan': plan
+        })
+    return results
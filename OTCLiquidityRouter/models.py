@@ -17,6 +17,11 @@ class Trade(db.Model):
     execution_time = db.Column(db.DateTime, default=datetime.utcnow)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_trade_created_at_id', 'created_at', 'id'),  # recent trades, date ranges, keyset paging
+        db.Index('ix_trade_route_created_at', 'route', 'created_at'),  # route counts without rollups (covering)
+    )
+    
     def to_dict(self):
         """Convert trade to dictionary for JSON serialization"""
         return {
@@ -40,12 +45,108 @@ class OTCPool(db.Model):
     base_token = db.Column(db.String(20), nullable=False)
     quote_token = db.Column(db.String(20), nullable=False)
     liquidity = db.Column(db.Float, nullable=False)  # Available liquidity
+    reserved = db.Column(db.Float, nullable=False, default=0.0)  # Held by in-flight executions
     spread = db.Column(db.Float, default=0.5)  # Spread percentage
+    base_price_offset = db.Column(db.Float, default=0.0)  # Percentage offset from market price
+    spread_tiers = db.Column(db.JSON(none_as_null=True))  # [[size from, spread %], ...]; [] for a flat spread
+    depth_spread = db.Column(db.Float, default=0.0)  # Extra spread % for taking all remaining liquidity
     min_trade_size = db.Column(db.Float, default=100.0)
     max_trade_size = db.Column(db.Float, default=10000.0)
     active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_otc_pool_pair', 'base_token', 'quote_token', unique=True),
+    )
+
+class LiquidityReservation(db.Model):
+    """Liquidity held against an OTC pool between quote acceptance and settlement"""
+    id = db.Column(db.String(32), primary_key=True)
+    pool_id = db.Column(db.Integer, db.ForeignKey('otc_pool.id'), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='held')  # 'held', 'committed' or 'released'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_liquidity_reservation_status_expires', 'status', 'expires_at'),  # expiry sweep
+    )
+
+class ParentOrder(db.Model):
+    """Large order executed over time as a schedule of child orders (TWAP or VWAP)"""
+    id = db.Column(db.String(32), primary_key=True)
+    input_token = db.Column(db.String(20), nullable=False)
+    output_token = db.Column(db.String(20), nullable=False)
+    total_amount = db.Column(db.Float, nullable=False)
+    filled_amount = db.Column(db.Float, nullable=False, default=0.0)
+    output_amount = db.Column(db.Float, nullable=False, default=0.0)
+    strategy = db.Column(db.String(10), nullable=False, default='twap')  # 'twap' or 'vwap'
+    slice_count = db.Column(db.Integer, nullable=False)
+    interval_seconds = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='running')  # 'running', 'completed', 'partial', 'failed' or 'cancelled'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_parent_order_status_created_at', 'status', 'created_at'),
+    )
+
+class ChildOrder(db.Model):
+    """One scheduled slice of a ParentOrder, routed and executed on its own"""
+    id = db.Column(db.Integer, primary_key=True)
+    parent_id = db.Column(db.String(32), db.ForeignKey('parent_order.id'), nullable=False)
+    sequence = db.Column(db.Integer, nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    scheduled_at = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # 'pending', 'executing', 'filled', 'failed' or 'cancelled'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    route = db.Column(db.String(10))  # Venue chosen when the slice ran
+    output_amount = db.Column(db.Float)
+    price = db.Column(db.Float)
+    trade_id = db.Column(db.Integer, db.ForeignKey('trade.id'))
+    started_at = db.Column(db.DateTime)
+    executed_at = db.Column(db.DateTime)
+    error = db.Column(db.String(200))
+    
+    __table_args__ = (
+        db.Index('ix_child_order_status_scheduled_at', 'status', 'scheduled_at'),  # due-slice polling
+        db.Index('ix_child_order_parent_sequence', 'parent_id', 'sequence'),
+    )
+
+class TradeRollup(db.Model):
+    """Pre-aggregated trade totals per dimension bucket, maintained at insert time"""
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(db.String(10), nullable=False)  # 'route', 'pair', 'size', 'day' or 'hour'
+    bucket = db.Column(db.String(40), nullable=False)  # e.g. 'OTC', 'SOL/USDC', '500', '2025-01-31', '2025-01-31T14'
+    route = db.Column(db.String(10), nullable=False)
+    trade_count = db.Column(db.Integer, nullable=False, default=0)
+    volume = db.Column(db.Float, nullable=False, default=0.0)
+    output_volume = db.Column(db.Float, nullable=False, default=0.0)
+    cost_savings = db.Column(db.Float, nullable=False, default=0.0)
+    slippage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    jupiter_slippage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    high_slippage_count = db.Column(db.Integer, nullable=False, default=0)  # jupiter_slippage > 1%
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('dimension', 'bucket', 'route', name='uq_trade_rollup_bucket'),
+    )
+
+class MetricRollup(db.Model):
+    """Downsampled SystemMetrics values per metric and time bucket"""
+    id = db.Column(db.Integer, primary_key=True)
+    metric_name = db.Column(db.String(50), nullable=False)
+    resolution = db.Column(db.Integer, nullable=False)  # Bucket width in seconds (60 or 3600)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    sum = db.Column(db.Float, nullable=False, default=0.0)
+    min = db.Column(db.Float, nullable=False)
+    max = db.Column(db.Float, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('metric_name', 'resolution', 'bucket_start', name='uq_metric_rollup_bucket'),
+    )
 
 class SystemMetrics(db.Model):
     """Model for storing system performance metrics"""
@@ -54,6 +155,10 @@ class SystemMetrics(db.Model):
     metric_value = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_system_metrics_name_timestamp', 'metric_name', 'timestamp'),
+    )
+    
     @classmethod
     def record_metric(cls, name, value):
         """Record a system metric"""
@@ -0,0 +1,515 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, List, Optional
+
+from sqlalchemy import select, update, insert, func, and_
+
+STRATEGIES = ('twap', 'vwap')
+OPEN_CHILD_STATUSES = ('pending', 'executing')
+
+class SliceSettled(Exception):
+    """
+    A slice executed but a later step (e.g. logging its trade) failed
+
+    Raised by execute_slice_fn instead of a plain error once the venue has
+    filled the slice, so the child is recorded as filled and never retried.
+    """
+
+    def __init__(self, fill: Dict[str, Any], error: str):
+        super().__init__(error)
+        self.fill = fill
+
+def slice_weights(strategy: str, scheduled_at: List[datetime], volume_profile: Optional[List[float]] = None,
+                  floor: float = 0.1) -> List[float]:
+    """
+    Fraction of the parent order given to each child
+
+    TWAP splits evenly. VWAP follows the share of historical volume in the
+    hour of day each child runs, with every child kept at no less than
+    floor times the even share so quiet hours still make progress.
+
+    Args:
+        strategy: 'twap' or 'vwap'
+        scheduled_at: Child start times
+        volume_profile: 24 hourly volume fractions (VWAP only; even split if empty)
+        floor: Minimum weight relative to the even share
+
+    Returns:
+        Weights summing to 1
+    """
+    count = len(scheduled_at)
+    if strategy != 'vwap' or not volume_profile:
+        return [1.0 / count] * count
+
+    even = 1.0 / 24
+    raw = [max(volume_profile[when.hour], floor * even) for when in scheduled_at]
+    total = sum(raw)
+    return [weight / total for weight in raw]
+
+class OrderScheduler:
+    """
+    Executes large parent orders as child orders spread over time
+
+    Parent and child orders live in the database, so progress survives
+    restarts and every worker process can run a scheduler: a poll thread
+    claims due children with a conditional UPDATE (pending -> executing),
+    so each child is executed exactly once, and hands them to a small
+    thread pool. At most one child per parent runs at a time, which keeps
+    a schedule that fell behind from firing its backlog all at once.
+
+    Each child is routed from fresh quotes when it runs; execute_slice_fn
+    does the routing, execution and trade logging and returns the fill. It
+    raises SliceSettled for failures after the venue filled the slice, which
+    are recorded on the child for reconciliation rather than retried.
+    """
+
+    def __init__(self, execute_slice_fn: Callable[[str, str, float], Dict[str, Any]], max_workers: int = 4,
+                 poll_interval: float = 1.0, max_attempts: int = 3, retry_delay: float = 30.0,
+                 stale_after: float = 300.0):
+        """
+        Args:
+            execute_slice_fn: fn(input_token, output_token, amount) -> {'route', 'output_amount',
+                              'price', 'trade_id'}; raises if the slice could not be filled, or
+                              SliceSettled if it filled but a later step failed
+            max_workers: Child orders executed concurrently by this process
+            poll_interval: Seconds between checks for due child orders
+            max_attempts: Executions tried per child before it is marked failed
+            retry_delay: Seconds before a failed child is tried again
+            stale_after: Seconds after which a child still executing is presumed lost with its worker
+        """
+        self.logger = logging.getLogger(__name__)
+        self.execute_slice_fn = execute_slice_fn
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.stale_after = stale_after
+
+        self.engine = None
+        self.ParentOrder = None
+        self.ChildOrder = None
+        self.app = None
+        self.volume_profile_fn = None
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='order-slice')
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._running = set()  # parent IDs with a child executing in this process
+
+        # Metrics
+        self.slices_filled = 0
+        self.slices_failed = 0
+        self.slices_retried = 0
+        self.late_fills = 0
+        self.unreconciled_fills = 0
+        self.last_poll_at = None
+
+    def init_db(self, db, ParentOrder, ChildOrder, app=None, volume_profile_fn: Optional[Callable[[], List[float]]] = None):
+        """
+        Initialize database models
+
+        Args:
+            volume_profile_fn: Returns 24 hourly volume fractions for VWAP schedules
+        """
+        self.engine = db.engine
+        self.ParentOrder = ParentOrder
+        self.ChildOrder = ChildOrder
+        self.app = app
+        self.volume_profile_fn = volume_profile_fn
+
+    def start(self):
+        """Start the poll thread (no-op if already running)"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='order-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop polling and wait for executing children"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=True)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, input_token: str, output_token: str, amount: float, slices: int,
+               interval_seconds: float, strategy: str = 'twap', start_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Schedule a parent order
+
+        Args:
+            input_token: Input token symbol
+            output_token: Output token symbol
+            amount: Total input amount
+            slices: Number of child orders
+            interval_seconds: Seconds between child orders
+            strategy: 'twap' (even slices) or 'vwap' (slices weighted by hourly volume)
+            start_at: When the first child runs (naive times are UTC; defaults to now)
+
+        Returns:
+            Progress of the new parent order
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+        if amount <= 0 or slices < 1 or interval_seconds < 0:
+            raise ValueError('amount and slices must be positive and interval_seconds non-negative')
+
+        now = datetime.utcnow()
+        if start_at is not None and start_at.tzinfo is not None:
+            start_at = start_at.astimezone(timezone.utc).replace(tzinfo=None)
+        start_at = start_at or now
+        scheduled_at = [start_at + timedelta(seconds=interval_seconds * i) for i in range(slices)]
+
+        profile = self.volume_profile_fn() if strategy == 'vwap' and self.volume_profile_fn else None
+        weights = slice_weights(strategy, scheduled_at, profile)
+        amounts = [amount * weight for weight in weights]
+        amounts[-1] = amount - sum(amounts[:-1])  # the slices add up to the parent exactly
+
+        parent_id = uuid.uuid4().hex
+        P = self.ParentOrder
+        C = self.ChildOrder
+        with self.engine.begin() as conn:
+            conn.execute(insert(P).values(
+                id=parent_id, input_token=input_token, output_token=output_token, total_amount=amount,
+                filled_amount=0.0, output_amount=0.0, strategy=strategy, slice_count=slices,
+                interval_seconds=interval_seconds, status='running', created_at=now
+            ))
+            conn.execute(insert(C), [
+                {'parent_id': parent_id, 'sequence': i, 'amount': child_amount, 'scheduled_at': when,
+                 'status': 'pending', 'attempts': 0}
+                for i, (child_amount, when) in enumerate(zip(amounts, scheduled_at))
+            ])
+
+        self.logger.info(f"Scheduled {strategy} order {parent_id}: {amount} {input_token} in {slices} slices")
+        self._wake.set()
+        return self.get_progress(parent_id)
+
+    def cancel(self, parent_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a running parent order's pending children (an executing child still completes)
+
+        Returns:
+            Progress after cancelling, or None if the order is unknown
+        """
+        P = self.ParentOrder
+        C = self.ChildOrder
+        with self.engine.begin() as conn:
+            cancelled = conn.execute(
+                update(P).where(P.id == parent_id, P.status == 'running')
+                .values(status='cancelled', completed_at=datetime.utcnow())
+            ).rowcount
+            if cancelled:
+                conn.execute(update(C).where(C.parent_id == parent_id, C.status == 'pending').values(status='cancelled'))
+        return self.get_progress(parent_id)
+
+    def get_progress(self, parent_id: str, include_children: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a parent order's fill progress
+
+        Args:
+            parent_id: ID returned by submit
+            include_children: Include every child order
+
+        Returns:
+            Parent totals, child counts by status and the next scheduled slice,
+            or None if the order is unknown
+        """
+        P = self.ParentOrder
+        C = self.ChildOrder
+        with self.engine.connect() as conn:
+            parent = conn.execute(select(P).where(P.id == parent_id)).first()
+            if parent is None:
+                return None
+            children = conn.execute(select(C).where(C.parent_id == parent_id).order_by(C.sequence)).all()
+
+        counts = {status: 0 for status in ('pending', 'executing', 'filled', 'failed', 'cancelled')}
+        routes = {}
+        for child in children:
+            counts[child.status] = counts.get(child.status, 0) + 1
+            if child.status == 'filled':
+                routes[child.route] = routes.get(child.route, 0.0) + child.amount
+        next_child = next((child for child in children if child.status == 'pending'), None)
+
+        progress = self._parent_to_dict(parent)
+        progress.update({
+            'children_by_status': counts,
+            'filled_by_route': routes,
+            'next_scheduled_at': next_child.scheduled_at.isoformat() if next_child else None
+        })
+        if include_children:
+            progress['children'] = [self._child_to_dict(child) for child in children]
+        return progress
+
+    def list_orders(self, limit: int = 20, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Most recent parent orders, optionally with one status"""
+        P = self.ParentOrder
+        query = select(P).order_by(P.created_at.desc()).limit(limit)
+        if status:
+            query = query.where(P.status == status)
+        with self.engine.connect() as conn:
+            return [self._parent_to_dict(parent) for parent in conn.execute(query).all()]
+
+    def poll_once(self) -> int:
+        """
+        Claim due children and hand them to the worker pool
+
+        Returns:
+            Number of children started
+        """
+        self.last_poll_at = datetime.utcnow()
+        self._fail_stale()
+        self._finalize_parents()
+
+        with self._lock:
+            free = self.max_workers - len(self._running)
+            busy = set(self._running)
+        if free <= 0:
+            return 0
+
+        P = self.ParentOrder
+        C = self.ChildOrder
+        now = datetime.utcnow()
+        with self.engine.connect() as conn:
+            due = conn.execute(
+                select(C.id, C.parent_id, C.amount, C.attempts, P.input_token, P.output_token)
+                .join(P, P.id == C.parent_id)
+                .where(C.status == 'pending', C.scheduled_at <= now, P.status == 'running')
+                .order_by(C.scheduled_at)
+                .limit(free * 4)
+            ).all()
+            if not due:
+                return 0
+            # Parents with a child executing in another process wait for it too
+            busy.update(conn.execute(
+                select(C.parent_id).where(C.status == 'executing',
+                                          C.parent_id.in_({row.parent_id for row in due}))
+            ).scalars())
+
+        started = 0
+        for row in due:
+            if started >= free:
+                break
+            if row.parent_id in busy:
+                continue
+            busy.add(row.parent_id)
+
+            with self.engine.begin() as conn:
+                claimed = conn.execute(
+                    update(C).where(C.id == row.id, C.status == 'pending')
+                    .values(status='executing', attempts=C.attempts + 1, started_at=datetime.utcnow())
+                ).rowcount
+            if claimed != 1:
+                continue  # another worker took it
+
+            with self._lock:
+                self._running.add(row.parent_id)
+            self._pool.submit(self._execute, row)
+            started += 1
+
+        return started
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            'running': self.is_running(),
+            'workers': self.max_workers,
+            'executing': len(self._running),
+            'slices_filled': self.slices_filled,
+            'slices_failed': self.slices_failed,
+            'slices_retried': self.slices_retried,
+            'late_fills': self.late_fills,
+            'unreconciled_fills': self.unreconciled_fills,
+            'last_poll_at': self.last_poll_at.isoformat() if self.last_poll_at else None
+        }
+        if self.engine is not None:
+            P = self.ParentOrder
+            with self.engine.connect() as conn:
+                stats['parent_orders'] = dict(conn.execute(select(P.status, func.count()).group_by(P.status)).all())
+        return stats
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.logger.error(f"Order scheduler poll failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _execute(self, row):
+        """Route and execute one claimed child, then record the outcome"""
+        try:
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        fill = self.execute_slice_fn(row.input_token, row.output_token, row.amount)
+                else:
+                    fill = self.execute_slice_fn(row.input_token, row.output_token, row.amount)
+                error = None
+            except SliceSettled as e:
+                self.logger.error(f"Child order {row.id} of {row.parent_id} filled but {e}; recorded for reconciliation")
+                fill, error = e.fill, str(e)
+            except Exception as e:
+                self.logger.warning(f"Child order {row.id} of {row.parent_id} failed (attempt {row.attempts + 1}): {e}")
+                try:
+                    self._record_failure(row, str(e))
+                except Exception as record_error:
+                    self.logger.error(f"Could not record failure of child order {row.id}: {record_error}")
+                return
+
+            # The slice has filled: from here on nothing re-queues it
+            try:
+                self._record_fill(row, fill, error)
+            except Exception as record_error:
+                self.logger.error(f"Could not record fill of child order {row.id} ({fill}): {record_error}; "
+                                  f"it stays executing until the stale sweep closes it")
+        finally:
+            with self._lock:
+                self._running.discard(row.parent_id)
+            self._wake.set()
+
+    def _record_fill(self, row, fill: Dict[str, Any], error: Optional[str] = None):
+        P = self.ParentOrder
+        C = self.ChildOrder
+        fill_values = dict(route=fill['route'], output_amount=fill['output_amount'], price=fill['price'],
+                           trade_id=fill.get('trade_id'), executed_at=datetime.utcnow())
+        with self.engine.begin() as conn:
+            # Conditional on 'executing': a child already closed as abandoned must not fill twice
+            filled = conn.execute(
+                update(C).where(C.id == row.id, C.status == 'executing')
+                .values(status='filled', error=error[:200] if error else None, **fill_values)
+            ).rowcount
+            if filled:
+                # Increment in SQL so fills finishing in other processes are never lost. A parent
+                # cancelled meanwhile still counts it: cancel lets executing children complete
+                conn.execute(update(P).where(P.id == row.parent_id).values(
+                    filled_amount=P.filled_amount + row.amount,
+                    output_amount=P.output_amount + fill['output_amount']
+                ))
+            else:
+                # Keep the trade on the child for reconciliation, but leave the closed parent's totals alone
+                conn.execute(update(C).where(C.id == row.id).values(
+                    error='Filled after the child was closed; not counted in the parent order', **fill_values
+                ))
+
+        if not filled:
+            self.logger.warning(f"Late fill of child order {row.id} of {row.parent_id} "
+                                f"(trade {fill.get('trade_id')}, {fill['output_amount']} out) was not counted")
+            with self._lock:
+                self.late_fills += 1
+            return
+
+        with self._lock:
+            self.slices_filled += 1
+            if error:
+                self.unreconciled_fills += 1
+        self._finalize_parents(row.parent_id)
+
+    def _record_failure(self, row, error: str):
+        P = self.ParentOrder
+        C = self.ChildOrder
+        now = datetime.utcnow()
+        retry = row.attempts + 1 < self.max_attempts
+        executing = and_(C.id == row.id, C.status == 'executing')
+
+        with self.engine.begin() as conn:
+            requeued = 0
+            if retry:
+                # Only a still-running parent gets its child back; a cancel in the meantime wins
+                parent_running = select(P.id).where(P.id == row.parent_id, P.status == 'running').exists()
+                requeued = conn.execute(update(C).where(executing, parent_running).values(
+                    status='pending', scheduled_at=now + timedelta(seconds=self.retry_delay), error=error[:200]
+                )).rowcount
+            if not requeued:
+                parent_status = conn.execute(select(P.status).where(P.id == row.parent_id)).scalar()
+                status = 'cancelled' if parent_status == 'cancelled' else 'failed'
+                conn.execute(update(C).where(executing).values(status=status, executed_at=now, error=error[:200]))
+
+        with self._lock:
+            if requeued:
+                self.slices_retried += 1
+            else:
+                self.slices_failed += 1
+        if not requeued:
+            self._finalize_parents(row.parent_id)
+
+    def _fail_stale(self):
+        """Fail children whose worker died mid-execution; they are not retried since they may have filled"""
+        C = self.ChildOrder
+        cutoff = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        with self.engine.begin() as conn:
+            stale = conn.execute(
+                update(C).where(C.status == 'executing', C.started_at < cutoff)
+                .values(status='failed', executed_at=datetime.utcnow(), error='Execution abandoned by its worker')
+            ).rowcount
+        if stale:
+            self.logger.warning(f"Marked {stale} abandoned child orders failed")
+
+    def _finalize_parents(self, parent_id: Optional[str] = None):
+        """Close running parents with no open children: completed, partial or failed by what filled"""
+        P = self.ParentOrder
+        C = self.ChildOrder
+        has_open = select(C.id).where(C.parent_id == P.id, C.status.in_(OPEN_CHILD_STATUSES)).exists()
+        conditions = [P.status == 'running', ~has_open]
+        if parent_id is not None:
+            conditions.append(P.id == parent_id)
+
+        with self.engine.begin() as conn:
+            finished = conn.execute(
+                select(P.id, P.total_amount, P.filled_amount).where(and_(*conditions))
+            ).all()
+            for parent in finished:
+                if parent.filled_amount >= parent.total_amount * (1 - 1e-9):
+                    status = 'completed'
+                elif parent.filled_amount > 0:
+                    status = 'partial'
+                else:
+                    status = 'failed'
+                # Conditional on 'running' so a concurrent cancel or finalize wins cleanly
+                conn.execute(update(P).where(P.id == parent.id, P.status == 'running')
+                             .values(status=status, completed_at=datetime.utcnow()))
+                self.logger.info(f"Parent order {parent.id} {status}")
+
+    @staticmethod
+    def _parent_to_dict(parent) -> Dict[str, Any]:
+        return {
+            'id': parent.id,
+            'input_token': parent.input_token,
+            'output_token': parent.output_token,
+            'strategy': parent.strategy,
+            'status': parent.status,
+            'total_amount': parent.total_amount,
+            'filled_amount': parent.filled_amount,
+            'remaining_amount': max(0.0, parent.total_amount - parent.filled_amount),
+            'percent_filled': round(parent.filled_amount / parent.total_amount * 100, 2),
+            'output_amount': parent.output_amount,
+            'average_price': parent.output_amount / parent.filled_amount if parent.filled_amount else None,
+            'slice_count': parent.slice_count,
+            'interval_seconds': parent.interval_seconds,
+            'created_at': parent.created_at.isoformat() if parent.created_at else None,
+            'completed_at': parent.completed_at.isoformat() if parent.completed_at else None
+        }
+
+    @staticmethod
+    def _child_to_dict(child) -> Dict[str, Any]:
+        return {
+            'sequence': child.sequence,
+            'amount': child.amount,
+            'scheduled_at': child.scheduled_at.isoformat(),
+            'status': child.status,
+            'attempts': child.attempts,
+            'route': child.route,
+            'output_amount': child.output_amount,
+            'price': child.price,
+            'trade_id': child.trade_id,
+            'executed_at': child.executed_at.isoformat() if child.executed_at else None,
+            'error': child.error
+        }
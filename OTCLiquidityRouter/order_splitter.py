@@ -0,0 +1,234 @@
+import heapq
+import logging
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+def curve_segments(samples: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """
+    Turn sampled (size, total output) points into fill segments
+
+    Marginal output per unit is forced to be non-increasing (a running
+    minimum), so the curve is concave and never promises more than a
+    later sample supports.
+
+    Args:
+        samples: (cumulative size, cumulative output) pairs sorted by size
+
+    Returns:
+        (segment size, output per unit) pairs in fill order
+    """
+    segments = []
+    prev_size, prev_output = 0.0, 0.0
+    ceiling = float('inf')
+    for size, output in samples:
+        span = size - prev_size
+        if span <= 0:
+            continue
+        marginal = min(ceiling, max(0.0, (output - prev_output) / span))
+        segments.append((span, marginal))
+        ceiling = marginal
+        prev_size, prev_output = size, output
+    return segments
+
+def optimize(venues: List[Dict[str, Any]], amount: float) -> Dict[str, float]:
+    """
+    Split amount across venues to maximize total output value
+
+    Each venue is {'name', 'segments': [(size, value per unit)], 'min_size'}
+    with non-increasing values per unit. Taking the best remaining segment
+    across all venues until the amount is filled is optimal for such
+    concave curves. A venue left with less than its min_size is dropped
+    and the split re-solved.
+
+    Args:
+        venues: Venues with concave segment lists
+        amount: Total input to allocate
+
+    Returns:
+        Mapping of venue name to allocated input (venues with nothing omitted)
+    """
+    excluded = set()
+    while True:
+        allocation = _greedy([venue for venue in venues if venue['name'] not in excluded], amount)
+        below_minimum = [
+            venue for venue in venues
+            if venue['name'] in allocation and allocation[venue['name']] < venue.get('min_size', 0.0)
+        ]
+        if not below_minimum:
+            return allocation
+        excluded.add(min(below_minimum, key=lambda venue: allocation[venue['name']])['name'])
+
+def _greedy(venues: List[Dict[str, Any]], amount: float) -> Dict[str, float]:
+    heap = [(-venue['segments'][0][1], i, 0) for i, venue in enumerate(venues) if venue['segments']]
+    heapq.heapify(heap)
+
+    allocation = {}
+    remaining = amount
+    while heap and remaining > 1e-12:
+        _, i, segment = heapq.heappop(heap)
+        venue = venues[i]
+        size = venue['segments'][segment][0]
+        take = size if size < remaining else remaining
+        allocation[venue['name']] = allocation.get(venue['name'], 0.0) + take
+        remaining -= take
+        if segment + 1 < len(venue['segments']):
+            heapq.heappush(heap, (-venue['segments'][segment + 1][1], i, segment + 1))
+    return allocation
+
+def fill_value(segments: Sequence[Tuple[float, float]], amount: float) -> float:
+    """Total value of filling amount along a venue's segments"""
+    value = 0.0
+    for size, per_unit in segments:
+        take = size if size < amount else amount
+        value += take * per_unit
+        amount -= take
+        if amount <= 0:
+            break
+    return value
+
+class OrderSplitter:
+    """Plans child orders across Jupiter and every OTC pool that sells the input token"""
+
+    def __init__(self, jupiter_api, otc_engine, router=None, curve_points: int = 8, output_decimals: int = 6):
+        """
+        Args:
+            jupiter_api: JupiterAPI used for depth curves
+            otc_engine: OTCEngine providing pool price segments and token conversion
+            router: Router whose venue costs discount each venue's output (optional)
+            curve_points: Jupiter sizes probed per plan
+            output_decimals: Decimals of the output token in Jupiter's outAmount
+        """
+        self.logger = logging.getLogger(__name__)
+        self.jupiter_api = jupiter_api
+        self.otc_engine = otc_engine
+        self.router = router
+        self.curve_points = curve_points
+        self.output_decimals = output_decimals
+
+    def plan(self, input_token: str, output_token: str, amount: float,
+             curve_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Build a split plan for one parent order
+
+        Args:
+            input_token: Input token symbol
+            output_token: Token the output is valued in
+            amount: Parent order size in input token units
+            curve_points: Jupiter depth probes (defaults to curve_points)
+
+        Returns:
+            Child orders with their expected output, the total compared with
+            the best single venue, and any amount no venue could take
+        """
+        started = time.monotonic()
+        venues = self.build_venues(input_token, output_token, amount, curve_points or self.curve_points)
+        gathered = time.monotonic()
+
+        allocation = optimize(venues, amount)
+        solved = time.monotonic()
+
+        children = []
+        total_value = 0.0
+        for venue in venues:
+            allocated = allocation.get(venue['name'])
+            if not allocated:
+                continue
+            value = fill_value(venue['segments'], allocated)
+            total_value += value
+            children.append({
+                'venue': venue['name'],
+                'route': venue['route'],
+                'pair': venue['pair'],
+                'input_amount': allocated,
+                'share': allocated / amount,
+                'expected_output': value / venue['value_per_unit'],
+                'output_token': venue['pair'].split('/')[1],
+                'expected_value': value
+            })
+        children.sort(key=lambda child: child['input_amount'], reverse=True)
+
+        filled = sum(child['input_amount'] for child in children)
+        single_venue = self._best_single_venue(venues, amount)
+        return {
+            'input_token': input_token,
+            'output_token': output_token,
+            'amount': amount,
+            'filled_amount': filled,
+            'unfilled_amount': max(0.0, amount - filled),
+            'expected_value': total_value,
+            'children': children,
+            'best_single_venue': single_venue,
+            'improvement': total_value - single_venue['expected_value'] if single_venue else None,
+            'venues_considered': [venue['name'] for venue in venues],
+            'quote_ms': round((gathered - started) * 1000, 2),
+            'solve_ms': round((solved - gathered) * 1000, 3)
+        }
+
+    def build_venues(self, input_token: str, output_token: str, amount: float, curve_points: int) -> List[Dict[str, Any]]:
+        """Sample every venue's output curve in value units of output_token"""
+        venues = []
+
+        dex = self._jupiter_venue(input_token, output_token, amount, curve_points)
+        if dex is not None:
+            venues.append(dex)
+
+        for pair, pool in self.otc_engine.liquidity_store.get_pools().items():
+            base_token, quote_token = pair.split('/')
+            if base_token != input_token:
+                continue
+            segments = self.otc_engine.get_price_segments(base_token, quote_token)
+            if not segments:
+                continue
+            value_per_unit = self.otc_engine.get_conversion_rate(quote_token, output_token)
+            multiplier = self._multiplier(pair, 'OTC')
+            venues.append({
+                'name': f"otc:{pair}",
+                'route': 'OTC',
+                'pair': pair,
+                'value_per_unit': value_per_unit,
+                'min_size': pool['min_trade'],
+                'segments': [(size, price * value_per_unit * multiplier) for size, price in segments]
+            })
+
+        return venues
+
+    def _jupiter_venue(self, input_token: str, output_token: str, amount: float,
+                       curve_points: int) -> Optional[Dict[str, Any]]:
+        curve = self.jupiter_api.get_depth_curve(
+            self.jupiter_api.get_token_mint(input_token),
+            self.jupiter_api.get_token_mint(output_token),
+            int(amount * 1e9),  # Convert to lamports
+            points=curve_points
+        )
+        if curve.get('status') != 'success':
+            self.logger.warning(f"No Jupiter depth curve for split routing: {curve.get('message')}")
+            return None
+
+        scale = 10.0 ** -self.output_decimals
+        samples = [(point['amount'] / 1e9, point['output_amount'] * scale) for point in curve['points']]
+        pair = f"{input_token}/{output_token}"
+        multiplier = self._multiplier(pair, 'DEX')
+        return {
+            'name': f"jupiter:{pair}",
+            'route': 'DEX',
+            'pair': pair,
+            'value_per_unit': 1.0,
+            'min_size': 0.0,
+            'segments': [(size, per_unit * multiplier) for size, per_unit in curve_segments(samples)]
+        }
+
+    def _multiplier(self, pair: str, venue: str) -> float:
+        return self.router.venue_multiplier(pair, venue) if self.router is not None else 1.0
+
+    @staticmethod
+    def _best_single_venue(venues: List[Dict[str, Any]], amount: float) -> Optional[Dict[str, Any]]:
+        """Best venue able to take the whole order alone"""
+        best = None
+        for venue in venues:
+            capacity = sum(size for size, _ in venue['segments'])
+            if capacity + 1e-9 < amount or amount < venue.get('min_size', 0.0):
+                continue
+            value = fill_value(venue['segments'], amount)
+            if best is None or value > best['expected_value']:
+                best = {'venue': venue['name'], 'expected_value': value}
+        return best
@@ -1,18 +1,34 @@
+import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 import random
 import time
 
+from liquidity_store import LiquidityStore
+from pricing_curve import PricingCurve
+from ttl_cache import TTLCache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; get_otc_quotes falls back to plain Python
+    np = None
+
+# get_otc_quotes reason per rejection code
+BATCH_REJECT_REASONS = (None, 'below_min_trade', 'above_max_trade', 'insufficient_liquidity')
+
 class OTCEngine:
     """OTC pool simulation engine with fixed pricing and liquidity management"""
     
-    def __init__(self):
-        # Simulated OTC pools with different characteristics
+    def __init__(self, jupiter_api=None, price_cache: Optional[TTLCache] = None,
+                 liquidity_store: Optional[LiquidityStore] = None):
+        # Simulated OTC pools with different characteristics (defaults seeded into the liquidity store)
         self.otc_pools = {
             'SOL/USDC': {
                 'liquidity': 50000.0,  # 50K SOL available
                 'spread': 0.25,        # 0.25% spread
+                'spread_tiers': [(0.0, 0.25), (1000.0, 0.30), (2500.0, 0.40)],  # Marginal spread % from each size
+                'depth_spread': 0.50,  # Up to +0.5% as a trade takes the pool's remaining liquidity
                 'min_trade': 100.0,    # Minimum 100 SOL
                 'max_trade': 5000.0,   # Maximum 5000 SOL per trade
                 'base_price_offset': 0.0,  # No offset from market price
@@ -21,6 +37,8 @@ class OTCEngine:
             'SOL/USDT': {
                 'liquidity': 25000.0,
                 'spread': 0.35,
+                'spread_tiers': [(0.0, 0.35), (1000.0, 0.45)],
+                'depth_spread': 0.75,
                 'min_trade': 250.0,
                 'max_trade': 2500.0,
                 'base_price_offset': -0.1,  # Slightly below market
@@ -38,10 +56,23 @@ class OTCEngine:
         # Trade execution simulation
         self.execution_delay_range = (0.5, 2.0)  # 0.5-2 seconds execution time
         
-        # Price cache to avoid excessive API calls
-        self.price_cache = {}
-        self.cache_timestamp = 0
+        # Shared Jupiter client (created lazily if not injected)
+        self.jupiter_api = jupiter_api
+        
+        # Per-symbol price cache to avoid excessive API calls
         self.cache_duration = 30  # Cache prices for 30 seconds
+        self.price_ttls = {
+            'USDC': 300,  # Stablecoins move slowly enough to cache longer
+            'USDT': 300
+        }
+        self.price_cache = price_cache if price_cache is not None else TTLCache(ttl=self.cache_duration, maxsize=256)
+        
+        # Pool liquidity shared across threads (and across workers once backed by the database)
+        self.liquidity_store = liquidity_store if liquidity_store is not None else LiquidityStore()
+        self.liquidity_store.set_default_pools(self.otc_pools)
+        
+        # Precomputed spread tier tables per pair, rebuilt when a pool's pricing changes
+        self._pricing_curves = {}
         
     def get_otc_quote(self, input_token: str, output_token: str, amount: float) -> Dict[str, Any]:
         """
@@ -59,14 +90,13 @@ class OTCEngine:
             pair = f"{input_token}/{output_token}"
             
             # Check if OTC pool exists for this pair
-            if pair not in self.otc_pools:
+            pool = self.liquidity_store.get_pool(pair)
+            if pool is None:
                 return {
                     'available': False,
                     'error': f'No OTC pool available for {pair}'
                 }
             
-            pool = self.otc_pools[pair]
-            
             # Check if pool is active
             if not pool['active']:
                 return {
@@ -96,18 +126,12 @@ class OTCEngine:
             
             # Calculate OTC price
             base_price = self._get_market_price(input_token, output_token)
-            spread_adjustment = pool['spread'] / 100  # Convert to decimal
-            price_offset = pool['base_price_offset'] / 100
+            spread = self.get_pricing_curve(pair, pool).spread(amount, pool['liquidity'])
             
-            # OTC price includes spread and offset
-            otc_price = base_price * (1 - spread_adjustment + price_offset)
+            # OTC price includes the size- and depth-dependent spread and the offset
+            otc_price = self._otc_price(base_price, spread, pool['base_price_offset'])
             output_amount = amount * otc_price
             
-            # Add some randomness to simulate real OTC pricing
-            price_variance = random.uniform(-0.001, 0.001)  # ±0.1% variance
-            otc_price *= (1 + price_variance)
-            output_amount *= (1 + price_variance)
-            
             return {
                 'available': True,
                 'pair': pair,
@@ -116,7 +140,8 @@ class OTCEngine:
                 'input_amount': amount,
                 'output_amount': round(output_amount, 6),
                 'price': round(otc_price, 6),
-                'spread': pool['spread'],
+                'spread': round(spread, 6),
+                'base_spread': pool['spread'],
                 'execution_estimate': f"{self.execution_delay_range[0]}-{self.execution_delay_range[1]}s",
                 'pool_liquidity_remaining': pool['liquidity'] - amount,
                 'timestamp': datetime.now().isoformat()
@@ -129,12 +154,93 @@ class OTCEngine:
                 'error': f'Error calculating OTC quote: {str(e)}'
             }
     
-    def execute_trade(self, quote: Dict[str, Any]) -> Dict[str, Any]:
+    def get_otc_quotes(self, input_token: str, output_token: str, amounts: Sequence[float]) -> Dict[str, Any]:
+        """
+        Get OTC quotes for many sizes of one pair at once
+        
+        Pricing matches get_otc_quote, but the pool and market price are read
+        once and the size limits, liquidity check and tiered spread are
+        applied to the whole array (with NumPy when it is installed).
+        
+        Args:
+            input_token: Input token symbol
+            output_token: Output token symbol
+            amounts: Input amounts
+            
+        Returns:
+            Column lists aligned with amounts ('available', 'output_amount',
+            'price', 'spread' and 'reason', None where available) plus the
+            pool's base spread and liquidity, or 'available': False with an error for the whole pair
+        """
+        pair = f"{input_token}/{output_token}"
+        pool = self.liquidity_store.get_pool(pair)
+        if pool is None:
+            return {'pair': pair, 'available': False, 'error': f'No OTC pool available for {pair}'}
+        if not pool['active']:
+            return {'pair': pair, 'available': False, 'error': f'OTC pool for {pair} is currently inactive'}
+        
+        try:
+            market_price = self._get_market_price(input_token, output_token)
+        except Exception as e:
+            logging.error(f"Error getting OTC quotes: {e}")
+            return {'pair': pair, 'available': False, 'error': f'Error calculating OTC quote: {str(e)}'}
+        
+        min_trade, max_trade, liquidity = pool['min_trade'], pool['max_trade'], pool['liquidity']
+        price_offset = pool['base_price_offset']
+        curve = self.get_pricing_curve(pair, pool)
+        
+        if np is not None:
+            sizes = np.asarray(amounts, dtype=float)
+            # Reason codes: 0 available, 1 below minimum, 2 above maximum, 3 insufficient liquidity
+            codes = np.select([sizes < min_trade, sizes > max_trade, sizes > liquidity], [1, 2, 3], default=0)
+            spreads = curve.spreads(sizes, liquidity)
+            prices = self._otc_price(market_price, spreads, price_offset)
+            available = codes == 0
+            columns = (
+                available.tolist(),
+                np.where(available, np.round(sizes * prices, 6), 0.0).tolist(),
+                np.where(available, np.round(prices, 6), 0.0).tolist(),
+                np.where(available, np.round(spreads, 6), 0.0).tolist(),
+                codes.tolist()
+            )
+        else:
+            codes = [1 if size < min_trade else 2 if size > max_trade else 3 if size > liquidity else 0
+                     for size in amounts]
+            spreads = curve.spreads(amounts, liquidity)
+            prices = [self._otc_price(market_price, spread, price_offset) for spread in spreads]
+            columns = (
+                [code == 0 for code in codes],
+                [round(size * price, 6) if code == 0 else 0.0 for size, price, code in zip(amounts, prices, codes)],
+                [round(price, 6) if code == 0 else 0.0 for price, code in zip(prices, codes)],
+                [round(spread, 6) if code == 0 else 0.0 for spread, code in zip(spreads, codes)],
+                codes
+            )
+        
+        return {
+            'pair': pair,
+            'available': columns[0],
+            'output_amount': columns[1],
+            'price': columns[2],
+            'spread': columns[3],
+            'reason': [BATCH_REJECT_REASONS[code] for code in columns[4]],
+            'base_spread': pool['spread'],
+            'min_trade': min_trade,
+            'max_trade': max_trade,
+            'pool_liquidity': liquidity,
+            'execution_estimate': f"{self.execution_delay_range[0]}-{self.execution_delay_range[1]}s",
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def execute_trade(self, quote: Dict[str, Any], reservation_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Simulate OTC trade execution
         
+        Liquidity is reserved before the execution delay and committed when
+        the trade settles, so concurrent executions cannot oversell a pool.
+        
         Args:
             quote: OTC quote from get_otc_quote
+            reservation_id: Reservation from reserve_liquidity (one is taken if omitted)
             
         Returns:
             Execution result
@@ -146,42 +252,129 @@ class OTCEngine:
                     'error': quote.get('error', 'Quote not available')
                 }
             
+            if reservation_id is None:
+                reservation_id = self.reserve_liquidity(quote)
+                if reservation_id is None:
+                    return self._insufficient_liquidity(quote)
+            
             # Simulate execution delay
             execution_delay = random.uniform(*self.execution_delay_range)
             time.sleep(execution_delay)
             
-            # Update pool liquidity
-            pair = quote['pair']
-            if pair in self.otc_pools:
-                self.otc_pools[pair]['liquidity'] -= quote['input_amount']
-            
-            # Generate simulated transaction data
-            tx_signature = f"otc_tx_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
-            
-            execution_result = {
-                'status': 'success',
-                'tx_signature': tx_signature,
-                'input_token': quote['input_token'],
-                'output_token': quote['output_token'],
-                'input_amount': quote['input_amount'],
-                'output_amount': quote['output_amount'],
-                'execution_price': quote['price'],
-                'execution_time': datetime.now(),
-                'execution_delay': execution_delay,
-                'pool_used': pair,
-                'remaining_liquidity': self.otc_pools[pair]['liquidity'] if pair in self.otc_pools else 0
+            return self._settle_trade(quote, execution_delay, reservation_id)
+            
+        except Exception as e:
+            logging.error(f"Error executing OTC trade: {e}")
+            self._release_after_error(reservation_id)
+            return {
+                'status': 'failed',
+                'error': f'Execution failed: {str(e)}'
             }
+    
+    def reserve_liquidity(self, quote: Dict[str, Any]) -> Optional[str]:
+        """
+        Hold pool liquidity for a quote ahead of execution
+        
+        Args:
+            quote: Available OTC quote from get_otc_quote
+            
+        Returns:
+            Reservation ID to pass to execute_trade, or None if the pool no
+            longer has the liquidity
+        """
+        return self.liquidity_store.reserve(quote['pair'], quote['input_amount'])
+    
+    def release_liquidity(self, reservation_id: str) -> bool:
+        """Return a reservation that will not be executed to its pool"""
+        return self.liquidity_store.release(reservation_id)
+    
+    async def get_otc_quote_async(self, input_token: str, output_token: str, amount: float) -> Dict[str, Any]:
+        """
+        get_otc_quote for asyncio callers
+        
+        Quotes are computed on the event loop when both prices and the pool
+        snapshot are cached; otherwise they run on a worker thread.
+        """
+        if (self.liquidity_store.snapshot_version() is not None
+                and self.quote_version(input_token, output_token) is not None):
+            return self.get_otc_quote(input_token, output_token, amount)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_otc_quote, input_token, output_token, amount)
+    
+    async def execute_trade_async(self, quote: Dict[str, Any], reservation_id: Optional[str] = None) -> Dict[str, Any]:
+        """execute_trade for asyncio callers; the execution delay does not hold a thread"""
+        loop = asyncio.get_running_loop()
+        try:
+            if not quote.get('available'):
+                return {
+                    'status': 'failed',
+                    'error': quote.get('error', 'Quote not available')
+                }
             
-            logging.info(f"OTC trade executed: {execution_result}")
-            return execution_result
+            if reservation_id is None:
+                reservation_id = await loop.run_in_executor(None, self.reserve_liquidity, quote)
+                if reservation_id is None:
+                    return self._insufficient_liquidity(quote)
+            
+            execution_delay = random.uniform(*self.execution_delay_range)
+            await asyncio.sleep(execution_delay)
+            
+            return await loop.run_in_executor(None, self._settle_trade, quote, execution_delay, reservation_id)
             
         except Exception as e:
             logging.error(f"Error executing OTC trade: {e}")
+            await loop.run_in_executor(None, self._release_after_error, reservation_id)
             return {
                 'status': 'failed',
                 'error': f'Execution failed: {str(e)}'
             }
     
+    def _settle_trade(self, quote: Dict[str, Any], execution_delay: float, reservation_id: str) -> Dict[str, Any]:
+        """Commit the reservation for a filled quote and build the execution result"""
+        pair = quote['pair']
+        remaining_liquidity = self.liquidity_store.commit(reservation_id)
+        if remaining_liquidity is None:
+            return {
+                'status': 'failed',
+                'error': 'Liquidity reservation expired before settlement'
+            }
+        
+        # Generate simulated transaction data
+        tx_signature = f"otc_tx_{int(datetime.now().timestamp())}_{random.randint(1000, 9999)}"
+        
+        execution_result = {
+            'status': 'success',
+            'tx_signature': tx_signature,
+            'input_token': quote['input_token'],
+            'output_token': quote['output_token'],
+            'input_amount': quote['input_amount'],
+            'output_amount': quote['output_amount'],
+            'execution_price': quote['price'],
+            'execution_time': datetime.now(),
+            'execution_delay': execution_delay,
+            'pool_used': pair,
+            'remaining_liquidity': remaining_liquidity
+        }
+        
+        logging.info(f"OTC trade executed: {execution_result}")
+        return execution_result
+    
+    def _release_after_error(self, reservation_id: Optional[str]):
+        if reservation_id is None:
+            return
+        try:
+            self.liquidity_store.release(reservation_id)
+        except Exception as e:
+            logging.error(f"Error releasing liquidity reservation {reservation_id}: {e}")
+    
+    @staticmethod
+    def _insufficient_liquidity(quote: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'status': 'failed',
+            'error': f"Insufficient liquidity in {quote['pair']} for {quote['input_amount']}; request a new quote"
+        }
+    
     def _get_real_time_price(self, token_symbol: str) -> float:
         """
         Get real-time price with caching
@@ -192,34 +385,88 @@ class OTCEngine:
         Returns:
             Current price in USD
         """
-        current_time = time.time()
-        
-        # Check cache first
-        if (current_time - self.cache_timestamp < self.cache_duration and 
-            token_symbol in self.price_cache):
-            return self.price_cache[token_symbol]
-        
         try:
-            # Import here to avoid circular imports
-            from jupiter_api import JupiterAPI
-            
-            jupiter_api = JupiterAPI()
-            token_mint = jupiter_api.get_token_mint(token_symbol)
-            price = jupiter_api.get_token_price(token_mint)
+            price = self.price_cache.get_or_load(
+                token_symbol,
+                lambda: self._fetch_price(token_symbol),
+                ttl=self.price_ttls.get(token_symbol, self.cache_duration)
+            )
             
             if price is not None:
-                # Update cache
-                self.price_cache[token_symbol] = price
-                self.cache_timestamp = current_time
                 return price
-            else:
-                # Fallback to cached price or default
-                return self.price_cache.get(token_symbol, self.fallback_prices.get(token_symbol, 1.0))
                 
         except Exception as e:
             logging.error(f"Error getting real-time price for {token_symbol}: {e}")
-            return self.price_cache.get(token_symbol, self.fallback_prices.get(token_symbol, 1.0))
+        
+        # Fallback to last known (possibly stale) price or default
+        return self._get_fallback_price(token_symbol)
+    
+    def _fetch_price(self, token_symbol: str) -> Optional[float]:
+        """Fetch a price from the shared Jupiter client on a cache miss"""
+        jupiter_api = self._get_jupiter_api()
+        
+        # Prefer the in-memory multi-token snapshot kept warm by the price refresher
+        price = jupiter_api.get_cached_token_price(token_symbol)
+        if price is not None:
+            return price
+        
+        token_mint = jupiter_api.get_token_mint(token_symbol)
+        return jupiter_api.get_token_price(token_mint)
+    
+    def _get_jupiter_api(self):
+        """Get the shared Jupiter client, creating one if none was injected"""
+        if self.jupiter_api is None:
+            # Import here to avoid circular imports
+            from jupiter_api import JupiterAPI
+            self.jupiter_api = JupiterAPI()
+        return self.jupiter_api
+    
+    def _get_fallback_price(self, token_symbol: str, default: float = 1.0) -> float:
+        """Last cached price for a symbol, else the static fallback"""
+        return self.price_cache.peek(token_symbol, self.fallback_prices.get(token_symbol, default))
 
+    def quote_version(self, input_token: str, output_token: str) -> Optional[Tuple[Any, ...]]:
+        """
+        Version of the inputs behind get_otc_quote for a pair
+        
+        Returns:
+            Cached price versions and pool liquidity, or None if a price
+            would have to be fetched
+        """
+        versions = tuple(self.price_cache.version(symbol) for symbol in (input_token, output_token))
+        if None in versions:
+            return None
+        pool = self.liquidity_store.get_pool(f"{input_token}/{output_token}")
+        return versions + (pool['liquidity'] if pool else None,)
+    
+    def _simulated_volatility(self, input_token: str, output_token: str) -> float:
+        """
+        ±0.5% simulated volatility for a pair
+        
+        The draw is seeded by the cached price versions, so it only changes
+        when a price is refreshed and a quote stays fully determined by
+        quote_version (which /api/quote's ETag is built from).
+        """
+        versions = [self.price_cache.version(symbol) for symbol in (input_token, output_token)]
+        if None in versions:
+            return random.uniform(-0.005, 0.005)
+        return random.Random(f"{input_token}|{output_token}|{versions[0]}|{versions[1]}").uniform(-0.005, 0.005)
+    
+    @staticmethod
+    def _otc_price(market_price: float, spread, price_offset: float):
+        """
+        OTC price from the market price, shared by every quoting path
+        
+        Args:
+            market_price: Market exchange rate
+            spread: Spread % (a float, or a NumPy array of them)
+            price_offset: Pool's base price offset %
+            
+        Returns:
+            Price per input unit (an array for an array of spreads)
+        """
+        return market_price * (1 - spread / 100 + price_offset / 100)
+    
     def _get_market_price(self, input_token: str, output_token: str) -> float:
         """
         Get market price for token pair using real-time data
@@ -239,7 +486,7 @@ class OTCEngine:
             market_price = input_price / output_price
             
             # Add small volatility for OTC simulation (smaller than before since we have real prices)
-            volatility = random.uniform(-0.005, 0.005)  # ±0.5% volatility
+            volatility = self._simulated_volatility(input_token, output_token)
             market_price *= (1 + volatility)
             
             return market_price
@@ -247,10 +494,67 @@ class OTCEngine:
         except Exception as e:
             logging.error(f"Error getting market price: {e}")
             # Fallback to cached or default prices
-            input_price = self.price_cache.get(input_token, self.fallback_prices.get(input_token, 150.0))
-            output_price = self.price_cache.get(output_token, self.fallback_prices.get(output_token, 1.0))
+            input_price = self._get_fallback_price(input_token, 150.0)
+            output_price = self._get_fallback_price(output_token, 1.0)
             return input_price / output_price
     
+    def get_price_segments(self, input_token: str, output_token: str, depth_steps: int = 8) -> List[Tuple[float, float]]:
+        """
+        Fillable sizes and marginal prices of a pool for split routing
+        
+        Segments follow the pool's pricing curve, breaking at each spread tier
+        and at depth_steps steps of the depth premium, so filling the first
+        segments of a pool pays what get_otc_quote charges for that size.
+        
+        Args:
+            input_token: Input token symbol
+            output_token: Output token symbol
+            depth_steps: Segments used to approximate the depth premium
+            
+        Returns:
+            (size, price) segments in fill order, empty if the pool is missing,
+            inactive or cannot fill its minimum trade
+        """
+        pair = f"{input_token}/{output_token}"
+        pool = self.liquidity_store.get_pool(pair)
+        if pool is None or not pool['active']:
+            return []
+        
+        capacity = min(pool['max_trade'], pool['liquidity'])
+        if capacity < pool['min_trade']:
+            return []
+        
+        market_price = self._get_market_price(input_token, output_token)
+        segments = self.get_pricing_curve(pair, pool).segments(capacity, pool['liquidity'], depth_steps)
+        return [(size, self._otc_price(market_price, spread, pool['base_price_offset'])) for size, spread in segments]
+    
+    def get_pricing_curve(self, pair: str, pool: Optional[Dict[str, Any]] = None) -> PricingCurve:
+        """
+        Precomputed pricing curve for a pool
+        
+        Args:
+            pair: Trading pair
+            pool: Pool snapshot (read from the liquidity store if omitted)
+            
+        Returns:
+            Curve built from the pool's spread tiers, reused until they change
+        """
+        pool = pool or self.liquidity_store.get_pool(pair)
+        config = (tuple(map(tuple, pool.get('spread_tiers') or ())), pool['spread'], pool.get('depth_spread') or 0.0)
+        cached = self._pricing_curves.get(pair)
+        if cached is not None and cached[0] == config:
+            return cached[1]
+        
+        curve = PricingCurve.for_pool(pool)
+        self._pricing_curves[pair] = (config, curve)
+        return curve
+    
+    def get_conversion_rate(self, from_token: str, to_token: str) -> float:
+        """Units of to_token per unit of from_token at cached real-time prices"""
+        if from_token == to_token:
+            return 1.0
+        return self._get_real_time_price(from_token) / self._get_real_time_price(to_token)
+    
     def get_pool_status(self) -> Dict[str, Any]:
         """
         Get status of all OTC pools
@@ -263,10 +567,14 @@ class OTCEngine:
             total_liquidity = 0
             active_pools = 0
             
-            for pair, pool in self.otc_pools.items():
+            pools = self.liquidity_store.get_pools()
+            for pair, pool in pools.items():
                 pool_status[pair] = {
                     'liquidity': pool['liquidity'],
+                    'reserved': pool['reserved'],
                     'spread': pool['spread'],
+                    'spread_tiers': pool.get('spread_tiers'),
+                    'depth_spread': pool.get('depth_spread', 0.0),
                     'min_trade': pool['min_trade'],
                     'max_trade': pool['max_trade'],
                     'active': pool['active'],
@@ -282,7 +590,7 @@ class OTCEngine:
                 'summary': {
                     'total_active_pools': active_pools,
                     'total_liquidity': total_liquidity,
-                    'average_spread': sum(p['spread'] for p in self.otc_pools.values()) / len(self.otc_pools)
+                    'average_spread': sum(p['spread'] for p in pools.values()) / len(pools) if pools else 0
                 }
             }
             
@@ -302,8 +610,7 @@ class OTCEngine:
             Success status
         """
         try:
-            if pair in self.otc_pools:
-                self.otc_pools[pair]['liquidity'] = new_liquidity
+            if self.liquidity_store.set_liquidity(pair, new_liquidity):
                 logging.info(f"Updated {pair} liquidity to {new_liquidity}")
                 return True
             else:
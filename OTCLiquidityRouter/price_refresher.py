@@ -0,0 +1,131 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from jupiter_api import FALLBACK_PRICE_SOURCES
+
+class PriceRefresher:
+    """Background thread that refreshes JupiterAPI's price snapshot ahead of expiry"""
+
+    def __init__(self, jupiter_api, interval: float = 60.0, failure_interval: float = 5.0,
+                 max_backoff: float = 300.0, jitter: float = 0.2):
+        self.logger = logging.getLogger(__name__)
+        self.jupiter_api = jupiter_api
+
+        # Refresh well before the snapshot's cache duration runs out
+        self.interval = min(interval, jupiter_api.price_cache_duration * 0.8)
+        self.failure_interval = failure_interval
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+        # Metrics
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.consecutive_failures = 0
+        self.last_refresh_at = None
+        self.last_success_at = None
+        self.last_source = None
+        self.last_duration_ms = None
+        self.next_refresh_at = None
+
+        jupiter_api.price_refresher = self
+
+    def start(self):
+        """Start the refresher thread (no-op if already running)"""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the refresher thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def request_refresh(self):
+        """Wake the refresher early, e.g. when a reader found the snapshot expired"""
+        self._wake.set()
+
+    def refresh_once(self) -> bool:
+        """
+        Refresh the price snapshot once
+
+        Returns:
+            True if a live source answered
+        """
+        started = time.monotonic()
+        try:
+            result = self.jupiter_api.refresh_multiple_token_prices()
+            source = result.get('source')
+            success = source not in FALLBACK_PRICE_SOURCES
+        except Exception as e:
+            self.logger.error(f"Price refresh failed: {e}")
+            source = None
+            success = False
+
+        self.refresh_count += 1
+        self.last_refresh_at = time.time()
+        self.last_duration_ms = round((time.monotonic() - started) * 1000, 2)
+        self.last_source = source
+
+        if success:
+            self.consecutive_failures = 0
+            self.last_success_at = self.last_refresh_at
+        else:
+            self.failure_count += 1
+            self.consecutive_failures += 1
+            self.logger.warning(f"Price refresh got no live source ({self.consecutive_failures} in a row)")
+
+        return success
+
+    def _next_delay(self) -> float:
+        """Regular interval after success, exponential backoff after failures, both jittered"""
+        if self.consecutive_failures:
+            delay = min(self.max_backoff, self.failure_interval * 2 ** (self.consecutive_failures - 1))
+        else:
+            delay = self.interval
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_once()
+
+            delay = self._next_delay()
+            self.next_refresh_at = time.time() + delay
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get refresher health and snapshot staleness
+
+        Returns:
+            Refresh counters, timings and the age of the served snapshot
+        """
+        now = time.time()
+        cached_at = self.jupiter_api.price_cache.get('cached_at') if self.jupiter_api.price_cache else None
+
+        return {
+            'running': self.is_running(),
+            'interval': self.interval,
+            'refresh_count': self.refresh_count,
+            'failure_count': self.failure_count,
+            'consecutive_failures': self.consecutive_failures,
+            'last_source': self.last_source,
+            'last_refresh_duration_ms': self.last_duration_ms,
+            'staleness_seconds': round(now - cached_at, 3) if cached_at else None,
+            'seconds_since_success': round(now - self.last_success_at, 3) if self.last_success_at else None,
+            'next_refresh_in': round(max(0.0, self.next_refresh_at - now), 3) if self.next_refresh_at else None
+        }
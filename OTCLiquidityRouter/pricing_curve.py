@@ -0,0 +1,109 @@
+from bisect import bisect_right
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; spreads() falls back to plain Python
+    np = None
+
+class PricingCurve:
+    """
+    OTC spread as a function of trade size and remaining pool liquidity
+
+    Spread is charged at the margin, like tax brackets: each unit pays the
+    spread of the size tier it falls in plus a depth premium that grows
+    linearly with the share of the pool's unreserved liquidity already
+    taken by the trade, reaching depth_spread when the pool would be
+    emptied. A trade's spread is the average over its units.
+
+    The tier table is precomputed into sorted tier starts and the
+    cumulative spread paid up to each start, so the tier part of any
+    trade's spread is one binary search and one multiply-add; the depth
+    part is closed form.
+    """
+
+    __slots__ = ('starts', 'spreads_pct', 'cumulative', 'depth_spread')
+
+    def __init__(self, tiers: Sequence[Tuple[float, float]], depth_spread: float = 0.0):
+        """
+        Args:
+            tiers: (size from, spread %) pairs; the first tier should start at 0
+            depth_spread: Extra spread % on the last unit of a trade that takes all remaining liquidity
+        """
+        ordered = sorted((float(start), float(spread)) for start, spread in tiers)
+        if not ordered or ordered[0][0] > 0:
+            raise ValueError('spread tiers must include one starting at size 0')
+
+        self.starts = [start for start, _ in ordered]
+        self.spreads_pct = [spread for _, spread in ordered]
+        self.cumulative = [0.0]
+        for i in range(1, len(ordered)):
+            width = self.starts[i] - self.starts[i - 1]
+            self.cumulative.append(self.cumulative[-1] + width * self.spreads_pct[i - 1])
+        self.depth_spread = float(depth_spread)
+
+    @classmethod
+    def for_pool(cls, pool) -> 'PricingCurve':
+        """Curve for a pool dict; its flat spread applies below the first tier (or at every size without tiers)"""
+        tiers = list(pool.get('spread_tiers') or [])
+        if not tiers or min(start for start, _ in tiers) > 0:
+            tiers.append((0.0, pool['spread']))
+        return cls(tiers, pool.get('depth_spread') or 0.0)
+
+    def spread(self, size: float, liquidity: float) -> float:
+        """
+        Average spread % for one trade
+
+        Args:
+            size: Trade size
+            liquidity: Pool liquidity available before the trade
+        """
+        if size <= 0:
+            return self.spreads_pct[0]
+        i = bisect_right(self.starts, size) - 1
+        tiered = (self.cumulative[i] + (size - self.starts[i]) * self.spreads_pct[i]) / size
+        return tiered + self.depth_spread * size / (2 * liquidity) if liquidity > 0 else tiered
+
+    def spreads(self, sizes, liquidity: float):
+        """spread() for many sizes: a NumPy array in, an array out when NumPy is available, else a list"""
+        if np is None or not isinstance(sizes, np.ndarray):
+            return [self.spread(size, liquidity) for size in sizes]
+
+        i = np.searchsorted(self.starts, sizes, side='right') - 1
+        starts = np.asarray(self.starts)[i]
+        tiered_total = np.asarray(self.cumulative)[i] + (sizes - starts) * np.asarray(self.spreads_pct)[i]
+        safe_sizes = np.where(sizes > 0, sizes, 1.0)
+        spreads = np.where(sizes > 0, tiered_total / safe_sizes, self.spreads_pct[0])
+        if liquidity > 0:
+            spreads = spreads + self.depth_spread * np.maximum(sizes, 0.0) / (2 * liquidity)
+        return spreads
+
+    def marginal_spread(self, filled: float, liquidity: float) -> float:
+        """Spread % on the next unit after filled units of one trade"""
+        tiered = self.spreads_pct[bisect_right(self.starts, filled) - 1]
+        return tiered + self.depth_spread * filled / liquidity if liquidity > 0 else tiered
+
+    def segments(self, capacity: float, liquidity: float, depth_steps: int = 8) -> List[Tuple[float, float]]:
+        """
+        Piecewise-constant marginal spreads up to capacity
+
+        Segments break at every tier start and at depth_steps even steps for
+        the depth premium. Each segment is priced at its midpoint, which is
+        exact for the linear premium, so filling any whole number of
+        segments costs what spread() charges for that size.
+
+        Returns:
+            (segment size, spread %) pairs in fill order (spreads non-decreasing when the tiers are)
+        """
+        if capacity <= 0:
+            return []
+        steps = depth_steps if self.depth_spread and liquidity > 0 else 1
+        breaks = {capacity * (i + 1) / steps for i in range(steps)}
+        breaks.update(start for start in self.starts if 0 < start < capacity)
+
+        segments = []
+        previous = 0.0
+        for end in sorted(breaks):
+            segments.append((end - previous, self.marginal_spread((previous + end) / 2, liquidity)))
+            previous = end
+        return segments
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from functools import partial
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+class QuoteAggregator:
+    """Fans quote requests out to every venue at once with per-venue deadlines"""
+
+    def __init__(self, max_workers: int = 16, default_deadline: float = 10.0):
+        self.logger = logging.getLogger(__name__)
+        self.default_deadline = default_deadline
+        self.venues = {}  # name -> {'quote_fn': callable, 'async_quote_fn': coroutine function, 'deadline': seconds}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='quote-fanout')
+
+    def register_venue(self, name: str, quote_fn: Callable[[str, str, float], Any], deadline: Optional[float] = None,
+                       async_quote_fn: Optional[Callable[..., Awaitable[Any]]] = None):
+        """
+        Register a quoting venue
+
+        Args:
+            name: Venue name used as the key in aggregated results
+            quote_fn: Callable taking (input_token, output_token, amount) and returning a quote or None
+            deadline: Seconds to wait for this venue before reporting it as timed out
+            async_quote_fn: Coroutine function with the same signature, awaited directly by
+                            get_quotes_async instead of running quote_fn on the thread pool
+        """
+        self.venues[name] = {
+            'quote_fn': quote_fn,
+            'async_quote_fn': async_quote_fn,
+            'deadline': deadline if deadline is not None else self.default_deadline
+        }
+
+    def get_quotes(self, input_token: str, output_token: str, amount: float,
+                   venue_options: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Request quotes from all venues concurrently from a synchronous caller
+
+        Args:
+            input_token: Input token symbol
+            output_token: Output token symbol
+            amount: Input amount
+            venue_options: Extra keyword arguments per venue name
+
+        Returns:
+            Aggregated result with per-venue quotes, errors and timeouts
+        """
+        venue_options = venue_options or {}
+        started = time.monotonic()
+        futures = {
+            name: self._pool.submit(venue['quote_fn'], input_token, output_token, amount,
+                                    **venue_options.get(name, {}))
+            for name, venue in self.venues.items()
+        }
+
+        result = self._empty_result()
+        for name, future in futures.items():
+            remaining = max(0.0, started + self.venues[name]['deadline'] - time.monotonic())
+            try:
+                result['quotes'][name] = future.result(timeout=remaining)
+            except FuturesTimeoutError:
+                future.cancel()
+                result['timed_out'].append(name)
+                self.logger.warning(f"Quote venue {name} missed its {self.venues[name]['deadline']}s deadline")
+            except Exception as e:
+                result['errors'][name] = str(e)
+                self.logger.error(f"Quote venue {name} failed: {e}")
+
+        result['latency_ms'] = round((time.monotonic() - started) * 1000, 2)
+        return result
+
+    async def get_quotes_async(self, input_token: str, output_token: str, amount: float,
+                               venue_options: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Request quotes from all venues concurrently from an asyncio caller
+
+        Args:
+            input_token: Input token symbol
+            output_token: Output token symbol
+            amount: Input amount
+            venue_options: Extra keyword arguments per venue name
+
+        Returns:
+            Aggregated result with per-venue quotes, errors and timeouts
+        """
+        venue_options = venue_options or {}
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+
+        names = list(self.venues)
+        tasks = []
+        for name in names:
+            venue = self.venues[name]
+            if venue['async_quote_fn'] is not None:
+                call = venue['async_quote_fn'](input_token, output_token, amount, **venue_options.get(name, {}))
+            else:
+                call = loop.run_in_executor(self._pool, partial(venue['quote_fn'], input_token, output_token, amount,
+                                                                **venue_options.get(name, {})))
+            tasks.append(asyncio.wait_for(call, timeout=venue['deadline']))
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        result = self._empty_result()
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                result['timed_out'].append(name)
+                self.logger.warning(f"Quote venue {name} missed its {self.venues[name]['deadline']}s deadline")
+            elif isinstance(outcome, Exception):
+                result['errors'][name] = str(outcome)
+                self.logger.error(f"Quote venue {name} failed: {outcome}")
+            else:
+                result['quotes'][name] = outcome
+
+        result['latency_ms'] = round((time.monotonic() - started) * 1000, 2)
+        return result
+
+    @staticmethod
+    def _empty_result() -> Dict[str, Any]:
+        return {
+            'quotes': {},
+            'errors': {},
+            'timed_out': [],
+            'latency_ms': 0.0
+        }
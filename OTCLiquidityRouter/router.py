@@ -0,0 +1,157 @@
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+# Venues in scoring order; ties go to the earlier venue
+VENUES = ('DEX', 'OTC')
+DEX, OTC = range(len(VENUES))
+
+class RouteDecision:
+    """Chosen venue with the net output expected from every venue (None where unavailable)"""
+
+    __slots__ = ('venue', 'net_output', 'scores')
+
+    def __init__(self, venue: str, net_output: float, scores: Tuple[Optional[float], ...]):
+        self.venue = venue
+        self.net_output = net_output
+        self.scores = scores
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'venue': self.venue,
+            'net_output': self.net_output,
+            'scores': dict(zip(VENUES, self.scores))
+        }
+
+class Router:
+    """
+    Picks the venue with the highest expected net output for a trade
+
+    Venue quotes already include price, spread and price impact. On top of
+    those the router deducts a proportional fee, a fixed fee and a
+    settlement latency cost: the expected adverse move while the trade
+    settles, priced at risk_bps_per_s basis points per second. Per pair,
+    these reduce to one multiplier and one fixed cost per venue, compiled
+    once, so a decision is a single pass over two short tuples.
+    """
+
+    def __init__(self, risk_bps_per_s: float = 1.0, output_decimals: int = 6):
+        """
+        Args:
+            risk_bps_per_s: Expected adverse price move per second of settlement, in basis points
+            output_decimals: Decimals of the output token in Jupiter's outAmount
+        """
+        self.risk_bps_per_s = risk_bps_per_s
+        self.output_decimals = output_decimals
+        self._venue_params = {venue: {'fee_bps': 0.0, 'fixed_fee': 0.0, 'latency_s': 0.0} for venue in VENUES}
+        self._pair_overrides = {}  # pair -> venue -> parameter overrides
+        self._compiled = {}        # pair -> (multipliers, fixed costs, outAmount scale)
+
+    def configure_venue(self, venue: str, fee_bps: Optional[float] = None, fixed_fee: Optional[float] = None,
+                        latency_s: Optional[float] = None):
+        """
+        Set a venue's default cost parameters
+
+        Args:
+            venue: 'DEX' or 'OTC'
+            fee_bps: Proportional fee in basis points of output
+            fixed_fee: Flat fee in output token units
+            latency_s: Expected seconds from decision to settlement
+        """
+        self._update(self._venue_params[venue], fee_bps=fee_bps, fixed_fee=fixed_fee, latency_s=latency_s)
+        self._compiled.clear()
+
+    def configure_pair(self, pair: str, venue: str, **overrides):
+        """Override a venue's cost parameters (fee_bps, fixed_fee, latency_s) for one pair"""
+        self._update(self._pair_overrides.setdefault(pair, {}).setdefault(venue, {}), **overrides)
+        self._compiled.pop(pair, None)
+
+    def best(self, pair: str, gross_outputs: Sequence[Optional[float]]) -> Tuple[int, float]:
+        """
+        Hot path: index of the best venue and its net output
+
+        Args:
+            pair: Trading pair ('SOL/USDC')
+            gross_outputs: Quoted output per venue in VENUES order, None if unavailable
+
+        Returns:
+            (venue index, net output), or (-1, 0.0) if no venue is available
+        """
+        compiled = self._compiled.get(pair) or self._compile(pair)
+        multipliers, fixed_costs = compiled[0], compiled[1]
+
+        best_index = -1
+        best_net = 0.0
+        for index in range(len(gross_outputs)):
+            gross = gross_outputs[index]
+            if gross is None:
+                continue
+            net = gross * multipliers[index] - fixed_costs[index]
+            if best_index < 0 or net > best_net:
+                best_index, best_net = index, net
+        return best_index, best_net
+
+    def route(self, input_token: str, output_token: str, jupiter_quote: Optional[Dict[str, Any]],
+              otc_quote: Optional[Dict[str, Any]]) -> Optional[RouteDecision]:
+        """
+        Choose between the Jupiter and OTC quotes for a trade
+
+        Args:
+            input_token: Input token symbol
+            output_token: Output token symbol
+            jupiter_quote: Raw Jupiter quote (outAmount in smallest units) or None
+            otc_quote: Quote from OTCEngine.get_otc_quote or None
+
+        Returns:
+            Decision with per-venue net outputs, or None if neither venue can fill
+        """
+        pair = f"{input_token}/{output_token}"
+        compiled = self._compiled.get(pair) or self._compile(pair)
+        gross_outputs = (
+            float(jupiter_quote['outAmount']) * compiled[2] if jupiter_quote else None,
+            otc_quote['output_amount'] if otc_quote and otc_quote.get('available') else None
+        )
+
+        index, net = self.best(pair, gross_outputs)
+        if index < 0:
+            return None
+
+        multipliers, fixed_costs = compiled[0], compiled[1]
+        scores = tuple(
+            None if gross is None else gross * multipliers[i] - fixed_costs[i]
+            for i, gross in enumerate(gross_outputs)
+        )
+        return RouteDecision(VENUES[index], net, scores)
+
+    def venue_multiplier(self, pair: str, venue: str) -> float:
+        """Fraction of a venue's quoted output kept after proportional fees and settlement cost"""
+        compiled = self._compiled.get(pair) or self._compile(pair)
+        return compiled[0][VENUES.index(venue)]
+
+    def get_config(self) -> Dict[str, Any]:
+        return {
+            'risk_bps_per_s': self.risk_bps_per_s,
+            'venues': {venue: dict(params) for venue, params in self._venue_params.items()},
+            'pair_overrides': {pair: {venue: dict(params) for venue, params in venues.items()}
+                               for pair, venues in self._pair_overrides.items()}
+        }
+
+    def _compile(self, pair: str):
+        overrides = self._pair_overrides.get(pair, {})
+        multipliers = []
+        fixed_costs = []
+        for venue in VENUES:
+            params = dict(self._venue_params[venue], **overrides.get(venue, {}))
+            cost_bps = params['fee_bps'] + params['latency_s'] * self.risk_bps_per_s
+            multipliers.append(1.0 - cost_bps / 10000)
+            fixed_costs.append(params['fixed_fee'])
+
+        compiled = (tuple(multipliers), tuple(fixed_costs), 10.0 ** -self.output_decimals)
+        self._compiled[pair] = compiled
+        return compiled
+
+    @staticmethod
+    def _update(params: Dict[str, float], **values):
+        for name, value in values.items():
+            if name not in ('fee_bps', 'fixed_fee', 'latency_s'):
+                raise ValueError(f"Unknown routing parameter {name}")
+            if value is not None:
+                params[name] = float(value)
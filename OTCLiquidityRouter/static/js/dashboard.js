@@ -1,12 +1,14 @@
 /**
  * Dashboard JavaScript functionality for OTC Routing Engine
- * Handles real-time updates, chart management, and user interactions
+ * Handles live updates (Server-Sent Events), chart management, and user interactions
  */
 
 class OTCDashboard {
     constructor() {
         this.charts = {};
         this.updateInterval = null;
+        this.eventSource = null;
+        this.maxTradeRows = 10;
         this.isVisible = true;
         
         this.init();
@@ -14,7 +16,7 @@ class OTCDashboard {
     
     init() {
         this.setupVisibilityHandler();
-        this.setupAutoRefresh();
+        this.setupLiveUpdates();
         this.setupEventListeners();
         this.initializeCharts();
     }
@@ -23,14 +25,57 @@ class OTCDashboard {
         // Handle page visibility changes
         document.addEventListener('visibilitychange', () => {
             this.isVisible = !document.hidden;
-            if (this.isVisible) {
+            // The live feed keeps running in background tabs, so only polling needs a catch-up
+            if (this.isVisible && this.updateInterval) {
                 this.refreshData();
             }
         });
     }
     
+    setupLiveUpdates() {
+        // Only pages that show live data (marked with data-live-feed) open the stream
+        if (!document.querySelector('[data-live-feed]')) return;
+        
+        if (typeof EventSource === 'undefined') {
+            this.setupAutoRefresh();
+            return;
+        }
+        
+        this.connectLiveFeed();
+    }
+    
+    connectLiveFeed() {
+        // One server-pushed stream replaces the trade, price and page-reload polls;
+        // EventSource reconnects on its own and replays missed trades via Last-Event-ID
+        this.eventSource = new EventSource('/api/stream');
+        
+        this.eventSource.addEventListener('trades', (e) => {
+            this.prependTrades(JSON.parse(e.data));
+        });
+        
+        this.eventSource.addEventListener('stats', (e) => {
+            this.dispatchLiveEvent('otc:stats', JSON.parse(e.data));
+        });
+        
+        this.eventSource.addEventListener('prices', (e) => {
+            this.dispatchLiveEvent('otc:prices', JSON.parse(e.data));
+        });
+    }
+    
+    disconnectLiveFeed() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+    
+    dispatchLiveEvent(name, detail) {
+        // Page scripts render prices and stats by listening for these events
+        document.dispatchEvent(new CustomEvent(name, { detail }));
+    }
+    
     setupAutoRefresh() {
-        // Auto-refresh data every 30 seconds when page is visible
+        // Fallback for browsers without EventSource: poll every 30 seconds when page is visible
         this.updateInterval = setInterval(() => {
             if (this.isVisible && this.shouldAutoRefresh()) {
                 this.refreshData();
@@ -93,6 +138,26 @@ class OTCDashboard {
         }
     }
     
+    prependTrades(trades) {
+        const tbody = document.querySelector('#tradesTable tbody');
+        if (!tbody || !trades.length) return;
+        
+        // Reveal the table if this is the first trade
+        const wrapper = document.querySelector('#tradesTableWrapper');
+        const placeholder = document.querySelector('#noTradesPlaceholder');
+        if (wrapper) wrapper.classList.remove('d-none');
+        if (placeholder) placeholder.classList.add('d-none');
+        
+        // Trades arrive oldest first; newest goes on top
+        trades.forEach(trade => {
+            tbody.insertBefore(this.createTradeRow(trade), tbody.firstChild);
+        });
+        
+        while (tbody.rows.length > this.maxTradeRows) {
+            tbody.deleteRow(-1);
+        }
+    }
+    
     updateTradeTable(trades) {
         const tbody = document.querySelector('#tradesTable tbody');
         if (!tbody || !trades.length) return;
@@ -204,7 +269,13 @@ class OTCDashboard {
     }
     
     toggleAutoRefresh() {
-        if (this.updateInterval) {
+        if (this.eventSource) {
+            this.disconnectLiveFeed();
+            this.showSuccess('Live updates disabled');
+        } else if (typeof EventSource !== 'undefined') {
+            this.connectLiveFeed();
+            this.showSuccess('Live updates enabled');
+        } else if (this.updateInterval) {
             clearInterval(this.updateInterval);
             this.updateInterval = null;
             this.showSuccess('Auto-refresh disabled');
@@ -285,6 +356,8 @@ class OTCDashboard {
             clearInterval(this.updateInterval);
         }
         
+        this.disconnectLiveFeed();
+        
         // Destroy all charts
         Object.keys(this.charts).forEach(chartId => {
             this.destroyChart(chartId);
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app configures itself from the environment at import time: point it at a
+# throwaway SQLite database and keep background threads off the network
+_db_dir = tempfile.mkdtemp(prefix='otc-router-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault('PRICE_REFRESH_ENABLED', 'false')
+os.environ.setdefault('METRICS_COMPACTION_ENABLED', 'false')
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('OTC_ASYNC_EXECUTION', 'false')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+import models  # noqa: E402
+
+@pytest.fixture
+def app():
+    with app_module.app.app_context():
+        yield app_module.app
+        app_module.db.session.rollback()
+
+@pytest.fixture
+def db(app):
+    """The app database with the metric tables emptied before the test"""
+    session = app_module.db.session
+    session.query(models.SystemMetrics).delete()
+    session.query(models.MetricRollup).delete()
+    session.commit()
+    return app_module.db
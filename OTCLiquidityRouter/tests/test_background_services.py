@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_import_starts_no_threads_until_an_entrypoint_asks(tmp_path):
+    script = (
+        "import threading\n"
+        "import app\n"
+        "assert [thread.name for thread in threading.enumerate()] == ['MainThread'], threading.enumerate()\n"
+        "app.start_background_services(app.app)\n"
+        "app.start_background_services(app.app)\n"
+        "names = {thread.name for thread in threading.enumerate()}\n"
+        "assert {'live-feed', 'metrics-compactor', 'order-scheduler', 'price-refresher'} <= names, names\n"
+    )
+    # Every service enabled; price fetches go to a dead proxy without retries so they fail fast
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'services.db'}", PRICE_REFRESH_ENABLED='true',
+               PRICE_REFRESH_INTERVAL='3600', METRICS_COMPACTION_ENABLED='true', SCHEDULER_ENABLED='true',
+               TRADE_LOG_WRITE_BEHIND='true', HTTPS_PROXY='http://127.0.0.1:9', HTTP_MAX_RETRIES='0')
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,42 @@
+from flask import Flask, jsonify
+
+from conditional_get import etag_for, init_compression, not_modified, with_etag
+
+def _client():
+    app = Flask(__name__)
+    init_compression(app, min_size=1024)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'value': 1})
+
+    @app.route('/large')
+    def large():
+        etag = etag_for('large')
+        return not_modified(etag) or with_etag(jsonify({'values': list(range(1000))}), etag)
+
+    return app.test_client()
+
+def test_small_json_varies_on_accept_encoding():
+    """A response too small to compress still tells caches it depends on Accept-Encoding"""
+    response = _client().get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+
+def test_uncompressed_and_compressed_large_json_both_vary():
+    client = _client()
+    plain = client.get('/large', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.vary
+
+    gzipped = client.get('/large', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in gzipped.vary
+    assert gzipped.get_etag()[0] == plain.get_etag()[0] + '-gzip'
+
+def test_not_modified_repeats_vary():
+    client = _client()
+    etag = client.get('/large', headers={'Accept-Encoding': 'gzip'}).get_etag()[0]
+    response = client.get('/large', headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert 'Accept-Encoding' in response.vary
@@ -0,0 +1,65 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import HTTPClient, RateLimitTimeout
+
+@pytest.fixture
+def server():
+    """Local HTTP server answering with the queued statuses, then 200"""
+    statuses = []
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(statuses.pop(0) if statuses else 200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", statuses, hits
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_every_retry_takes_a_token(server):
+    url, statuses, hits = server
+    statuses.extend([503, 429])
+    client = HTTPClient(host_rate_limits={'127.0.0.1': 1000}, max_retries=2, backoff_factor=0.0)
+    limiter = client.limiters['127.0.0.1']
+    limiter.tokens = limiter.capacity = 3.0
+    limiter.rate = 0.001
+
+    response = client.get(url + '/quote')
+
+    assert response.status_code == 200
+    assert len(hits) == 3
+    assert limiter.tokens < 0.1
+
+def test_fails_fast_without_a_token(server):
+    url, statuses, hits = server
+    client = HTTPClient(host_rate_limits={'127.0.0.1': 0.1}, rate_limit_timeout=0.05)
+
+    assert client.get(url).status_code == 200
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        client.get(url)
+    assert time.monotonic() - started < 1.0
+    assert len(hits) == 1
+
+def test_returns_last_response_when_a_retry_has_no_token(server):
+    url, statuses, hits = server
+    statuses.extend([503, 503, 503])
+    client = HTTPClient(host_rate_limits={'127.0.0.1': 0.1}, max_retries=2, backoff_factor=0.0,
+                        rate_limit_timeout=0.05)
+
+    assert client.get(url).status_code == 503
+    assert len(hits) == 1
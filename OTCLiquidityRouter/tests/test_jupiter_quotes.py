@@ -0,0 +1,109 @@
+import math
+import threading
+import time
+
+from jupiter_api import JupiterAPI
+
+SOL = JupiterAPI().get_token_mint('SOL')
+USDC = JupiterAPI().get_token_mint('USDC')
+
+def _quote(amount, price_impact_pct=0.0):
+    return {'inAmount': str(amount), 'outAmount': str(amount * 100), 'priceImpactPct': str(price_impact_pct)}
+
+def test_timed_out_batch_cancels_its_queued_requests(monkeypatch):
+    monkeypatch.setenv('JUPITER_BATCH_QUOTE_WORKERS', '2')
+    api = JupiterAPI()
+    calls = []
+    release = threading.Event()
+
+    def fetch(input_mint, output_mint, amount, slippage_bps):
+        calls.append(amount)
+        release.wait(5)
+        return _quote(amount)
+
+    monkeypatch.setattr(api, '_fetch_quote', fetch)
+    quotes, requests = api.get_quotes([(SOL, USDC, 10 ** 9 * n) for n in range(1, 21)],
+                                      use_cache=False, timeout=0.1)
+    release.set()
+    api._batch_pool.shutdown(wait=True)
+
+    assert requests == 20
+    assert quotes == [None] * 20
+    # Only the two requests already running when the batch timed out reached Jupiter
+    assert len(calls) == 2
+
+def test_depth_probes_bypass_the_quote_cache(monkeypatch):
+    api = JupiterAPI()
+    calls = []
+
+    def fetch(input_mint, output_mint, amount, slippage_bps):
+        calls.append(amount)
+        return _quote(amount, price_impact_pct=amount / 10 ** 12)
+
+    monkeypatch.setattr(api, '_fetch_quote', fetch)
+    amount = 10 ** 9
+    api.get_quote(SOL, USDC, amount)  # warm the bucket the probe amount falls in
+    probes = api._probe_quotes(SOL, USDC, [amount + 1])
+
+    assert calls == [amount, amount + 1]
+    assert probes[0]['slippage'] == api.calculate_slippage(_quote(amount + 1, (amount + 1) / 10 ** 12))
+
+def _bucket_edges(api, amount):
+    """Smallest and largest amounts in amount's cache bucket"""
+    bucket = api._amount_bucket(amount)
+    width = math.log1p(api.quote_amount_bucket_bps / 10000)
+    low, high = math.ceil(math.exp(bucket * width)), math.ceil(math.exp((bucket + 1) * width))
+    # Step over float error at the boundaries
+    while api._amount_bucket(low) < bucket:
+        low += 1
+    while api._amount_bucket(low - 1) == bucket:
+        low -= 1
+    while api._amount_bucket(high) > bucket:
+        high -= 1
+    while api._amount_bucket(high + 1) == bucket:
+        high += 1
+    return low, high
+
+def _impact_api(monkeypatch):
+    """API whose quotes have price impact growing with size, recording each upstream request"""
+    api = JupiterAPI()
+    api.calls = []
+
+    def fetch(input_mint, output_mint, amount, slippage_bps):
+        api.calls.append(amount)
+        return _quote(amount, price_impact_pct=amount / 10 ** 12)
+
+    monkeypatch.setattr(api, '_fetch_quote', fetch)
+    return api
+
+def test_cached_quote_is_not_scaled_across_its_bucket(monkeypatch):
+    api = _impact_api(monkeypatch)
+    low, high = _bucket_edges(api, 10 ** 12)
+
+    api.get_quote(SOL, USDC, low)
+    quote = api.get_quote(SOL, USDC, high)
+
+    assert api._amount_bucket(low) == api._amount_bucket(high)
+    assert api.calls == [low, high]
+    assert quote['priceImpactPct'] == _quote(high, high / 10 ** 12)['priceImpactPct']
+
+def test_cached_quote_is_scaled_within_tolerance(monkeypatch):
+    api = _impact_api(monkeypatch)
+    low, high = _bucket_edges(api, 10 ** 12)
+    nearby = low + low * int(api.quote_cache_tolerance_bps) // 10000
+
+    api.get_quote(SOL, USDC, low)
+    quote = api.get_quote(SOL, USDC, nearby)
+
+    assert api.calls == [low]
+    assert quote['inAmount'] == str(nearby)
+
+def test_batch_shares_quotes_only_within_tolerance(monkeypatch):
+    api = _impact_api(monkeypatch)
+    low, high = _bucket_edges(api, 10 ** 12)
+
+    quotes, requests = api.get_quotes([(SOL, USDC, low), (SOL, USDC, low + 1), (SOL, USDC, high)])
+
+    assert requests == 2
+    assert sorted(api.calls) == [low, high]
+    assert quotes[2]['priceImpactPct'] == _quote(high, high / 10 ** 12)['priceImpactPct']
@@ -0,0 +1,18 @@
+from live_feed import LiveFeed
+
+def test_snapshot_published_after_connect_is_sent_once():
+    feed = LiveFeed(trade_logger=None, jupiter_api=None, keepalive=0.01)
+    feed._publish('stats', {'total_trades': 1}, snapshot=True)
+
+    stream = feed.stream()
+    assert next(stream) == b'retry: 3000\n\n'
+    taken = feed._snapshots
+    feed._publish('prices', {'SOL': 150.0}, snapshot=True)
+
+    frames = [next(stream) for _ in range(3)]
+    stream.close()
+
+    assert list(taken) == ['stats']  # the dict the stream took was replaced, not mutated
+    assert frames[0].startswith(b'event: stats\n')
+    assert frames[1].startswith(b'event: prices\n')
+    assert frames[2] == b': keepalive\n\n'
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import app as app_module
+import models
+
+def test_hourly_counts_survive_compaction(db):
+    """One sample a minute for 10 hours reads back as 60 per hour after compaction into rollups"""
+    start = datetime(2026, 1, 1)
+    db.session.add_all([
+        models.SystemMetrics(metric_name='latency', metric_value=float(i), timestamp=start + timedelta(minutes=i))
+        for i in range(600)
+    ])
+    db.session.commit()
+
+    store = app_module.metrics_store
+    raw = store.query('latency', start, start + timedelta(hours=10), 3600)
+    assert [point['count'] for point in raw] == [60] * 10
+
+    # Far enough ahead that raw rows go to minute buckets and minute buckets to hour buckets
+    result = store.compact(now=start + timedelta(days=30))
+    assert result['raw_rows'] == 600
+
+    points = store.query('latency', start, start + timedelta(hours=10), 3600)
+    assert [point['timestamp'] for point in points] == [(start + timedelta(hours=h)).isoformat() for h in range(10)]
+    assert [point['count'] for point in points] == [60] * 10
+    assert points[1]['min'] == 60.0 and points[1]['max'] == 119.0
+
+def test_boundary_timestamps_start_their_bucket(db):
+    """A row exactly on a step boundary belongs to the bucket starting there, at any time of day"""
+    start = datetime(2026, 3, 14, 0, 0, 0, 250000)
+    db.session.add_all([
+        models.SystemMetrics(metric_name='boundary', metric_value=1.0, timestamp=start + timedelta(minutes=5 * i))
+        for i in range(288)
+    ])
+    db.session.commit()
+
+    points = app_module.metrics_store.query('boundary', start, start + timedelta(days=1), 300)
+    assert len(points) == 288
+    assert all(point['count'] == 1 for point in points)
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_app_imports_and_quotes_without_optional_packages(tmp_path):
+    """numpy, brotli and httpx are optional extras: the app must import and price ladders without them"""
+    script = (
+        "import sys\n"
+        "for name in ('numpy', 'brotli', 'httpx'):\n"
+        "    sys.modules[name] = None\n"
+        "import app\n"
+        "app.otc_engine.price_cache.set('SOL', 150.0, ttl=60)\n"
+        "app.otc_engine.price_cache.set('USDC', 1.0, ttl=60)\n"
+        "quotes = app.otc_engine.get_otc_quotes('SOL', 'USDC', [100.0, 1000.0])\n"
+        "assert quotes['available'] == [True, True], quotes\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'optional.db'}", PRICE_REFRESH_ENABLED='false',
+               METRICS_COMPACTION_ENABLED='false', SCHEDULER_ENABLED='false')
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+import app as app_module
+import models
+from order_scheduler import OrderScheduler
+
+class BlockingSlice:
+    """execute_slice_fn that holds each slice until released, then fills it or raises"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.error = None
+
+    def __call__(self, input_token, output_token, amount):
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return {'route': 'OTC', 'output_amount': amount * 150.0, 'price': 150.0, 'trade_id': None}
+
+@pytest.fixture
+def scheduler(app):
+    session = app_module.db.session
+    session.query(models.ChildOrder).delete()
+    session.query(models.ParentOrder).delete()
+    session.commit()
+
+    fn = BlockingSlice()
+    scheduler = OrderScheduler(fn, max_workers=1, retry_delay=0.0, stale_after=0.0)
+    scheduler.init_db(app_module.db, models.ParentOrder, models.ChildOrder)
+    yield scheduler, fn
+    fn.release.set()
+    scheduler.stop()
+
+def _run_first_slice(scheduler, fn):
+    """Submit a two-slice order and claim its first child"""
+    parent_id = scheduler.submit('SOL', 'USDC', 200.0, slices=2, interval_seconds=3600)['id']
+    assert scheduler.poll_once() == 1
+    assert fn.started.wait(5)
+    return parent_id
+
+def _statuses(scheduler, parent_id):
+    return [child['status'] for child in scheduler.get_progress(parent_id)['children']]
+
+def test_failed_slice_of_cancelled_order_is_not_requeued(scheduler):
+    scheduler, fn = scheduler
+    parent_id = _run_first_slice(scheduler, fn)
+
+    scheduler.cancel(parent_id)
+    fn.error = 'venue down'
+    fn.release.set()
+    scheduler.stop()
+
+    progress = scheduler.get_progress(parent_id)
+    assert progress['status'] == 'cancelled'
+    assert _statuses(scheduler, parent_id) == ['cancelled', 'cancelled']
+
+def test_failed_slice_of_running_order_is_retried(scheduler):
+    scheduler, fn = scheduler
+    parent_id = _run_first_slice(scheduler, fn)
+
+    fn.error = 'venue down'
+    fn.release.set()
+    scheduler.stop()
+
+    assert _statuses(scheduler, parent_id) == ['pending', 'pending']
+    assert scheduler.slices_retried == 1
+
+def test_late_fill_leaves_closed_parent_alone(scheduler):
+    """A slice that fills after being written off as abandoned is logged, not added to the parent"""
+    scheduler, fn = scheduler
+    parent_id = _run_first_slice(scheduler, fn)
+
+    scheduler.cancel(parent_id)
+    scheduler._fail_stale()  # stale_after=0: the executing child is presumed lost
+    fn.release.set()
+    scheduler.stop()
+
+    progress = scheduler.get_progress(parent_id)
+    assert progress['filled_amount'] == 0.0
+    assert progress['children'][0]['status'] == 'failed'
+    assert progress['children'][0]['output_amount'] == 15000.0
+    assert scheduler.late_fills == 1
+
+def test_slice_executing_at_cancel_still_counts(scheduler):
+    scheduler, fn = scheduler
+    parent_id = _run_first_slice(scheduler, fn)
+
+    scheduler.cancel(parent_id)
+    fn.release.set()
+    scheduler.stop()
+
+    progress = scheduler.get_progress(parent_id)
+    assert progress['status'] == 'cancelled'
+    assert progress['filled_amount'] == pytest.approx(100.0)
+    assert _statuses(scheduler, parent_id) == ['filled', 'cancelled']
+
+def test_slice_whose_trade_log_fails_is_filled_not_retried(app, monkeypatch):
+    """A slice that settled must never be executed again because logging its trade raised"""
+    session = app_module.db.session
+    session.query(models.ChildOrder).delete()
+    session.query(models.ParentOrder).delete()
+    session.commit()
+
+    otc_quote = {'available': True, 'pair': 'SOL/USDC', 'input_token': 'SOL', 'output_token': 'USDC',
+                 'input_amount': 1.0, 'output_amount': 150.0, 'price': 150.0}
+    executions = []
+
+    def execute_trade(quote, reservation_id=None):
+        executions.append(reservation_id)
+        app_module.otc_engine.release_liquidity(reservation_id)
+        return {'status': 'success', 'execution_time': 0.0}
+
+    def log_trade(trade_data, durable=None):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(app_module.quote_aggregator, 'get_quotes',
+                        lambda *args, **kwargs: {'quotes': {'otc': otc_quote}, 'timed_out': [], 'errors': {}})
+    monkeypatch.setattr(app_module.otc_engine, 'execute_trade', execute_trade)
+    monkeypatch.setattr(app_module.trade_logger, 'log_trade', log_trade)
+
+    scheduler = OrderScheduler(app_module._execute_slice, max_workers=1, retry_delay=0.0)
+    scheduler.init_db(app_module.db, models.ParentOrder, models.ChildOrder)
+    parent_id = scheduler.submit('SOL', 'USDC', 1.0, slices=1, interval_seconds=0)['id']
+    for _ in range(3):
+        scheduler.poll_once()
+        scheduler._pool.submit(lambda: None).result()  # one worker: returns once the slice is done
+    scheduler.stop()
+
+    progress = scheduler.get_progress(parent_id)
+    assert len(executions) == 1
+    assert progress['status'] == 'completed'
+    assert progress['children'][0]['status'] == 'filled'
+    assert progress['children'][0]['trade_id'] is None
+    assert 'trade log failed' in progress['children'][0]['error']
+    assert scheduler.unreconciled_fills == 1
@@ -0,0 +1,56 @@
+import pytest
+
+import app as app_module
+import otc_engine
+
+@pytest.fixture
+def engine(app, monkeypatch):
+    """The app's OTC engine with a fixed market price instead of the simulated volatility"""
+    engine = app_module.otc_engine
+    monkeypatch.setattr(engine, '_get_market_price', lambda input_token, output_token: 150.0)
+    return engine
+
+@pytest.mark.parametrize('pair', [('SOL', 'USDC'), ('SOL', 'USDT')])
+@pytest.mark.parametrize('amount', [300.0, 1000.0, 1800.0, 2500.0])
+def test_batch_quote_matches_single_quote(engine, pair, amount):
+    """get_otc_quotes for one size prices exactly like get_otc_quote, offset included"""
+    single = engine.get_otc_quote(*pair, amount)
+    batch = engine.get_otc_quotes(*pair, [amount])
+
+    assert single['available'] and batch['available'] == [True]
+    assert batch['price'] == [single['price']]
+    assert batch['output_amount'] == [single['output_amount']]
+    assert batch['spread'] == [single['spread']]
+
+def test_batch_quote_matches_single_quote_without_numpy(engine, monkeypatch):
+    monkeypatch.setattr(otc_engine, 'np', None)
+    single = engine.get_otc_quote('SOL', 'USDT', 1200.0)
+    batch = engine.get_otc_quotes('SOL', 'USDT', [1200.0])
+    assert batch['price'] == [single['price']]
+    assert batch['output_amount'] == [single['output_amount']]
+
+def test_price_segments_cost_what_a_quote_charges(engine):
+    """Filling a pool's segments up to its capacity pays the single quote for that size"""
+    segments = engine.get_price_segments('SOL', 'USDT')
+    capacity = sum(size for size, _ in segments)
+    output = sum(size * price for size, price in segments)
+
+    quote = engine.get_otc_quote('SOL', 'USDT', capacity)
+    assert output == pytest.approx(quote['output_amount'], rel=1e-9)
+
+def test_quote_is_fixed_while_its_version_is(app, monkeypatch):
+    """Two quotes with the same quote_version price identically, volatility included"""
+    engine = app_module.otc_engine
+    monkeypatch.setattr(engine, '_fetch_price', lambda symbol: {'SOL': 150.0, 'USDC': 1.0}[symbol])
+    for symbol in ('SOL', 'USDC'):
+        engine.price_cache.set(symbol, engine._fetch_price(symbol))
+
+    version = engine.quote_version('SOL', 'USDC')
+    first = engine.get_otc_quote('SOL', 'USDC', 500.0)
+    second = engine.get_otc_quote('SOL', 'USDC', 500.0)
+    assert engine.quote_version('SOL', 'USDC') == version
+    assert first['price'] == second['price']
+
+    # A refreshed price is a new version and a new draw
+    engine.price_cache.set('SOL', 150.0)
+    assert engine.quote_version('SOL', 'USDC') != version
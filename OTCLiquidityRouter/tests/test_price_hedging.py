@@ -0,0 +1,48 @@
+from jupiter_api import JupiterAPI
+
+def _api(monkeypatch, *sources):
+    monkeypatch.setenv('PRICE_HEDGE_DELAY', '5')
+    api = JupiterAPI()
+    api.price_sources = list(sources)
+    return api
+
+def test_half_open_fallback_keeps_its_trial_when_primary_answers(monkeypatch):
+    """A fallback that is never started must not use up its half-open breaker's single trial"""
+    calls = []
+
+    def primary(current_time, fallback_prices):
+        calls.append('primary')
+        return {'SOL': 100.0}
+
+    def fallback(current_time, fallback_prices):
+        calls.append('fallback')
+        return {'SOL': 101.0}
+
+    api = _api(monkeypatch, ('coingecko', primary), ('kraken', fallback))
+    breaker = api.price_breakers['kraken']
+    breaker.reset_timeout = 0.0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    assert api._fetch_hedged_prices(0.0, {}) == {'SOL': 100.0}
+    assert calls == ['primary']
+
+    # The trial slot is still free: the next call that reaches the fallback gets through
+    assert breaker.allow()
+
+def test_skips_open_breakers_and_reports_all_broken(monkeypatch):
+    def failing(current_time, fallback_prices):
+        return None
+
+    def fallback(current_time, fallback_prices):
+        return {'SOL': 101.0}
+
+    api = _api(monkeypatch, ('coingecko', failing), ('kraken', fallback))
+    for _ in range(api.price_breakers['coingecko'].failure_threshold):
+        api.price_breakers['coingecko'].record_failure()
+
+    assert api._fetch_hedged_prices(0.0, {}) == {'SOL': 101.0}
+
+    for _ in range(api.price_breakers['kraken'].failure_threshold):
+        api.price_breakers['kraken'].record_failure()
+    assert api._fetch_hedged_prices(0.0, {}) is None
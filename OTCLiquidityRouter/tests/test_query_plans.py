@@ -0,0 +1,34 @@
+import pytest
+
+import app as app_module
+import models
+from migrations import check_hot_query_plans, drop_indexes, ensure_indexes, hot_queries
+
+with app_module.app.app_context():
+    HOT_QUERIES = hot_queries(app_module.trade_logger, app_module.metrics_store)
+HOT_QUERY_NAMES = [query['name'] for query in HOT_QUERIES]
+
+@pytest.mark.parametrize('name', HOT_QUERY_NAMES)
+def test_hot_query_uses_its_index(app, name):
+    """EXPLAIN of every hot query, as the endpoints build it, names the index it relies on"""
+    ensure_indexes(app_module.db)
+    results = {result['name']: result for result in
+               check_hot_query_plans(app_module.db, app_module.trade_logger, app_module.metrics_store)}
+
+    result = results[name]
+    assert result['uses_index'], f"{name} does not use {result['index']}:\n{result['plan']}"
+
+def test_every_declared_index_serves_a_hot_query(app):
+    """Each Trade and SystemMetrics index is relied on by a checked query, and each expected index exists"""
+    declared = {index.name for model in (models.Trade, models.SystemMetrics)
+                for index in model.__table__.indexes}
+    expected = {query['index'] for query in HOT_QUERIES}
+    assert declared == expected
+
+def test_retired_indexes_are_dropped(app):
+    engine = app_module.db.engine
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_trade_execution_time ON trade (execution_time)")
+
+    assert drop_indexes(app_module.db) == ['ix_trade_execution_time']
+    assert drop_indexes(app_module.db) == []
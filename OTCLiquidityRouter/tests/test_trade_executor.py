@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+
+from liquidity_store import LiquidityStore
+from otc_engine import OTCEngine
+from trade_executor import ExecutorBusy, TradeExecutor
+
+class StalledEngine:
+    """OTC engine whose executions wait until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def execute_trade(self, quote, reservation_id=None):
+        assert self.release.wait(5)
+        return {'status': 'failed', 'error': 'released'}
+
+def test_submissions_beyond_max_pending_are_rejected():
+    engine = StalledEngine()
+    executor = TradeExecutor(engine, trade_logger=None, max_workers=1, max_pending=3)
+    quote = {'pair': 'SOL/USDC', 'input_amount': 100.0}
+
+    ids = [executor.submit(quote, {}) for _ in range(3)]
+    with pytest.raises(ExecutorBusy):
+        executor.submit(quote, {})
+
+    engine.release.set()
+    executor.shutdown(wait=True)
+    assert all(executor.get_status(execution_id)['status'] == 'failed' for execution_id in ids)
+
+def test_finished_executions_free_their_slots():
+    engine = StalledEngine()
+    engine.release.set()
+    executor = TradeExecutor(engine, trade_logger=None, max_workers=1, max_pending=1)
+    quote = {'pair': 'SOL/USDC', 'input_amount': 100.0}
+
+    for _ in range(3):
+        execution_id = executor.submit(quote, {})
+        # One worker runs jobs in order, so this returns once the execution has finished
+        executor._pool.submit(lambda: None).result()
+        assert executor.get_status(execution_id)['status'] == 'failed'
+    executor.shutdown(wait=True)
+
+class RecordingLogger:
+    def __init__(self):
+        self.trades = []
+
+    def log_trade(self, trade_data, durable=None):
+        self.trades.append(trade_data)
+        return len(self.trades)
+
+def test_queue_depth_is_capped_at_what_settles_before_reservations_expire():
+    store = LiquidityStore(reservation_ttl=0.4)
+    engine = OTCEngine(liquidity_store=store)
+    engine.execution_delay_range = (0.05, 0.1)
+    trade_logger = RecordingLogger()
+    # Two workers settle at most 0.4 // 0.1 = 4 rounds of trades within the reservation TTL
+    executor = TradeExecutor(engine, trade_logger, max_workers=2, max_pending=1000)
+
+    quote = {'available': True, 'pair': 'SOL/USDC', 'input_amount': 1.0, 'output_amount': 100.0,
+             'price': 100.0, 'input_token': 'SOL', 'output_token': 'USDC'}
+    # Stands in for the sweep that other trades' reservations trigger
+    sweeping = threading.Event()
+    def sweep():
+        while not sweeping.wait(0.02):
+            store.release_expired()
+    sweeper = threading.Thread(target=sweep)
+    sweeper.start()
+
+    ids = []
+    for _ in range(20):
+        reservation_id = engine.reserve_liquidity(quote)
+        try:
+            ids.append(executor.submit(quote, {'route': 'OTC'}, reservation_id=reservation_id))
+        except ExecutorBusy:
+            engine.release_liquidity(reservation_id)
+
+    executor.shutdown(wait=True)
+    sweeping.set()
+    sweeper.join()
+    errors = [executor.get_status(execution_id)['error'] for execution_id in ids]
+    assert errors == [None] * len(ids)
+    assert len(ids) == executor.max_pending == 8
+    assert len(trade_logger.trades) == 8
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import app as app_module
+import models
+from trade_logger import TradeLogger
+
+def _trade(**overrides):
+    trade = {'route': 'OTC', 'input_token': 'SOL', 'output_token': 'USDC', 'input_amount': 10.0,
+             'output_amount': 1500.0, 'price': 150.0, 'slippage': 0.0, 'jupiter_slippage': 0.1}
+    trade.update(overrides)
+    return trade
+
+@pytest.fixture
+def trade_db(app):
+    session = app_module.db.session
+    for model in (models.ChildOrder, models.Trade, models.SystemMetrics):
+        session.query(model).delete()
+    session.commit()
+    yield app_module.db
+    session.rollback()
+    session.query(models.Trade).delete()
+    session.query(models.SystemMetrics).delete()
+    session.commit()
+
+def _logger(db, **kwargs):
+    logger = TradeLogger(write_behind=True, flush_interval=60.0, **kwargs)
+    logger.init_db(db, models.Trade, models.SystemMetrics)
+    return logger
+
+def _trade_count(db):
+    db.session.rollback()
+    return db.session.query(models.Trade).count()
+
+def test_failing_trade_is_dead_lettered_without_blocking_the_rest(trade_db):
+    logger = _logger(trade_db, max_attempts=2)
+    logger.log_trade(_trade())
+    logger.log_trade(_trade(price=None))  # violates NOT NULL on every attempt
+    logger.log_trade(_trade())
+
+    assert logger.flush() == 2
+    assert _trade_count(trade_db) == 2
+    assert logger.get_stats()['buffered'] == 1
+
+    logger.log_trade(_trade())
+    assert logger.flush() == 1
+    stats = logger.get_stats()
+    assert stats['buffered'] == 0
+    assert stats['dead_lettered'] == 1
+    assert _trade_count(trade_db) == 3
+
+def test_full_buffer_falls_back_to_synchronous_writes(trade_db):
+    logger = _logger(trade_db, batch_size=100, max_buffer=2)
+    assert logger.log_trade(_trade()) is None
+    assert logger.log_trade(_trade()) is None
+
+    trade_id = logger.log_trade(_trade())
+    assert trade_id is not None
+    assert _trade_count(trade_db) == 1
+    assert logger.get_stats()['buffer_overflows'] == 1
+    assert logger.flush() == 2
+
+def test_buffered_trade_is_flushed_without_write_behind(trade_db):
+    logger = TradeLogger(write_behind=False, flush_interval=0.01)
+    logger.init_db(trade_db, models.Trade, models.SystemMetrics, app=app_module.app)
+    assert logger.log_trade(_trade(), durable=False) is None
+
+    deadline = time.monotonic() + 5
+    while _trade_count(trade_db) == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _trade_count(trade_db) == 1
@@ -0,0 +1,181 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+class ExecutorBusy(Exception):
+    """The executor already holds max_pending unfinished executions"""
+
+def settleable_depth(max_workers: int, reservation_ttl: float, max_settle_seconds: float) -> Optional[int]:
+    """
+    Unfinished executions that can all settle before a reservation taken at submit expires
+
+    The job at queue position p waits for at most p // max_workers rounds of earlier
+    settlements and then runs its own, so every accepted job settles within reservation_ttl
+    while p // max_workers + 1 <= reservation_ttl / max_settle_seconds.
+
+    Returns:
+        Queue depth, or None if settlements take no time
+    """
+    if max_settle_seconds <= 0:
+        return None
+    return max(1, max_workers * int(reservation_ttl // max_settle_seconds))
+
+class TradeExecutor:
+    """Background executor that settles OTC trades off the request thread"""
+
+    def __init__(self, otc_engine, trade_logger, max_workers: int = 8, max_tracked: int = 10000,
+                 max_pending: Optional[int] = None):
+        """
+        Args:
+            otc_engine: OTCEngine that executes the trades
+            trade_logger: TradeLogger that records settled trades
+            max_workers: Trades settled concurrently
+            max_tracked: Execution records kept for get_status; the oldest finished ones are dropped beyond it
+            max_pending: Unfinished (pending or executing) executions accepted before submit raises
+                         ExecutorBusy. Unfinished records are never dropped, so this bounds both the
+                         work queue and the records it pins in memory. Capped at settleable_depth for
+                         the engine's reservation TTL and longest execution delay, so no accepted trade
+                         outlives its liquidity reservation; derived from them when omitted.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.otc_engine = otc_engine
+        self.trade_logger = trade_logger
+        self.app = None
+        self.max_workers = max_workers
+        self.max_tracked = max_tracked
+        self.max_pending = self._bounded_depth(max_pending)
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='otc-exec')
+        self._lock = threading.Lock()
+        self._executions = {}  # execution_id -> status record (insertion ordered)
+        self._unfinished = 0
+
+    def _bounded_depth(self, max_pending: Optional[int]) -> int:
+        store = getattr(self.otc_engine, 'liquidity_store', None)
+        delay_range = getattr(self.otc_engine, 'execution_delay_range', None)
+        depth = None
+        if store is not None and delay_range:
+            depth = settleable_depth(self.max_workers, store.reservation_ttl, max(delay_range))
+
+        if depth is None:
+            return max_pending if max_pending is not None else 1000
+        if max_pending is not None and max_pending > depth:
+            self.logger.warning(f"max_pending {max_pending} exceeds the {depth} executions that can settle "
+                                f"within the {store.reservation_ttl}s reservation TTL; using {depth}")
+            return depth
+        return max_pending if max_pending is not None else depth
+
+    def init_app(self, app):
+        """Attach the Flask app so background jobs can open an app context"""
+        self.app = app
+
+    def submit(self, quote: Dict[str, Any], trade_data: Dict[str, Any], reservation_id: Optional[str] = None) -> str:
+        """
+        Accept an OTC trade for background settlement
+
+        Args:
+            quote: OTC quote from OTCEngine.get_otc_quote
+            trade_data: Trade record to log once settled (execution_time is filled in)
+            reservation_id: Liquidity already reserved for the quote (reserved on execution if omitted)
+
+        Returns:
+            Execution ID that can be polled with get_status
+
+        Raises:
+            ExecutorBusy: max_pending executions are already unfinished; the caller still owns its reservation
+        """
+        execution_id = uuid.uuid4().hex
+        record = {
+            'execution_id': execution_id,
+            'status': 'pending',
+            'route': trade_data.get('route', 'OTC'),
+            'pair': quote.get('pair'),
+            'input_amount': quote.get('input_amount'),
+            'submitted_at': datetime.now().isoformat(),
+            'completed_at': None,
+            'trade_id': None,
+            'tx_signature': None,
+            'error': None
+        }
+
+        with self._lock:
+            if self._unfinished >= self.max_pending:
+                raise ExecutorBusy(f"{self._unfinished} OTC executions are already waiting to settle")
+            self._unfinished += 1
+            self._executions[execution_id] = record
+            self._evict_completed()
+
+        self._pool.submit(self._run, execution_id, quote, trade_data, reservation_id)
+        return execution_id
+
+    def get_status(self, execution_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the current state of a submitted execution
+
+        Args:
+            execution_id: ID returned by submit
+
+        Returns:
+            Copy of the execution record or None if unknown
+        """
+        with self._lock:
+            record = self._executions.get(execution_id)
+            return dict(record) if record else None
+
+    def _run(self, execution_id: str, quote: Dict[str, Any], trade_data: Dict[str, Any],
+             reservation_id: Optional[str] = None):
+        """Settle the trade, update pool liquidity and log it"""
+        self._update(execution_id, status='executing')
+
+        try:
+            execution_result = self.otc_engine.execute_trade(quote, reservation_id=reservation_id)
+            if execution_result.get('status') != 'success':
+                self._update(execution_id, status='failed',
+                             error=execution_result.get('error', 'Execution failed'),
+                             completed_at=datetime.now().isoformat())
+                return
+
+            trade_data = dict(trade_data, execution_time=execution_result['execution_time'])
+
+            if self.app is not None:
+                with self.app.app_context():
+                    trade_id = self.trade_logger.log_trade(trade_data)
+            else:
+                trade_id = self.trade_logger.log_trade(trade_data)
+
+            self._update(execution_id, status='completed', trade_id=trade_id,
+                         tx_signature=execution_result.get('tx_signature'),
+                         completed_at=datetime.now().isoformat())
+
+        except Exception as e:
+            self.logger.error(f"Error in background OTC execution {execution_id}: {e}")
+            self._update(execution_id, status='failed', error=str(e),
+                         completed_at=datetime.now().isoformat())
+
+        finally:
+            with self._lock:
+                self._unfinished -= 1
+
+    def _update(self, execution_id: str, **fields):
+        with self._lock:
+            record = self._executions.get(execution_id)
+            if record is not None:
+                record.update(fields)
+
+    def _evict_completed(self):
+        """Drop the oldest finished executions once the tracking table is full"""
+        if len(self._executions) <= self.max_tracked:
+            return
+
+        for execution_id in list(self._executions):
+            if len(self._executions) <= self.max_tracked:
+                break
+            if self._executions[execution_id]['status'] in ('completed', 'failed'):
+                del self._executions[execution_id]
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for in-flight settlements"""
+        self._pool.shutdown(wait=wait)
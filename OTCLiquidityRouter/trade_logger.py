@@ -1,64 +1,303 @@
+import atexit
+import base64
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from sqlalchemy import func, desc
+from typing import List, Dict, Any, Optional, Tuple
+from types import SimpleNamespace
+from sqlalchemy import func, desc, insert, case, or_, and_, text, cast, Integer, select, tuple_, extract
+from sqlalchemy.dialects import postgresql, sqlite
 import json
 
+# Trade size brackets for cost savings analysis (bounds are multiples of ROLLUP_SIZE_BIN)
+SIZE_BRACKETS = [
+    (0, 100, 'Small (0-100 SOL)'),
+    (100, 500, 'Medium (100-500 SOL)'),
+    (500, 1000, 'Large (500-1000 SOL)'),
+    (1000, float('inf'), 'Jumbo (1000+ SOL)')
+]
+
+def brackets_from_edges(edges: List[float]) -> List[Tuple[float, float, str]]:
+    """
+    Build contiguous size brackets from ascending bracket edges
+    
+    The last bracket is open-ended, e.g. [0, 100, 500] gives 0-100, 100-500 and 500+.
+    
+    Args:
+        edges: Strictly ascending lower bounds in input token units
+        
+    Returns:
+        (min_size, max_size, label) tuples in the SIZE_BRACKETS format
+    """
+    if not edges or any(b <= a for a, b in zip(edges, edges[1:])):
+        raise ValueError("Bracket edges must be a non-empty, strictly ascending list")
+    
+    bounds = list(edges) + [float('inf')]
+    return [
+        (lower, upper, f"{lower:g}-{upper:g} SOL" if upper != float('inf') else f"{lower:g}+ SOL")
+        for lower, upper in zip(bounds, bounds[1:])
+    ]
+
+# Trade fields returned by the API and exports, in Trade.to_dict order
+TRADE_FIELDS = ('id', 'route', 'input_token', 'output_token', 'input_amount', 'output_amount', 'price',
+                'slippage', 'jupiter_slippage', 'cost_savings', 'execution_time', 'created_at')
+
+# Largest page served by get_trades_page
+MAX_PAGE_SIZE = 500
+
+# Width of the per-size rollup buckets, in input token units
+ROLLUP_SIZE_BIN = 100
+
+# Additive TradeRollup columns, incremented on every insert
+ROLLUP_SUM_COLUMNS = ('trade_count', 'volume', 'output_volume', 'cost_savings',
+                      'slippage_sum', 'jupiter_slippage_sum', 'high_slippage_count')
+
 class TradeLogger:
     """Comprehensive trade logging and analytics system"""
     
-    def __init__(self):
+    def __init__(self, write_behind: bool = False, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_buffer: int = 10000, max_attempts: int = 5):
+        """
+        Args:
+            write_behind: Buffer trades by default instead of writing each one synchronously
+            batch_size: Buffered trades that wake the writer thread for a flush
+            flush_interval: Seconds between flushes of a partial batch
+            max_buffer: Buffered trades beyond which log_trade writes synchronously instead
+            max_attempts: Failed flushes a trade survives before it is dead-lettered to the error log
+        """
         self.logger = logging.getLogger(__name__)
         self.db = None
         self.Trade = None
         self.SystemMetrics = None
+        self.TradeRollup = None
+        self.app = None
+        
+        # Write-behind mode: buffer trades and flush them in one transaction
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_attempts = max_attempts
+        self._buffer = []  # ((trade_row, metric_rows), failed attempts) tuples
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_wake = threading.Event()
+        self._flusher = None
+        
+        # Metrics
+        self.flushed = 0
+        self.flush_failures = 0
+        self.dead_lettered = 0
+        self.buffer_overflows = 0
     
-    def init_db(self, db, Trade, SystemMetrics):
+    def init_db(self, db, Trade, SystemMetrics, app=None, TradeRollup=None):
         """Initialize database connections"""
         self.db = db
         self.Trade = Trade
         self.SystemMetrics = SystemMetrics
+        self.TradeRollup = TradeRollup
+        self.app = app
     
-    def log_trade(self, trade_data: Dict[str, Any]) -> int:
+
+    def log_trade(self, trade_data: Dict[str, Any], durable: Optional[bool] = None) -> Optional[int]:
         """
         Log a completed trade to the database
         
+        The trade row and its metrics are written in a single transaction. In
+        write-behind mode the trade is buffered instead and flushed with others
+        once batch_size trades are queued or flush_interval seconds pass, by a
+        writer thread started with the first buffered trade. A full buffer
+        (max_buffer trades) makes log_trade write synchronously instead.
+        
         Args:
             trade_data: Dictionary containing trade information
+            durable: Write synchronously even in write-behind mode (defaults to
+                     synchronous only when write-behind is off)
             
         Returns:
-            Trade ID of the logged trade
+            Trade ID of the logged trade, or None if it was buffered
         """
-        try:
-            trade = self.Trade(
-                route=trade_data['route'],
-                input_token=trade_data['input_token'],
-                output_token=trade_data['output_token'],
-                input_amount=trade_data['input_amount'],
-                output_amount=trade_data['output_amount'],
-                price=trade_data['price'],
-                slippage=trade_data['slippage'],
-                jupiter_slippage=trade_data['jupiter_slippage'],
-                cost_savings=trade_data.get('cost_savings', 0.0),
-                execution_time=trade_data.get('execution_time', datetime.now())
-            )
-            
-            self.db.session.add(trade)
-            self.db.session.commit()
+        entry = self._build_entry(trade_data)
+        
+        if durable is None:
+            durable = not self.write_behind
+        
+        if not durable:
+            with self._buffer_lock:
+                overflow = len(self._buffer) >= self.max_buffer
+                if not overflow:
+                    self._buffer.append((entry, 0))
+                    batch_ready = len(self._buffer) >= self.batch_size
+            if not overflow:
+                self._ensure_flusher()
+                if batch_ready:
+                    self._flush_wake.set()
+                return None
             
-            self.logger.info(f"Trade logged: ID={trade.id}, Route={trade.route}, "
-                           f"Amount={trade.input_amount} {trade.input_token}")
+            # Flushes are failing or falling behind: push back on the caller with a synchronous write
+            with self._buffer_lock:
+                self.buffer_overflows += 1
+        
+        try:
+            trade_id = self._persist([entry])[0]
             
-            # Record system metrics
-            self._record_trade_metrics(trade)
+            self.logger.info(f"Trade logged: ID={trade_id}, Route={entry[0]['route']}, "
+                           f"Amount={entry[0]['input_amount']} {entry[0]['input_token']}")
             
-            return trade.id
+            return trade_id
             
         except Exception as e:
             self.logger.error(f"Error logging trade: {e}")
             self.db.session.rollback()
             raise
     
+    def flush(self) -> int:
+        """
+        Write all buffered trades and metrics in one transaction
+        
+        If the batch fails, each trade is retried on its own so one bad row
+        cannot hold back the rest. Trades that still fail go back to the front
+        of the buffer; after max_attempts failed flushes a trade is dropped and
+        logged in full as a dead letter.
+        
+        Returns:
+            Number of trades written
+        """
+        with self._flush_lock:
+            with self._buffer_lock:
+                pending, self._buffer = self._buffer, []
+            
+            if not pending:
+                return 0
+            
+            if self.app is not None:
+                with self.app.app_context():
+                    written, failed = self._flush_pending(pending)
+            else:
+                written, failed = self._flush_pending(pending)
+            
+            retry = []
+            for entry, attempts in failed:
+                if attempts < self.max_attempts:
+                    retry.append((entry, attempts))
+                else:
+                    self.logger.error(f"Dropping trade after {attempts} failed writes (dead letter): "
+                                      f"{json.dumps(entry[0], default=str)}")
+            
+            with self._buffer_lock:
+                # In front of anything queued since, for the next attempt
+                self._buffer[:0] = retry
+                self.flushed += written
+                self.dead_lettered += len(failed) - len(retry)
+            
+            if written:
+                self.logger.info(f"Flushed {written} buffered trades")
+            return written
+    
+    def _flush_pending(self, pending: List[Tuple[Tuple[Dict[str, Any], List[Dict[str, Any]]], int]]):
+        """Persist buffered entries as one batch, falling back to one at a time; returns (written, failed)"""
+        try:
+            self._persist([entry for entry, _ in pending])
+            return len(pending), []
+        except Exception as e:
+            self.logger.error(f"Error flushing {len(pending)} buffered trades: {e}")
+            with self._buffer_lock:
+                self.flush_failures += 1
+        
+        written, failed = 0, []
+        for entry, attempts in pending:
+            try:
+                self._persist([entry])
+                written += 1
+            except Exception as e:
+                self.logger.error(f"Error writing buffered trade: {e}")
+                failed.append((entry, attempts + 1))
+        return written, failed
+    
+    def _ensure_flusher(self):
+        """Start the writer thread on the first buffered trade"""
+        if self._flusher is not None:
+            return
+        with self._buffer_lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, name='trade-log-flusher', daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._buffer_lock:
+            return {
+                'write_behind': self.write_behind,
+                'buffered': len(self._buffer),
+                'max_buffer': self.max_buffer,
+                'flushed': self.flushed,
+                'flush_failures': self.flush_failures,
+                'dead_lettered': self.dead_lettered,
+                'buffer_overflows': self.buffer_overflows
+            }
+    
+    def _flush_loop(self):
+        while True:
+            self._flush_wake.wait(self.flush_interval)
+            self._flush_wake.clear()
+            self.flush()
+    
+    def _persist(self, entries: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> List[int]:
+        """
+        Bulk insert trades and their metrics, committing once
+        
+        Args:
+            entries: (trade_row, metric_rows) tuples from _build_entry
+            
+        Returns:
+            IDs of the inserted trades, in input order
+        """
+        session = self.db.session
+        try:
+            trade_rows = [trade_row for trade_row, _ in entries]
+            metric_rows = [row for _, rows in entries for row in rows]
+            
+            result = session.execute(
+                insert(self.Trade).returning(self.Trade.id, sort_by_parameter_order=True),
+                trade_rows
+            )
+            trade_ids = list(result.scalars())
+            
+            if metric_rows:
+                session.execute(insert(self.SystemMetrics), metric_rows)
+            
+            if self.TradeRollup is not None:
+                deltas = {}
+                for trade_row in trade_rows:
+                    self._add_rollup_deltas(deltas, trade_row)
+                self._apply_rollup_deltas(deltas)
+            
+            session.commit()
+            return trade_ids
+            
+        except Exception:
+            session.rollback()
+            raise
+    
+    def _build_entry(self, trade_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Column values for a trade row plus its metric rows"""
+        now = datetime.utcnow()
+        trade_row = {
+            'route': trade_data['route'],
+            'input_token': trade_data['input_token'],
+            'output_token': trade_data['output_token'],
+            'input_amount': trade_data['input_amount'],
+            'output_amount': trade_data['output_amount'],
+            'price': trade_data['price'],
+            'slippage': trade_data['slippage'],
+            'jupiter_slippage': trade_data['jupiter_slippage'],
+            'cost_savings': trade_data.get('cost_savings', 0.0),
+            'execution_time': trade_data.get('execution_time', datetime.now()),
+            'created_at': now
+        }
+        return trade_row, self._build_trade_metrics(trade_row, now)
+    
     def get_recent_trades(self, limit: int = 20) -> List[Dict[str, Any]]:
         """
         Get recent trades from the database
@@ -70,10 +309,7 @@ class TradeLogger:
             List of trade dictionaries
         """
         try:
-            trades = self.db.session.query(self.Trade)\
-                .order_by(desc(self.Trade.created_at))\
-                .limit(limit)\
-                .all()
+            trades = self.db.session.execute(self.recent_trades_statement(limit)).scalars().all()
             
             return [trade.to_dict() for trade in trades]
             
@@ -81,6 +317,140 @@ class TradeLogger:
             self.logger.error(f"Error getting recent trades: {e}")
             return []
     
+    def get_trades_page(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of trades, newest first, using keyset pagination
+        
+        Each page seeks past the (created_at, id) of the previous page's last
+        row on the (created_at, id) index, so deep pages cost the same as the
+        first one.
+        
+        Args:
+            limit: Page size, capped at MAX_PAGE_SIZE
+            cursor: Opaque cursor returned with the previous page
+            
+        Returns:
+            Trade dictionaries and the cursor for the next page (None on the last page)
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        rows = self.db.session.execute(self.trades_page_statement(limit, cursor)).all()
+        trades = [self._trade_row_to_dict(row) for row in rows[:limit]]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = self.encode_cursor(last.created_at, last.id)
+        
+        return trades, next_cursor
+    
+    def iter_trades(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                    batch_size: int = 1000):
+        """
+        Stream trades oldest first without loading them all into memory
+        
+        Selects plain columns rather than ORM objects and fetches them in
+        batches; on PostgreSQL this uses a server-side cursor.
+        
+        Args:
+            since: Only trades created at or after this time
+            until: Only trades created before this time
+            batch_size: Rows fetched per round trip
+            
+        Yields:
+            Trade dictionaries
+        """
+        statement = self.trades_range_statement(since, until).execution_options(yield_per=batch_size)
+        
+        for row in self.db.session.execute(statement):
+            yield self._trade_row_to_dict(row)
+    
+    def get_trades_after(self, trade_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get trades with an ID greater than trade_id, oldest first
+        
+        Args:
+            trade_id: Last trade ID the caller has seen
+            limit: Maximum number of trades to return
+            
+        Returns:
+            List of trade dictionaries
+        """
+        statement = select(*self._trade_columns())\
+            .where(self.Trade.id > trade_id)\
+            .order_by(self.Trade.id)\
+            .limit(limit)
+        return [self._trade_row_to_dict(row) for row in self.db.session.execute(statement)]
+    
+    def get_latest_trade_id(self) -> int:
+        """Highest trade ID, or 0 when there are no trades (a cheap change marker)"""
+        return self.db.session.query(func.max(self.Trade.id)).scalar() or 0
+    
+    # Statements for the latency-sensitive reads, built here so migrations.hot_queries
+    # EXPLAINs exactly what the endpoints run
+    
+    def recent_trades_statement(self, limit: int = 20):
+        """Newest trades as ORM objects (get_recent_trades)"""
+        return select(self.Trade).order_by(desc(self.Trade.created_at)).limit(limit)
+    
+    def trades_page_statement(self, limit: int, cursor: Optional[str] = None):
+        """One keyset page plus one row to detect the next page (get_trades_page)"""
+        Trade = self.Trade
+        statement = select(*self._trade_columns())
+        if cursor:
+            created_at, trade_id = self.decode_cursor(cursor)
+            statement = statement.where(tuple_(Trade.created_at, Trade.id) < tuple_(created_at, trade_id))
+        return statement.order_by(desc(Trade.created_at), desc(Trade.id)).limit(limit + 1)
+    
+    def trades_range_statement(self, since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """Trades created in [since, until), oldest first (iter_trades and the CSV export)"""
+        Trade = self.Trade
+        statement = select(*self._trade_columns())
+        if since is not None:
+            statement = statement.where(Trade.created_at >= since)
+        if until is not None:
+            statement = statement.where(Trade.created_at < until)
+        return statement.order_by(Trade.created_at, Trade.id)
+    
+    def route_counts_statement(self):
+        """Trades per route, without rollups (get_route_distribution)"""
+        return select(self.Trade.route, func.count(self.Trade.id)).group_by(self.Trade.route)
+    
+    def hourly_volume_statement(self, since: datetime):
+        """Volume per hour of day since a time, without rollups (get_hourly_volume_profile)"""
+        hour = extract('hour', self.Trade.created_at)
+        return select(hour, func.sum(self.Trade.input_amount))\
+            .where(self.Trade.created_at >= since).group_by(hour)
+    
+    def daily_savings_statement(self, since: datetime):
+        """Cost savings per day since a time, without rollups (get_cost_savings_analysis)"""
+        day = func.date(self.Trade.created_at)
+        return select(day.label('date'), func.sum(self.Trade.cost_savings).label('savings'))\
+            .where(self.Trade.created_at >= since).group_by(day).order_by('date')
+    
+    @staticmethod
+    def encode_cursor(created_at: datetime, trade_id: int) -> str:
+        return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{trade_id}".encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Parse a pagination cursor, raising ValueError if it is malformed"""
+        try:
+            created_at, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(created_at), int(trade_id)
+        except Exception:
+            raise ValueError("Invalid pagination cursor")
+    
+    def _trade_columns(self):
+        return [getattr(self.Trade, field) for field in TRADE_FIELDS]
+    
+    @staticmethod
+    def _trade_row_to_dict(row) -> Dict[str, Any]:
+        """Trade.to_dict for a column-only result row"""
+        trade = dict(row._mapping)
+        for field in ('execution_time', 'created_at'):
+            trade[field] = trade[field].isoformat() if trade[field] else None
+        return trade
+    
     def get_trade_statistics(self) -> Dict[str, Any]:
         """
         Get comprehensive trade statistics
@@ -89,34 +459,23 @@ class TradeLogger:
             Dictionary containing various trade statistics
         """
         try:
-            # Basic trade counts
-            total_trades = self.db.session.query(self.Trade).count()
-            dex_trades = self.db.session.query(self.Trade).filter(self.Trade.route == 'DEX').count()
-            otc_trades = self.db.session.query(self.Trade).filter(self.Trade.route == 'OTC').count()
-            
-            # Volume statistics
-            total_volume = self.db.session.query(func.sum(self.Trade.input_amount)).scalar() or 0
-            dex_volume = self.db.session.query(func.sum(self.Trade.input_amount))\
-                .filter(self.Trade.route == 'DEX').scalar() or 0
-            otc_volume = self.db.session.query(func.sum(self.Trade.input_amount))\
-                .filter(self.Trade.route == 'OTC').scalar() or 0
-            
-            # Cost savings
-            total_savings = self.db.session.query(func.sum(self.Trade.cost_savings)).scalar() or 0
-            
-            # Average slippage
-            avg_dex_slippage = self.db.session.query(func.avg(self.Trade.slippage))\
-                .filter(self.Trade.route == 'DEX').scalar() or 0
-            avg_jupiter_slippage = self.db.session.query(func.avg(self.Trade.jupiter_slippage)).scalar() or 0
-            
-            # Today's statistics
-            today = datetime.now().date()
-            today_trades = self.db.session.query(self.Trade)\
-                .filter(func.date(self.Trade.created_at) == today).count()
-            today_volume = self.db.session.query(func.sum(self.Trade.input_amount))\
-                .filter(func.date(self.Trade.created_at) == today).scalar() or 0
-            today_savings = self.db.session.query(func.sum(self.Trade.cost_savings))\
-                .filter(func.date(self.Trade.created_at) == today).scalar() or 0
+            if self.TradeRollup is not None:
+                row = self._trade_totals_from_rollups()
+            else:
+                row = self._trade_totals_from_scan()
+            
+            total_trades = row.total_trades or 0
+            dex_trades = row.dex_trades or 0
+            otc_trades = row.otc_trades or 0
+            total_volume = row.total_volume or 0
+            dex_volume = row.dex_volume or 0
+            otc_volume = row.otc_volume or 0
+            total_savings = row.total_savings or 0
+            avg_dex_slippage = row.avg_dex_slippage or 0
+            avg_jupiter_slippage = row.avg_jupiter_slippage or 0
+            today_trades = row.today_trades or 0
+            today_volume = row.today_volume or 0
+            today_savings = row.today_savings or 0
             
             return {
                 'total_trades': total_trades,
@@ -146,9 +505,15 @@ class TradeLogger:
             Route distribution data for charts
         """
         try:
+            if self.TradeRollup is not None:
+                rows = self._rollup_rows('route')
+                return {
+                    'by_count': [{'route': row.route, 'count': row.trade_count} for row in rows],
+                    'by_volume': [{'route': row.route, 'volume': float(row.volume)} for row in rows]
+                }
+            
             # Route distribution by count
-            route_counts = self.db.session.query(self.Trade.route, func.count(self.Trade.id))\
-                .group_by(self.Trade.route).all()
+            route_counts = self.db.session.execute(self.route_counts_statement()).all()
             
             # Route distribution by volume
             route_volumes = self.db.session.query(self.Trade.route, func.sum(self.Trade.input_amount))\
@@ -163,111 +528,162 @@ class TradeLogger:
             self.logger.error(f"Error getting route distribution: {e}")
             return {'by_count': [], 'by_volume': []}
     
-    def get_cost_savings_analysis(self) -> Dict[str, Any]:
+    def get_hourly_volume_profile(self, days: int = 14) -> List[float]:
+        """
+        Get the share of traded volume in each hour of the day (UTC)
+        
+        Args:
+            days: Number of most recent days to average over
+            
+        Returns:
+            24 fractions summing to 1, or an empty list without trade history
+        """
+        since = datetime.utcnow() - timedelta(days=days)
+        volumes = [0.0] * 24
+        
+        if self.TradeRollup is not None:
+            R = self.TradeRollup
+            rows = self.db.session.query(R.bucket, func.sum(R.volume)).filter(
+                R.dimension == 'hour', R.bucket >= since.strftime('%Y-%m-%dT%H')
+            ).group_by(R.bucket).all()
+            for bucket, volume in rows:
+                volumes[int(bucket[-2:])] += volume or 0.0
+        else:
+            rows = self.db.session.execute(self.hourly_volume_statement(since)).all()
+            for hour_of_day, volume in rows:
+                volumes[int(hour_of_day)] += volume or 0.0
+        
+        total = sum(volumes)
+        return [volume / total for volume in volumes] if total > 0 else []
+    
+    def get_cost_savings_analysis(self, brackets: Optional[List[Tuple[float, float, str]]] = None) -> Dict[str, Any]:
         """
         Get detailed cost savings analysis
         
+        The number of queries does not depend on the number of brackets: the
+        bracket totals come from the size rollups when every bracket edge
+        falls on a rollup bin boundary, otherwise from one grouped CASE query.
+        
+        Args:
+            brackets: (min_size, max_size, label) size brackets, SIZE_BRACKETS by default
+            
         Returns:
             Cost savings analysis data
         """
+        brackets = brackets or SIZE_BRACKETS
         try:
+            if self.TradeRollup is not None and self._brackets_fit_rollups(brackets):
+                return self._cost_savings_from_rollups(brackets)
+            
             # Daily cost savings for the last 30 days
             thirty_days_ago = datetime.now() - timedelta(days=30)
-            daily_savings = self.db.session.query(
-                func.date(self.Trade.created_at).label('date'),
-                func.sum(self.Trade.cost_savings).label('savings')
-            ).filter(self.Trade.created_at >= thirty_days_ago)\
-             .group_by(func.date(self.Trade.created_at))\
-             .order_by('date').all()
-            
-            # Cost savings by trade size
-            size_brackets = [
-                (0, 100, 'Small (0-100 SOL)'),
-                (100, 500, 'Medium (100-500 SOL)'),
-                (500, 1000, 'Large (500-1000 SOL)'),
-                (1000, float('inf'), 'Jumbo (1000+ SOL)')
-            ]
-            
-            savings_by_size = []
-            for min_size, max_size, label in size_brackets:
-                query = self.db.session.query(func.sum(self.Trade.cost_savings))\
-                    .filter(self.Trade.input_amount >= min_size)
-                
-                if max_size != float('inf'):
-                    query = query.filter(self.Trade.input_amount < max_size)
-                
-                savings = query.scalar() or 0
-                savings_by_size.append({
-                    'category': label,
-                    'savings': float(savings)
-                })
-            
-            # Average savings per trade by route
-            avg_savings_otc = self.db.session.query(func.avg(self.Trade.cost_savings))\
-                .filter(self.Trade.route == 'OTC').scalar() or 0
+            daily_savings = self.db.session.execute(self.daily_savings_statement(thirty_days_ago)).all()
             
-            return {
-                'daily_savings': [
-                    {'date': str(date), 'savings': float(savings or 0)}
-                    for date, savings in daily_savings
+            # Per-bracket totals; trades outside every bracket land in group -1,
+            # which still counts toward the OTC average
+            Trade = self.Trade
+            bracket_index = case(
+                *[
+                    (Trade.input_amount >= min_size if max_size == float('inf')
+                     else and_(Trade.input_amount >= min_size, Trade.input_amount < max_size), i)
+                    for i, (min_size, max_size, _) in enumerate(brackets)
                 ],
-                'savings_by_size': savings_by_size,
-                'avg_savings_per_otc_trade': round(avg_savings_otc, 2),
-                'total_savings': round(sum(item['savings'] for item in savings_by_size), 2)
-            }
+                else_=-1
+            )
+            is_otc = Trade.route == 'OTC'
+            rows = self.db.session.query(
+                bracket_index,
+                func.count(Trade.id),
+                func.sum(Trade.cost_savings),
+                func.sum(case((is_otc, 1), else_=0)),
+                func.sum(case((is_otc, Trade.cost_savings), else_=0))
+            ).group_by(bracket_index).all()
+            
+            totals = {index: (count, savings or 0, otc_count or 0, otc_savings or 0)
+                      for index, count, savings, otc_count, otc_savings in rows}
+            return self._cost_savings_response(
+                [(str(date), savings) for date, savings in daily_savings], brackets, totals)
             
         except Exception as e:
             self.logger.error(f"Error getting cost savings analysis: {e}")
             return {'daily_savings': [], 'savings_by_size': []}
     
-    def get_slippage_analysis(self) -> Dict[str, Any]:
+    @staticmethod
+    def _cost_savings_response(daily_savings: List[Tuple[str, float]], brackets: List[Tuple[float, float, str]],
+                               totals: Dict[int, Tuple[int, float, int, float]]) -> Dict[str, Any]:
+        """
+        Shape the cost savings response from per-bracket totals
+        
+        Args:
+            daily_savings: (date, savings) pairs
+            brackets: Size brackets in response order
+            totals: Bracket index (-1 for unbracketed trades) to
+                    (trade_count, savings, otc_count, otc_savings)
+        """
+        savings_by_size = []
+        for i, (min_size, max_size, label) in enumerate(brackets):
+            count, savings, otc_count, otc_savings = totals.get(i, (0, 0.0, 0, 0.0))
+            savings_by_size.append({
+                'category': label,
+                'min_size': min_size,
+                'max_size': max_size if max_size != float('inf') else None,
+                'savings': float(savings),
+                'trade_count': count,
+                'otc_share': round(otc_count / count, 4) if count else 0,
+                'avg_savings': round(savings / count, 2) if count else 0
+            })
+        
+        otc_count = sum(total[2] for total in totals.values())
+        otc_savings = sum(total[3] for total in totals.values())
+        avg_savings_otc = otc_savings / otc_count if otc_count else 0
+        
+        return {
+            'daily_savings': [
+                {'date': date, 'savings': float(savings or 0)}
+                for date, savings in daily_savings
+            ],
+            'savings_by_size': savings_by_size,
+            'avg_savings_per_otc_trade': round(avg_savings_otc, 2),
+            'total_savings': round(sum(item['savings'] for item in savings_by_size), 2)
+        }
+    
+    def get_slippage_analysis(self, binning: str = 'size', bin_width: Optional[float] = None,
+                              bins: int = 20) -> Dict[str, Any]:
         """
         Get slippage analysis data
         
+        Trades are bucketed by size in the database, so only one row per bin
+        reaches Python regardless of table size.
+        
+        Args:
+            binning: 'size' for fixed-width size bins or 'count' for quantile
+                     bins holding roughly equal numbers of trades
+            bin_width: Width of size bins in input token units (defaults to
+                       ROLLUP_SIZE_BIN, which is served from the rollups)
+            bins: Number of quantile bins for count-based binning
+            
         Returns:
             Slippage analysis for DEX vs OTC routing decisions
         """
         try:
-            # Slippage distribution for different trade sizes
-            slippage_data = self.db.session.query(
-                self.Trade.input_amount,
-                self.Trade.jupiter_slippage,
-                self.Trade.route
-            ).order_by(self.Trade.input_amount).all()
-            
-            # Group by trade size ranges
-            size_ranges = []
-            current_range = []
-            range_size = 100  # 100 SOL ranges
-            
-            for trade in slippage_data:
-                current_range.append({
-                    'amount': trade.input_amount,
-                    'slippage': trade.jupiter_slippage,
-                    'route': trade.route
-                })
-                
-                if len(current_range) >= 10:  # Group every 10 trades
-                    avg_amount = sum(t['amount'] for t in current_range) / len(current_range)
-                    avg_slippage = sum(t['slippage'] for t in current_range) / len(current_range)
-                    otc_ratio = sum(1 for t in current_range if t['route'] == 'OTC') / len(current_range)
-                    
-                    size_ranges.append({
-                        'avg_amount': round(avg_amount, 2),
-                        'avg_slippage': round(avg_slippage, 4),
-                        'otc_ratio': round(otc_ratio, 2)
-                    })
-                    current_range = []
+            if binning == 'count':
+                size_ranges = self._slippage_by_quantile(bins)
+            elif binning == 'size':
+                if bin_width is None and self.TradeRollup is not None:
+                    size_ranges = self._slippage_bins_from_rollups()
+                else:
+                    size_ranges = self._slippage_by_width(bin_width or ROLLUP_SIZE_BIN)
+            else:
+                raise ValueError(f"Unknown binning '{binning}', expected 'size' or 'count'")
             
             # Threshold analysis - how often does slippage exceed 1%
-            high_slippage_trades = self.db.session.query(self.Trade)\
-                .filter(self.Trade.jupiter_slippage > 1.0).count()
-            total_trades = self.db.session.query(self.Trade).count()
+            high_slippage_trades, total_trades = self._high_slippage_counts()
             
             high_slippage_ratio = (high_slippage_trades / total_trades * 100) if total_trades > 0 else 0
             
             return {
                 'size_vs_slippage': size_ranges,
+                'binning': binning,
                 'high_slippage_ratio': round(high_slippage_ratio, 2),
                 'threshold_analysis': {
                     'trades_above_1pct': high_slippage_trades,
@@ -280,27 +696,333 @@ class TradeLogger:
             self.logger.error(f"Error getting slippage analysis: {e}")
             return {'size_vs_slippage': [], 'high_slippage_ratio': 0}
     
-    def _record_trade_metrics(self, trade):
+    def rebuild_rollups(self, batch_size: int = 10000) -> int:
         """
-        Record system metrics for trade
+        Rebuild the rollup tables from the full trade history
+        
+        Used to backfill rollups for an existing database or to repair them.
+        Trades are streamed in batches so memory stays bounded by bucket count.
         
         Args:
-            trade: Trade object to record metrics for
+            batch_size: Rows fetched per round trip while streaming trades
+            
+        Returns:
+            Number of trades aggregated
         """
+        if self.TradeRollup is None:
+            raise RuntimeError("Rollups are not configured")
+        
+        session = self.db.session
+        Trade = self.Trade
         try:
-            # Record basic metrics
-            self.SystemMetrics.record_metric('trade_volume', trade.input_amount)
-            self.SystemMetrics.record_metric('slippage', trade.slippage)
-            self.SystemMetrics.record_metric('jupiter_slippage', trade.jupiter_slippage)
+            if self.db.engine.dialect.name == 'postgresql':
+                # Serialize concurrent rebuilds and hold back rollup upserts until this one commits
+                session.execute(text(f"LOCK TABLE {self.TradeRollup.__tablename__} IN EXCLUSIVE MODE"))
             
-            if trade.cost_savings > 0:
-                self.SystemMetrics.record_metric('cost_savings', trade.cost_savings)
+            session.query(self.TradeRollup).delete()
+            
+            rows = session.query(
+                Trade.route, Trade.input_token, Trade.output_token, Trade.input_amount,
+                Trade.output_amount, Trade.cost_savings, Trade.slippage, Trade.jupiter_slippage,
+                Trade.created_at
+            ).execution_options(yield_per=batch_size)
+            
+            deltas = {}
+            trade_count = 0
+            for row in rows:
+                self._add_rollup_deltas(deltas, row._mapping)
+                trade_count += 1
+            
+            self._apply_rollup_deltas(deltas)
+            session.commit()
+            
+            self.logger.info(f"Rebuilt trade rollups from {trade_count} trades ({len(deltas)} buckets)")
+            return trade_count
             
-            # Record route-specific metrics
-            if trade.route == 'OTC':
-                self.SystemMetrics.record_metric('otc_trade', 1)
-            else:
-                self.SystemMetrics.record_metric('dex_trade', 1)
-                
         except Exception as e:
-            self.logger.error(f"Error recording trade metrics: {e}")
\ No newline at end of file
+            self.logger.error(f"Error rebuilding rollups: {e}")
+            session.rollback()
+            raise
+    
+    def ensure_rollups(self):
+        """Backfill rollups once for a database that has trades but no rollup rows yet"""
+        if self.TradeRollup is None:
+            return
+        
+        session = self.db.session
+        if session.query(self.TradeRollup.id).first() is None and session.query(self.Trade.id).first() is not None:
+            self.rebuild_rollups()
+    
+    def _trade_totals_from_scan(self):
+        """Trade totals for get_trade_statistics computed over the Trade table"""
+        Trade = self.Trade
+        is_dex = Trade.route == 'DEX'
+        is_otc = Trade.route == 'OTC'
+        
+        # Range filter on created_at (rather than DATE(created_at)) so an index can be used
+        today_start = datetime.combine(datetime.now().date(), datetime.min.time())
+        is_today = (Trade.created_at >= today_start) & (Trade.created_at < today_start + timedelta(days=1))
+        
+        # Every statistic in one pass with conditional aggregation
+        return self.db.session.query(
+            func.count(Trade.id).label('total_trades'),
+            func.sum(case((is_dex, 1), else_=0)).label('dex_trades'),
+            func.sum(case((is_otc, 1), else_=0)).label('otc_trades'),
+            func.sum(Trade.input_amount).label('total_volume'),
+            func.sum(case((is_dex, Trade.input_amount), else_=0)).label('dex_volume'),
+            func.sum(case((is_otc, Trade.input_amount), else_=0)).label('otc_volume'),
+            func.sum(Trade.cost_savings).label('total_savings'),
+            func.avg(case((is_dex, Trade.slippage))).label('avg_dex_slippage'),
+            func.avg(Trade.jupiter_slippage).label('avg_jupiter_slippage'),
+            func.sum(case((is_today, 1), else_=0)).label('today_trades'),
+            func.sum(case((is_today, Trade.input_amount), else_=0)).label('today_volume'),
+            func.sum(case((is_today, Trade.cost_savings), else_=0)).label('today_savings')
+        ).one()
+    
+    def _trade_totals_from_rollups(self):
+        """Trade totals for get_trade_statistics read from the route and day rollups"""
+        R = self.TradeRollup
+        today = datetime.now().date().isoformat()
+        rows = self.db.session.query(R).filter(
+            or_(R.dimension == 'route', and_(R.dimension == 'day', R.bucket == today))
+        ).all()
+        
+        totals = SimpleNamespace(total_trades=0, dex_trades=0, otc_trades=0, total_volume=0.0,
+                                 dex_volume=0.0, otc_volume=0.0, total_savings=0.0,
+                                 avg_dex_slippage=0.0, avg_jupiter_slippage=0.0,
+                                 today_trades=0, today_volume=0.0, today_savings=0.0)
+        jupiter_slippage_sum = 0.0
+        
+        for row in rows:
+            if row.dimension == 'day':
+                totals.today_trades += row.trade_count
+                totals.today_volume += row.volume
+                totals.today_savings += row.cost_savings
+                continue
+            
+            totals.total_trades += row.trade_count
+            totals.total_volume += row.volume
+            totals.total_savings += row.cost_savings
+            jupiter_slippage_sum += row.jupiter_slippage_sum
+            if row.route == 'DEX':
+                totals.dex_trades = row.trade_count
+                totals.dex_volume = row.volume
+                totals.avg_dex_slippage = row.slippage_sum / row.trade_count if row.trade_count else 0.0
+            elif row.route == 'OTC':
+                totals.otc_trades = row.trade_count
+                totals.otc_volume = row.volume
+        
+        if totals.total_trades:
+            totals.avg_jupiter_slippage = jupiter_slippage_sum / totals.total_trades
+        return totals
+    
+    @staticmethod
+    def _brackets_fit_rollups(brackets: List[Tuple[float, float, str]]) -> bool:
+        """Whether every bracket edge falls on a size rollup bin boundary"""
+        edges = [edge for min_size, max_size, _ in brackets for edge in (min_size, max_size)
+                 if edge != float('inf')]
+        return all(edge >= 0 and edge % ROLLUP_SIZE_BIN == 0 for edge in edges)
+    
+    def _cost_savings_from_rollups(self, brackets: List[Tuple[float, float, str]]) -> Dict[str, Any]:
+        """get_cost_savings_analysis read from the day and size rollups"""
+        R = self.TradeRollup
+        thirty_days_ago = (datetime.now() - timedelta(days=30)).date().isoformat()
+        
+        daily = {}
+        for row in self.db.session.query(R).filter(R.dimension == 'day', R.bucket >= thirty_days_ago):
+            daily[row.bucket] = daily.get(row.bucket, 0.0) + row.cost_savings
+        
+        totals = {}
+        for row in self._rollup_rows('size'):
+            bin_start = float(row.bucket)
+            index = next((i for i, (min_size, max_size, _) in enumerate(brackets)
+                          if min_size <= bin_start < max_size), -1)
+            count, savings, otc_count, otc_savings = totals.get(index, (0, 0.0, 0, 0.0))
+            is_otc = row.route == 'OTC'
+            totals[index] = (
+                count + row.trade_count,
+                savings + row.cost_savings,
+                otc_count + (row.trade_count if is_otc else 0),
+                otc_savings + (row.cost_savings if is_otc else 0.0)
+            )
+        
+        return self._cost_savings_response(sorted(daily.items()), brackets, totals)
+    
+    def _slippage_bins_from_rollups(self) -> List[Dict[str, Any]]:
+        """Size-vs-slippage points read from the size rollups, one per ROLLUP_SIZE_BIN bin"""
+        bins = {}
+        for row in self._rollup_rows('size'):
+            agg = bins.setdefault(float(row.bucket), [0, 0.0, 0.0, 0])
+            agg[0] += row.trade_count
+            agg[1] += row.volume
+            agg[2] += row.jupiter_slippage_sum
+            if row.route == 'OTC':
+                agg[3] += row.trade_count
+        
+        return [
+            self._slippage_bin(count, volume / count, slippage_sum / count, otc_count)
+            for _, (count, volume, slippage_sum, otc_count) in sorted(bins.items())
+            if count
+        ]
+    
+    def _slippage_by_width(self, bin_width: float) -> List[Dict[str, Any]]:
+        """Size-vs-slippage points grouped into fixed-width size bins in SQL"""
+        Trade = self.Trade
+        if self.db.engine.dialect.name == 'sqlite':
+            # CAST truncates, which is floor for the non-negative amounts stored here
+            bin_index = cast(Trade.input_amount / bin_width, Integer)
+        else:
+            # PostgreSQL's CAST rounds, so floor explicitly
+            bin_index = cast(func.floor(Trade.input_amount / bin_width), Integer)
+        rows = self.db.session.query(
+            func.count(Trade.id),
+            func.avg(Trade.input_amount),
+            func.avg(Trade.jupiter_slippage),
+            func.sum(case((Trade.route == 'OTC', 1), else_=0))
+        ).group_by(bin_index).order_by(bin_index).all()
+        
+        return [self._slippage_bin(*row) for row in rows]
+    
+    def _slippage_by_quantile(self, bins: int) -> List[Dict[str, Any]]:
+        """Size-vs-slippage points grouped into equal-count size quantiles in SQL"""
+        Trade = self.Trade
+        ranked = self.db.session.query(
+            Trade.input_amount,
+            Trade.jupiter_slippage,
+            Trade.route,
+            func.ntile(bins).over(order_by=Trade.input_amount).label('tile')
+        ).subquery()
+        
+        rows = self.db.session.query(
+            func.count(),
+            func.avg(ranked.c.input_amount),
+            func.avg(ranked.c.jupiter_slippage),
+            func.sum(case((ranked.c.route == 'OTC', 1), else_=0))
+        ).group_by(ranked.c.tile).order_by(ranked.c.tile).all()
+        
+        return [self._slippage_bin(*row) for row in rows]
+    
+    @staticmethod
+    def _slippage_bin(count: int, avg_amount: float, avg_slippage: float, otc_count: int) -> Dict[str, Any]:
+        return {
+            'avg_amount': round(avg_amount or 0, 2),
+            'avg_slippage': round(avg_slippage or 0, 4),
+            'otc_ratio': round((otc_count or 0) / count, 2) if count else 0,
+            'trade_count': count
+        }
+    
+    def _high_slippage_counts(self) -> Tuple[int, int]:
+        """(trades with Jupiter slippage above 1%, total trades)"""
+        if self.TradeRollup is not None:
+            route_rows = self._rollup_rows('route')
+            return (sum(row.high_slippage_count for row in route_rows),
+                    sum(row.trade_count for row in route_rows))
+        
+        Trade = self.Trade
+        high, total = self.db.session.query(
+            func.sum(case((Trade.jupiter_slippage > 1.0, 1), else_=0)),
+            func.count(Trade.id)
+        ).one()
+        return high or 0, total or 0
+    
+    def _rollup_rows(self, dimension: str):
+        return self.db.session.query(self.TradeRollup).filter(self.TradeRollup.dimension == dimension).all()
+    
+    def _add_rollup_deltas(self, deltas: Dict[Tuple[str, str, str], List[float]], trade_row):
+        """Accumulate one trade's contribution to every rollup bucket it falls in"""
+        route = trade_row['route']
+        created_at = trade_row['created_at'] or datetime.utcnow()
+        input_amount = trade_row['input_amount'] or 0.0
+        jupiter_slippage = trade_row['jupiter_slippage'] or 0.0
+        size_bin = int(input_amount // ROLLUP_SIZE_BIN * ROLLUP_SIZE_BIN)
+        
+        buckets = (
+            ('route', route),
+            ('pair', f"{trade_row['input_token']}/{trade_row['output_token']}"),
+            ('size', str(size_bin)),
+            ('day', created_at.strftime('%Y-%m-%d')),
+            ('hour', created_at.strftime('%Y-%m-%dT%H'))
+        )
+        
+        for dimension, bucket in buckets:
+            delta = deltas.get((dimension, bucket, route))
+            if delta is None:
+                delta = deltas[(dimension, bucket, route)] = [0, 0.0, 0.0, 0.0, 0.0, 0.0, 0]
+            delta[0] += 1
+            delta[1] += input_amount
+            delta[2] += trade_row['output_amount'] or 0.0
+            delta[3] += trade_row['cost_savings'] or 0.0
+            delta[4] += trade_row['slippage'] or 0.0
+            delta[5] += jupiter_slippage
+            delta[6] += 1 if jupiter_slippage > 1.0 else 0
+    
+    def _apply_rollup_deltas(self, deltas: Dict[Tuple[str, str, str], List[float]]):
+        """
+        Add accumulated deltas to the rollup rows inside the current transaction
+        
+        SQLite and PostgreSQL use an executemany INSERT ... ON CONFLICT DO UPDATE
+        that increments in place; other databases fall back to locked
+        read-modify-write.
+        """
+        if not deltas:
+            return
+        
+        R = self.TradeRollup
+        session = self.db.session
+        now = datetime.utcnow()
+        rows = [
+            dict(zip(ROLLUP_SUM_COLUMNS, values), dimension=dimension, bucket=bucket, route=route, updated_at=now)
+            for (dimension, bucket, route), values in deltas.items()
+        ]
+        
+        dialect = self.db.engine.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(R.__table__)
+            increments = {column: getattr(R.__table__.c, column) + getattr(stmt.excluded, column)
+                          for column in ROLLUP_SUM_COLUMNS}
+            increments['updated_at'] = stmt.excluded.updated_at
+            stmt = stmt.on_conflict_do_update(index_elements=['dimension', 'bucket', 'route'], set_=increments)
+            
+            # Core executemany keeps the compiled statement cached across calls
+            session.connection().execute(stmt, rows)
+            return
+        
+        for row in rows:
+            existing = session.query(R).filter_by(
+                dimension=row['dimension'], bucket=row['bucket'], route=row['route']
+            ).with_for_update().first()
+            if existing is None:
+                session.add(R(**row))
+                session.flush()
+            else:
+                for column in ROLLUP_SUM_COLUMNS:
+                    setattr(existing, column, getattr(existing, column) + row[column])
+                existing.updated_at = now
+    
+    def _build_trade_metrics(self, trade_row: Dict[str, Any], timestamp: datetime) -> List[Dict[str, Any]]:
+        """
+        Build system metric rows for a trade
+        
+        Args:
+            trade_row: Trade column values
+            timestamp: Timestamp for the metric rows
+            
+        Returns:
+            SystemMetrics column values
+        """
+        metrics = [
+            ('trade_volume', trade_row['input_amount']),
+            ('slippage', trade_row['slippage']),
+            ('jupiter_slippage', trade_row['jupiter_slippage'])
+        ]
+        
+        if trade_row['cost_savings'] > 0:
+            metrics.append(('cost_savings', trade_row['cost_savings']))
+        
+        # Record route-specific metrics
+        if trade_row['route'] == 'OTC':
+            metrics.append(('otc_trade', 1))
+        else:
+            metrics.append(('dex_trade', 1))
+        
+        return [{'metric_name': name, 'metric_value': value, 'timestamp': timestamp} for name, value in metrics]